@@ -0,0 +1,463 @@
+# /backend/bench.py
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Usage:
+#   python bench.py --db bench.db --projects 50 --tasks 100 --requests 200 --concurrency 8 --output results.json
+#   python bench.py --db bench.db --compare results.json
+#   python bench.py --db bench.db --access-paths --concurrency 64
+#
+# Every endpoint of main.py is called in-process through FastAPI's TestClient
+# against a scratch database (generated on first use, see datagen.py). For each
+# endpoint we report latency percentiles, throughput, SQL statements per request
+# and the peak memory allocated while serving a few requests.
+# The /projects/{id}/events stream never ends on its own, so it is not timed here.
+#
+# --access-paths also runs the same crud calls at high concurrency without
+# HTTP, once through sync sessions on a 40-thread pool (how sync endpoints
+# run) and once through the async sessions and writer the endpoints now use.
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class StatementCounter:
+    """
+    Counts the SQL statements the given engines execute.
+    """
+
+    def __init__(self, *engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        self._lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+class Benchmark:
+    def __init__(self, client, counter, requests: int, concurrency: int, memory_requests: int = 20):
+        self.client = client
+        self.counter = counter
+        self.requests = requests
+        self.concurrency = concurrency
+        self.memory_requests = memory_requests
+
+    def _call(self, method, url, body, expected):
+        response = self.client.request(method, url, **body)
+        if response.status_code not in expected:
+            raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+        return response
+
+    def run(self, name, method, make_request, expected=(200,), on_response=None, requests=None, replayable=True):
+        """
+        Times `requests` calls of `make_request(i) -> (url, kwargs)`, spread over
+        the configured number of threads, then replays a few of them under
+        tracemalloc to measure peak memory (unless a request cannot be repeated,
+        like deleting the same row twice).
+        """
+        requests = requests or self.requests
+        latencies = []
+
+        def one(i):
+            url, body = make_request(i)
+            start = time.perf_counter()
+            response = self._call(method, url, body, expected)
+            elapsed = time.perf_counter() - start
+            if on_response is not None:
+                on_response(response)
+            return elapsed
+
+        statements_before = self.counter.count
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            latencies = sorted(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+        statements = self.counter.count - statements_before
+
+        # Memory is measured in a separate, sequential pass: tracemalloc slows
+        # everything down and would distort the latencies above.
+        memory_runs = min(self.memory_requests, requests) if replayable else 0
+        peak = None
+        if memory_runs:
+            tracemalloc.start()
+            try:
+                for i in range(memory_runs):
+                    url, body = make_request(i)
+                    self._call(method, url, body, expected)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        result = {
+            "endpoint": name,
+            "requests": requests,
+            "concurrency": self.concurrency,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p90_ms": percentile(latencies, 0.90) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+            "throughput_rps": requests / wall,
+            "statements_per_request": statements / requests,
+            "peak_memory_kb": peak / 1024 if peak is not None else None,
+        }
+        print(f"{name:<42} p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+              f"{result['throughput_rps']:8.1f} req/s  {result['statements_per_request']:6.1f} stmt/req  "
+              + (f"{result['peak_memory_kb']:9.1f} KiB" if peak is not None else ""))
+        return result
+
+
+# Words datagen puts in names and descriptions: common, rare, and a prefix being typed
+SEARCH_QUERIES = ["site", "wells", "Menabe site 1", "vacc"]
+
+
+def run_all(bench, db):
+    """
+    Runs one scenario per endpoint. Writes only touch rows the scenarios create
+    themselves, except for KPI increments, which go to the sample project.
+    """
+    import crud
+    import database_models as db_models
+    from datagen import generate_records
+    from models import ActivityCreate, ObjectiveCreate
+
+    project_id = db.query(db_models.Project.id).order_by(db_models.Project.id).first()[0]
+    tasks = [row.id for row in db.query(db_models.Task.id).join(db_models.Activity).join(db_models.Objective)
+             .filter(db_models.Objective.project_id == project_id).limit(1000)]
+    kpis = [row.id for row in db.query(db_models.KPI.id).join(db_models.Activity).join(db_models.Objective)
+            .filter(db_models.Objective.project_id == project_id).limit(1000)]
+    pick = lambda values, i: values[i % len(values)]
+    # A node of each level of the sample project, for the child collections
+    objective_id = db.query(db_models.Objective.id).filter(db_models.Objective.project_id == project_id) \
+        .order_by(db_models.Objective.id).first()[0]
+    activity_id = db.query(db_models.Activity.id).filter(db_models.Activity.objective_id == objective_id) \
+        .order_by(db_models.Activity.id).first()[0]
+
+    created_objectives, created_activities = [], []
+    lock = threading.Lock()
+
+    def remember(target):
+        def on_response(response):
+            with lock:
+                target.append(response.json()["changes"][0]["id"])
+        return on_response
+
+    run_id = int(time.time() * 1000)
+    import_body = "".join(
+        json.dumps(record) + "\n" for record in generate_records(1, 2, 3, 2, 10, seed=run_id)
+    ).encode()
+
+    results = [
+        bench.run("GET /", "GET", lambda i: ("/", {})),
+        bench.run("GET /projects", "GET", lambda i: ("/projects?limit=50", {})),
+        bench.run("GET /projects/{id}", "GET", lambda i: (f"/projects/{project_id}", {})),
+        bench.run("GET /projects/{id}?depth=1", "GET", lambda i: (f"/projects/{project_id}?depth=1", {})),
+        bench.run("GET /projects/{id}/objectives", "GET", lambda i: (f"/projects/{project_id}/objectives", {})),
+        bench.run("GET /objectives/{id}/activities", "GET", lambda i: (f"/objectives/{objective_id}/activities", {})),
+        bench.run("GET /activities/{id}/kpis", "GET", lambda i: (f"/activities/{activity_id}/kpis", {})),
+        bench.run("GET /activities/{id}/tasks", "GET", lambda i: (f"/activities/{activity_id}/tasks?limit=100", {})),
+        bench.run("GET /search", "GET", lambda i: (f"/search?q={pick(SEARCH_QUERIES, i)}", {})),
+        bench.run("GET /projects/{id}/changes", "GET", lambda i: (f"/projects/{project_id}/changes?since=0", {})),
+        bench.run("GET /projects/{id}/forecast", "GET", lambda i: (f"/projects/{project_id}/forecast", {})),
+        bench.run("GET /forecast", "GET", lambda i: ("/forecast", {}), requests=max(1, bench.requests // 10)),
+        bench.run("GET /kpis/{id}/history", "GET", lambda i: (f"/kpis/{pick(kpis, i)}/history?bucket=day", {})),
+        bench.run("POST /data-entry", "POST", lambda i: (
+            "/data-entry", {"json": {"taskId": pick(tasks, i), "numericValue": 1}})),
+        bench.run("POST /sync (50 entries)", "POST", lambda i: ("/sync", {"json": {"entries": [
+            {"clientId": f"bench-{run_id}-{i}-{n}", "taskId": pick(tasks, i + n), "numericValue": 1}
+            for n in range(50)
+        ]}})),
+        bench.run("POST /projects/{id}/objectives", "POST", lambda i: (
+            f"/projects/{project_id}/objectives", {"json": {"name": f"Bench objective {i}"}}),
+            on_response=remember(created_objectives), replayable=False),
+    ]
+    results += [
+        bench.run("PUT /objectives/{id}", "PUT", lambda i: (
+            f"/objectives/{pick(created_objectives, i)}", {"json": {"name": f"Renamed {i}"}})),
+        bench.run("POST /objectives/{id}/activities", "POST", lambda i: (
+            f"/objectives/{pick(created_objectives, i)}/activities", {"json": {"name": f"Bench activity {i}"}}),
+            on_response=remember(created_activities), replayable=False),
+    ]
+    results += [
+        bench.run("PUT /activities/{id}", "PUT", lambda i: (
+            f"/activities/{pick(created_activities, i)}", {"json": {"name": f"Renamed {i}"}})),
+        bench.run("DELETE /activities/{id}", "DELETE", lambda i: (
+            f"/activities/{created_activities[i]}", {}), requests=len(created_activities), replayable=False),
+        bench.run("DELETE /objectives/{id}", "DELETE", lambda i: (
+            f"/objectives/{created_objectives[i]}", {}), requests=len(created_objectives), replayable=False),
+    ]
+
+    # The bulk deletes need objects to remove; create them outside the timing
+    batches = max(1, bench.requests // 10)
+    bulk_objectives = [
+        crud.create_objective(db, ObjectiveCreate(name="Bulk"), project_id)["changes"][0]["id"]
+        for _ in range(batches * 10)
+    ]
+    bulk_activities = []
+    for objective_id in bulk_objectives[:batches]:
+        for _ in range(10):
+            bulk_activities.append(
+                crud.create_activity(db, ActivityCreate(name="Bulk"), objective_id)["changes"][0]["id"]
+            )
+    ids_query = lambda ids, i: "&".join(f"ids={value}" for value in ids[i * 10:(i + 1) * 10])
+    results += [
+        bench.run("DELETE /activities?ids= (10 ids)", "DELETE", lambda i: (
+            f"/activities?{ids_query(bulk_activities, i)}", {}), requests=batches, replayable=False),
+        bench.run("DELETE /objectives?ids= (10 ids)", "DELETE", lambda i: (
+            f"/objectives?{ids_query(bulk_objectives, i)}", {}), requests=batches, replayable=False),
+        bench.run("GET /export (one project)", "GET", lambda i: (f"/export?project_id={project_id}", {}),
+                  requests=max(1, bench.requests // 10)),
+        bench.run("POST /import (small project)", "POST", lambda i: ("/import", {"content": import_body}),
+                  requests=max(1, bench.requests // 10)),
+    ]
+
+    # Identical report requests share one job, so this mostly times the
+    # lookup of the job in flight; the reads below need a finished one
+    report_jobs = []
+    results.append(bench.run("POST /reports (one project)", "POST", lambda i: (
+        "/reports", {"json": {"format": "csv", "project_ids": [project_id]}}), expected=(202,),
+        on_response=lambda response: report_jobs.append(response.json()["id"]),
+        requests=max(1, bench.requests // 10), replayable=False))
+    report_id = wait_for_report(bench.client, report_jobs[-1])
+    results += [
+        bench.run("GET /reports/{id}", "GET", lambda i: (f"/reports/{report_id}", {})),
+        bench.run("GET /reports/{id}/download", "GET", lambda i: (f"/reports/{report_id}/download", {}),
+                  requests=max(1, bench.requests // 10)),
+        bench.run("GET /metrics", "GET", lambda i: ("/metrics", {}), requests=max(1, bench.requests // 10)),
+    ]
+    return results
+
+
+def wait_for_report(client, job_id: int, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/reports/{job_id}").json()
+        if job["status"] == "done":
+            return job_id
+        if job["status"] == "failed" or time.monotonic() > deadline:
+            raise RuntimeError(f"Report {job_id} did not finish: {job}")
+        time.sleep(0.05)
+
+
+class SyncPath:
+    """
+    Sync sessions on a thread pool the size of FastAPI's, with the threaded group committer.
+    """
+    name = "sync"
+
+    def __init__(self, threads: int = 40):
+        from database import SessionLocal
+        from group_commit import GroupCommitter
+
+        self.session_factory = SessionLocal
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        self.writer = GroupCommitter(SessionLocal)
+
+    def _read(self, fn, **kwargs):
+        db = self.session_factory()
+        try:
+            return fn(db, **kwargs)
+        finally:
+            db.close()
+
+    async def get_project(self, project_id):
+        import crud
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool, lambda: self._read(crud.get_project, project_id=project_id)
+        )
+
+    async def data_entry(self, payload):
+        import crud
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool, self.writer.submit, crud.apply_data_entry, payload
+        )
+
+    async def close(self):
+        self.pool.shutdown()
+
+
+class AsyncPath:
+    """
+    Async sessions from the read pool; writes awaited on the group committer's thread.
+    """
+    name = "async"
+
+    def __init__(self):
+        from database import SessionLocal
+        from database_async import AsyncSessionLocal
+        from group_commit import GroupCommitter
+
+        self.session_factory = AsyncSessionLocal
+        self.writer = GroupCommitter(SessionLocal)
+
+    async def get_project(self, project_id):
+        import crud_async
+        async with self.session_factory() as db:
+            return await crud_async.get_project(db, project_id=project_id)
+
+    async def data_entry(self, payload):
+        import crud
+        return await self.writer.submit_async(crud.apply_data_entry, payload)
+
+    async def close(self):
+        from database_async import read_engine
+        await read_engine.dispose()
+
+
+async def _drive(operation, requests: int, concurrency: int):
+    latencies = []
+
+    async def worker(offset):
+        for i in range(offset, requests, concurrency):
+            start = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return sorted(latencies), time.perf_counter() - started
+
+
+async def _drive_all(path, scenarios, requests: int, concurrency: int):
+    timings = []
+    try:
+        for name, operation in scenarios:
+            timings.append((name, *await _drive(operation, requests, concurrency)))
+    finally:
+        await path.close()
+    return timings
+
+
+def compare_access_paths(db, requests: int, concurrency: int):
+    """
+    Times tree reads, KPI increments and a 90/10 mix of both through each access path.
+    """
+    import database_models as db_models
+    from models import DataEntryPayload
+
+    project_id = db.query(db_models.Project.id).order_by(db_models.Project.id).first()[0]
+    task_ids = [row.id for row in db.query(db_models.Task.id).limit(1000)]
+
+    def scenarios(path):
+        entry = lambda i: path.data_entry(DataEntryPayload(taskId=task_ids[i % len(task_ids)], numericValue=1))
+        read = lambda i: path.get_project(project_id)
+        return [
+            ("GET /projects/{id}", read),
+            ("POST /data-entry", entry),
+            ("90% reads / 10% writes", lambda i: entry(i) if i % 10 == 0 else read(i)),
+        ]
+
+    results = []
+    print(f"\nAccess paths, {requests} calls at concurrency {concurrency}:")
+    for path in (SyncPath(), AsyncPath()):
+        # One event loop per path: the async engines' pools are tied to it
+        for name, latencies, wall in asyncio.run(_drive_all(path, scenarios(path), requests, concurrency)):
+            result = {
+                "path": path.name,
+                "scenario": name,
+                "requests": requests,
+                "concurrency": concurrency,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "throughput_rps": requests / wall,
+            }
+            print(f"{path.name:<6} {name:<28} p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+                  f"{result['throughput_rps']:8.1f} req/s")
+            results.append(result)
+    return results
+
+
+def compare(previous_path, results):
+    with open(previous_path) as f:
+        previous = {row["endpoint"]: row for row in json.load(f)["results"]}
+    print(f"\nChange in p50 latency vs {previous_path}:")
+    for row in results:
+        before = previous.get(row["endpoint"])
+        if before and before["p50_ms"]:
+            change = (row["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+            print(f"{row['endpoint']:<42} {before['p50_ms']:8.2f}ms -> {row['p50_ms']:8.2f}ms ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every endpoint in-process.")
+    parser.add_argument("--db", default="bench.db", help="scratch SQLite file (never the real database)")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--objectives", type=int, default=5)
+    parser.add_argument("--activities", type=int, default=10)
+    parser.add_argument("--kpis", type=int, default=3)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--access-paths", action="store_true",
+                        help="also compare the sync and async database paths without HTTP")
+    args = parser.parse_args()
+
+    # Must be set before anything imports database.py
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ.setdefault("REPORTS_DIR", f"{args.db}-reports")
+
+    from fastapi.testclient import TestClient
+
+    import database
+    import database_async
+    import database_models
+    import datagen
+    import main
+    import migrations
+
+    scale = {key: getattr(args, key) for key in ("projects", "objectives", "activities", "kpis", "tasks")}
+    migrations.migrate(database.engine)
+    db = database.SessionLocal()
+    try:
+        if db.query(database_models.Project.id).first() is None:
+            print(f"Generating {scale} into {args.db}...")
+            started = time.perf_counter()
+            inserted = datagen.generate(db, **scale)
+            print(f"Inserted {inserted} in {time.perf_counter() - started:.1f}s")
+
+        counter = StatementCounter(database.engine, database_async.read_engine.sync_engine)
+        with TestClient(main.app) as client:
+            bench = Benchmark(client, counter, args.requests, args.concurrency)
+            results = run_all(bench, db)
+        access_paths = compare_access_paths(db, args.requests, args.concurrency) if args.access_paths else None
+    finally:
+        db.close()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": args.db,
+            "scale": scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+        "access_paths": access_paths,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        compare(args.compare, results)
@@ -0,0 +1,95 @@
+# /backend/broadcaster.py
+
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    """
+    One connected client. Events wait in a bounded queue until the client reads
+    them; a client that falls too far behind gets its queue replaced by a single
+    "resync" event telling it to reload the project instead.
+    """
+
+    def __init__(self, project_id: int, max_queue: int):
+        self.project_id = project_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait({"type": "resync", "project_id": self.project_id, "version": event.get("version")})
+
+    async def get(self, timeout: float = None):
+        """
+        Waits for the next event. Returns None if nothing arrived within `timeout`.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    """
+    In-process fan-out of project events to every subscribed client.
+
+    `publish` may be called from any thread (sync endpoints run in the
+    threadpool); delivery always happens on the event loop the subscribers
+    live on, with a single hop per published event however many clients
+    are listening.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._loop = None
+
+    def subscribe(self, project_id: int) -> Subscription:
+        """
+        Registers a new subscriber for a project. Must be called from the event loop.
+        """
+        subscription = Subscription(project_id, self.max_queue)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.project_id]
+
+    def subscriber_count(self, project_id: int = None) -> int:
+        with self._lock:
+            if project_id is not None:
+                return len(self._subscribers.get(project_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, project_id: int, event: dict):
+        """
+        Sends an event to every subscriber of the project. Never blocks.
+        """
+        with self._lock:
+            if not self._subscribers.get(project_id):
+                return
+            loop = self._loop
+        if loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._deliver, project_id, event)
+
+    def _deliver(self, project_id: int, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for subscription in subscribers:
+            subscription.offer(event)
@@ -0,0 +1,291 @@
+# /backend/bulk_io.py
+
+import csv
+import io
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import database_models as db_models
+import progress
+import search
+
+# One record per line (NDJSON) or per row (CSV). Parents must come before
+# their children; `ref` is any string unique per type within the file, and
+# `parent` / `kpi` point at the ref of an earlier record:
+#
+#   {"type": "project", "ref": "p1", "name": "Water Access Initiative"}
+#   {"type": "objective", "ref": "o1", "parent": "p1", "name": "Improve Access to Clean Water"}
+#   {"type": "activity", "ref": "a1", "parent": "o1", "name": "Drill New Wells"}
+#   {"type": "kpi", "ref": "k1", "parent": "a1", "name": "Wells Drilled", "unit": "wells", "current_value": 7, "target_value": 15}
+#   {"type": "task", "ref": "t1", "parent": "a1", "kpi": "k1", "description": "Drill Well #7"}
+CSV_COLUMNS = ["type", "ref", "parent", "kpi", "name", "unit", "current_value", "target_value", "description"]
+FORMATS = ("ndjson", "csv")
+
+# Record type -> (model, type of its parent, column holding the parent's id)
+LEVELS = {
+    "project": (db_models.Project, None, None),
+    "objective": (db_models.Objective, "project", "project_id"),
+    "activity": (db_models.Activity, "objective", "objective_id"),
+    "kpi": (db_models.KPI, "activity", "activity_id"),
+    "task": (db_models.Task, "activity", "activity_id"),
+}
+# Insert order, so a batch is never flushed before the batches of its parents
+ORDER = ["project", "objective", "activity", "kpi", "task"]
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+class BulkImporter:
+    """
+    Loads project hierarchies in large executemany batches.
+
+    Records are written `transaction_batches` batches per transaction, so a
+    large import never holds the write lock for long. Each transaction first
+    takes the lock and moves the next IDs past each table's current maximum,
+    then assigns IDs itself, so children can reference their parents without
+    waiting for the database to hand IDs back. Only refs of records that can
+    be parents are remembered; tasks are streamed straight through.
+
+    Transactions run on `db`, or are handed to `writer` (a GroupCommitter)
+    so that other writes get their turn between them.
+    """
+
+    def __init__(self, db: Session = None, batch_size: int = 10000, transaction_batches: int = 5, writer=None):
+        self.db = db
+        self.writer = writer
+        self.batch_size = batch_size
+        self.transaction_size = batch_size * transaction_batches
+        self.next_id = {kind: 1 for kind in ORDER}
+        # ref -> (id, project id)
+        self.refs = {kind: {} for kind in ORDER if kind != "task"}
+        self.records = []
+        self.pending = {kind: [] for kind in ORDER}
+        self.counts = {kind: 0 for kind in ORDER}
+        # Projects whose progress the current transaction changes
+        self.touched = set()
+
+    def add(self, record: dict, line: int = None):
+        self.records.append((line, record))
+        if len(self.records) >= self.transaction_size:
+            self._transaction()
+
+    def resolve(self, record: dict, line: int = None):
+        """
+        Checks a record, gives it the next ID and resolves its references.
+        Returns (record type, row to insert).
+        """
+        kind = record.get("type")
+        where = f"line {line}: " if line is not None else ""
+        if kind not in LEVELS:
+            raise BulkImportError(f"{where}unknown record type {kind!r}")
+        _, parent_kind, parent_column = LEVELS[kind]
+
+        row = {"id": self.next_id[kind]}
+        project_id = row["id"]
+        if parent_kind is not None:
+            parent = self.refs[parent_kind].get(str(record.get("parent")))
+            if parent is None:
+                raise BulkImportError(f"{where}{kind} refers to unknown {parent_kind} {record.get('parent')!r}")
+            row[parent_column], project_id = parent
+
+        if kind == "kpi":
+            try:
+                current_value = float(record.get("current_value") or 0.0)
+                target_value = float(record.get("target_value") or 100.0)
+            except (TypeError, ValueError) as exc:
+                raise BulkImportError(f"{where}invalid kpi values: {exc}")
+            row.update(name=record.get("name"), unit=record.get("unit"),
+                       current_value=current_value, target_value=target_value)
+        elif kind == "task":
+            kpi = self.refs["kpi"].get(str(record.get("kpi")))
+            if kpi is None:
+                raise BulkImportError(f"{where}task refers to unknown kpi {record.get('kpi')!r}")
+            row.update(description=record.get("description"), kpi_id=kpi[0])
+        else:
+            row["name"] = record.get("name")
+
+        if kind != "task":
+            ref = record.get("ref")
+            if ref is not None:
+                self.refs[kind][str(ref)] = (row["id"], project_id)
+            # Tasks do not count towards completion
+            self.touched.add(project_id)
+
+        self.next_id[kind] += 1
+        return kind, row
+
+    def flush(self, db: Session):
+        for kind in ORDER:
+            rows = self.pending[kind]
+            if rows:
+                db.execute(LEVELS[kind][0].__table__.insert(), rows)
+                text_column = "description" if kind == "task" else "name"
+                search.index(db, kind, [(row["id"], row[text_column]) for row in rows])
+                self.counts[kind] += len(rows)
+                self.pending[kind] = []
+
+    def finish(self):
+        """
+        Writes what is left. Returns the number of rows inserted per record type.
+        """
+        if self.records:
+            self._transaction()
+        return dict(self.counts)
+
+    def _transaction(self):
+        records, self.records = self.records, []
+        if self.writer is not None:
+            self.writer.run(self._write, records)
+            return
+        try:
+            self._write(self.db, records)
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _write(self, db: Session, records):
+        """
+        Inserts the records, updates the touched projects' progress and commits.
+        """
+        # Take the write lock before reading the current maximum IDs, so no other
+        # writer can claim an ID we are about to use before we commit.
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        for kind, (model, _, _) in LEVELS.items():
+            self.next_id[kind] = max(self.next_id[kind], (db.execute(select(func.max(model.id))).scalar() or 0) + 1)
+        self.touched = set()
+        for line, record in records:
+            kind, row = self.resolve(record, line)
+            self.pending[kind].append(row)
+            if len(self.pending[kind]) >= self.batch_size:
+                self.flush(db)
+        self.flush(db)
+        if self.touched:
+            progress.rebuild(db, self.touched)
+        db.commit()
+
+
+def read_records(stream, fmt: str = "ndjson"):
+    """
+    Yields (line number, record) pairs from a binary stream, one at a time.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+            return
+        for line_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as exc:
+                raise BulkImportError(f"line {line_number}: invalid JSON ({exc})")
+    finally:
+        # Leave the stream open, so it can be read again
+        text.detach()
+
+
+def check_stream(stream, fmt: str = "ndjson"):
+    """
+    Reads a whole NDJSON or CSV stream and resolves every record as an import
+    would, without writing anything. Raises BulkImportError on the first
+    invalid record.
+    """
+    if fmt not in FORMATS:
+        raise BulkImportError(f"unsupported format {fmt!r}")
+    importer = BulkImporter()
+    for line_number, record in read_records(stream, fmt):
+        importer.resolve(record, line_number)
+
+
+def import_stream(stream, fmt: str = "ndjson", db: Session = None, writer=None, batch_size: int = 10000):
+    """
+    Imports every record of an NDJSON or CSV stream, on `db` or through
+    `writer` (see BulkImporter), a few transactions at a time. The stream is
+    checked in full first, so nothing is kept if any record is invalid.
+    Returns the number of rows inserted per record type.
+    """
+    check_stream(stream, fmt)
+    stream.seek(0)
+    importer = BulkImporter(db, batch_size=batch_size, writer=writer)
+    for line_number, record in read_records(stream, fmt):
+        importer.add(record, line_number)
+    return importer.finish()
+
+
+# --- Export ---
+
+def export_records(db: Session, project_ids=None, yield_per: int = 5000):
+    """
+    Yields every record of the given projects (all if None) in import format,
+    table by table so parents always come before their children. Rows are
+    streamed from the database rather than loaded all at once.
+    """
+    Project, Objective, Activity, KPI, Task = (
+        db_models.Project, db_models.Objective, db_models.Activity, db_models.KPI, db_models.Task
+    )
+    projects = select(Project.id, Project.name)
+    objectives = select(Objective.id, Objective.project_id, Objective.name)
+    activities = select(Activity.id, Activity.objective_id, Activity.name).join(Objective)
+    kpis = select(KPI.id, KPI.activity_id, KPI.name, KPI.unit, KPI.current_value, KPI.target_value) \
+        .join(Activity).join(Objective)
+    tasks = select(Task.id, Task.activity_id, Task.kpi_id, Task.description).join(Activity).join(Objective)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        projects = projects.where(Project.id.in_(project_ids))
+        objectives = objectives.where(Objective.project_id.in_(project_ids))
+        activities = activities.where(Objective.project_id.in_(project_ids))
+        kpis = kpis.where(Objective.project_id.in_(project_ids))
+        tasks = tasks.where(Objective.project_id.in_(project_ids))
+
+    def stream(query, order_by):
+        return db.execute(query.order_by(order_by).execution_options(yield_per=yield_per))
+
+    for row in stream(projects, Project.id):
+        yield {"type": "project", "ref": f"p{row.id}", "name": row.name}
+    for row in stream(objectives, Objective.id):
+        yield {"type": "objective", "ref": f"o{row.id}", "parent": f"p{row.project_id}", "name": row.name}
+    for row in stream(activities, Activity.id):
+        yield {"type": "activity", "ref": f"a{row.id}", "parent": f"o{row.objective_id}", "name": row.name}
+    for row in stream(kpis, KPI.id):
+        yield {"type": "kpi", "ref": f"k{row.id}", "parent": f"a{row.activity_id}", "name": row.name,
+               "unit": row.unit, "current_value": row.current_value, "target_value": row.target_value}
+    for row in stream(tasks, Task.id):
+        yield {"type": "task", "ref": f"t{row.id}", "parent": f"a{row.activity_id}", "kpi": f"k{row.kpi_id}",
+               "description": row.description}
+
+
+def export_chunks(session_factory, fmt: str = "ndjson", project_ids=None, chunk_records: int = 2000):
+    """
+    Yields the export encoded as NDJSON or CSV, a chunk of records at a time.
+    Opens its own session, since it outlives the request that started it.
+    """
+    db = session_factory()
+    try:
+        buffer = io.StringIO()
+        if fmt == "csv":
+            writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                buffer.write(json.dumps(record))
+                buffer.write("\n")
+
+        for count, record in enumerate(export_records(db, project_ids), start=1):
+            write(record)
+            if count % chunk_records == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        db.close()
@@ -0,0 +1,177 @@
+# /backend/compression.py
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# brotli is optional; without it responses are only ever gzipped
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first when the client accepts several encodings equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str):
+    """
+    Picks the best encoding we support from an Accept-Encoding header, or None.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            weights[token] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+# Content codings whose ETag suffix etag_without_encoding() removes
+ETAG_ENCODINGS = ("br", "gzip")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    '"abc"' -> '"abc-gzip"': a strong ETag must differ between the content
+    codings of a response (RFC 9110 8.8.1).
+    """
+    if not etag.endswith('"') or len(etag.removeprefix("W/")) < 2:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_without_encoding(etag: str) -> str:
+    """
+    Undoes encoded_etag(), so a validator compares equal whatever the coding.
+    """
+    for encoding in ETAG_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits=31 writes the gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        """
+        Compresses a chunk. Streamed chunks are flushed so each one reaches
+        the client as soon as it is produced.
+        """
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if finish else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, whichever the client prefers.
+
+    Bodies sent in one piece are compressed only from `minimum_size` bytes;
+    streamed bodies (like /export) are compressed chunk by chunk. Responses
+    that already carry a Content-Encoding, and media types in
+    `exclude_media_types` (event streams must not be buffered), pass through.
+    A compressed response's ETag gets the encoding as a suffix; a 304 echoes
+    the tag the client sent, so it keeps the one that matches its copy.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 exclude_media_types=("text/event-stream",)):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_media_types = tuple(exclude_media_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                start["headers"] = list(start.get("headers", []))
+                headers = MutableHeaders(raw=start["headers"])
+                streamed = more_body
+                if (
+                    "content-encoding" in headers
+                    or headers.get("content-type", "").startswith(self.exclude_media_types)
+                    or (not streamed and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    if start["status"] == 304 and "etag" in headers:
+                        headers["ETag"] = _sent_etag(request_headers.get("if-none-match", ""), headers["etag"])
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                body = compressor.compress(body, finish=not more_body)
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                headers.add_vary_header("Accept-Encoding")
+                if streamed:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+            else:
+                body = compressor.compress(body, finish=not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _sent_etag(if_none_match: str, etag: str) -> str:
+    """
+    The tag of If-None-Match that stands for `etag` in some coding, or `etag`.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if etag_without_encoding(tag.removeprefix("W/")) == etag:
+            return tag.removeprefix("W/")
+    return etag
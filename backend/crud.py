@@ -1,26 +1,232 @@
 # /backend/crud.py - FINAL CORRECTED VERSION
 
-from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
 
 # --- Corrected ABSOLUTE imports ---
 import database_models as db_models
 import models as pydantic_models
+import progress
+import search
+import tree_cache
 
 # --- READ Functions ---
 
-def get_project(db: Session, project_id: int):
+def _keyset_page(rows, limit: int, to_item):
+    """
+    One page of items from `limit + 1` rows ordered by ID: the extra row only
+    tells whether there is a next page, which starts after the last item's ID.
+    """
+    items = [to_item(row) for row in rows[:limit]]
+    next_after = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_after": next_after}
+
+def _chunked(values, size: int = 500):
+    """
+    Splits a list of IDs to stay under SQLite's limit on bound parameters.
+    """
+    values = list(values)
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+def _exists(db: Session, model, entity_id: int) -> bool:
+    return db.query(model.id).filter(model.id == entity_id).first() is not None
+
+def _with_progress(query, level: str, id_column):
+    """
+    Adds the node's stored progress (kpi_count, progress_sum) to a query.
+    """
+    return query.add_columns(db_models.Progress.kpi_count, db_models.Progress.progress_sum).outerjoin(
+        db_models.Progress, (db_models.Progress.level == level) & (db_models.Progress.node_id == id_column)
+    )
+
+def _summary(row):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "kpi_count": row.kpi_count or 0,
+        "completion": progress.completion(row.kpi_count or 0, row.progress_sum or 0.0),
+    }
+
+def list_projects(db: Session, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of project summaries ordered by ID, starting after the
+    given ID (keyset pagination). Completion comes from the maintained
+    progress rows, so no project tree is loaded.
+    """
+    query = _with_progress(db.query(db_models.Project.id, db_models.Project.name), "project", db_models.Project.id)
+    rows = query.filter(db_models.Project.id > after).order_by(db_models.Project.id).limit(limit + 1).all()
+    return _keyset_page(rows, limit, _summary)
+
+# --- Project trees ---
+
+# Fields each level of a project tree can return, besides the id that is always there
+TREE_FIELDS = {
+    "project": ("name", "version"),
+    "objective": ("name",),
+    "activity": ("name",),
+    "kpi": ("name", "current_value", "target_value", "unit"),
+    "task": ("description", "kpi_id"),
+}
+# Levels below the project: 1 = objectives, 2 = activities, 3 = KPIs and tasks
+TREE_DEPTH = 3
+
+def tree_fields(spec: str):
+    """
+    Parses a field selection such as "objective.name,kpi.current_value" into
+    {level: set of fields}. Levels it does not mention keep all their fields.
+    Raises ValueError on an unknown level or field.
+    """
+    fields = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        level, _, name = item.partition(".")
+        if level not in TREE_FIELDS or (name not in TREE_FIELDS[level] and name != "id"):
+            raise ValueError(f"unknown field {item!r}")
+        fields.setdefault(level, set()).add(name)
+    return fields
+
+def _tree_node(row, names):
+    node = {"id": row.id}
+    for name in names:
+        value = getattr(row, name)
+        node[name] = float(value) if name in ("current_value", "target_value") else value
+    return node
+
+def get_project(db: Session, project_id: int, depth: int = TREE_DEPTH, fields: dict = None):
     """
-    Retrieves a single project by its ID, eagerly loading all related data.
+    Retrieves a single project by its ID together with its
+    Objective -> Activity -> KPI/Task tree, down to `depth` levels (see
+    TREE_DEPTH). `fields` ({level: names}, see tree_fields) limits what each
+    level returns. A node only has its children's list when that level was
+    loaded, so an absent list means "not loaded" rather than "empty".
+
+    Each level is fetched with one flat query filtered on the project, so the
+    number of rows read grows linearly with the size of the loaded levels (no
+    cartesian product between KPIs and Tasks), and levels below `depth` are
+    not queried at all. The tree is assembled in memory from plain dicts
+    rather than ORM instances. Returns None if the project does not exist.
     """
-    return db.query(db_models.Project).options(
-        joinedload(db_models.Project.objectives)
-        .joinedload(db_models.Objective.activities)
-        .joinedload(db_models.Activity.kpis)
-    ).options(
-         joinedload(db_models.Project.objectives)
-        .joinedload(db_models.Objective.activities)
-        .joinedload(db_models.Activity.tasks)
+    fields = fields or {}
+
+    def selected(level):
+        return [name for name in TREE_FIELDS[level] if level not in fields or name in fields[level]]
+
+    project_row = db.query(
+        db_models.Project.id, db_models.Project.name, _project_version(project_id).label("version")
     ).filter(db_models.Project.id == project_id).first()
+    if project_row is None:
+        return None
+    project = _tree_node(project_row, selected("project"))
+    if depth < 1:
+        return project
+
+    project["objectives"] = []
+    objective_fields = selected("objective")
+    objectives = {}
+    for row in db.query(db_models.Objective.id, db_models.Objective.name).filter(
+        db_models.Objective.project_id == project_id
+    ).order_by(db_models.Objective.id):
+        objective = _tree_node(row, objective_fields)
+        if depth >= 2:
+            objective["activities"] = []
+        objectives[row.id] = objective
+        project["objectives"].append(objective)
+    if depth < 2:
+        return project
+
+    activity_fields = selected("activity")
+    activities = {}
+    for row in db.query(
+        db_models.Activity.id, db_models.Activity.name, db_models.Activity.objective_id
+    ).join(db_models.Objective).filter(
+        db_models.Objective.project_id == project_id
+    ).order_by(db_models.Activity.id):
+        activity = _tree_node(row, activity_fields)
+        if depth >= 3:
+            activity["kpis"] = []
+            activity["tasks"] = []
+        activities[row.id] = activity
+        objectives[row.objective_id]["activities"].append(activity)
+    if depth < 3:
+        return project
+
+    kpi_fields = selected("kpi")
+    for row in db.query(
+        db_models.KPI.id, db_models.KPI.name, db_models.KPI.unit,
+        db_models.KPI.current_value, db_models.KPI.target_value, db_models.KPI.activity_id,
+    ).join(db_models.Activity).join(db_models.Objective).filter(
+        db_models.Objective.project_id == project_id
+    ).order_by(db_models.KPI.id):
+        activities[row.activity_id]["kpis"].append(_tree_node(row, kpi_fields))
+
+    task_fields = selected("task")
+    for row in db.query(
+        db_models.Task.id, db_models.Task.description, db_models.Task.kpi_id, db_models.Task.activity_id
+    ).join(db_models.Activity).join(db_models.Objective).filter(
+        db_models.Objective.project_id == project_id
+    ).order_by(db_models.Task.id):
+        activities[row.activity_id]["tasks"].append(_tree_node(row, task_fields))
+
+    return project
+
+# --- Child collections (keyset pagination, for trees loaded level by level) ---
+
+def list_objectives(db: Session, project_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of a project's objectives with their completion, ordered
+    by ID after the given ID. Returns None if the project does not exist.
+    """
+    if not _exists(db, db_models.Project, project_id):
+        return None
+    query = _with_progress(
+        db.query(db_models.Objective.id, db_models.Objective.name), "objective", db_models.Objective.id
+    )
+    rows = query.filter(
+        db_models.Objective.project_id == project_id, db_models.Objective.id > after
+    ).order_by(db_models.Objective.id).limit(limit + 1).all()
+    return _keyset_page(rows, limit, _summary)
+
+def list_activities(db: Session, objective_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of an objective's activities with their completion.
+    Returns None if the objective does not exist.
+    """
+    if not _exists(db, db_models.Objective, objective_id):
+        return None
+    query = _with_progress(
+        db.query(db_models.Activity.id, db_models.Activity.name), "activity", db_models.Activity.id
+    )
+    rows = query.filter(
+        db_models.Activity.objective_id == objective_id, db_models.Activity.id > after
+    ).order_by(db_models.Activity.id).limit(limit + 1).all()
+    return _keyset_page(rows, limit, _summary)
+
+def list_kpis(db: Session, activity_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of an activity's KPIs. Returns None if the activity does not exist.
+    """
+    if not _exists(db, db_models.Activity, activity_id):
+        return None
+    rows = db.query(
+        db_models.KPI.id, db_models.KPI.name, db_models.KPI.unit,
+        db_models.KPI.current_value, db_models.KPI.target_value,
+    ).filter(
+        db_models.KPI.activity_id == activity_id, db_models.KPI.id > after
+    ).order_by(db_models.KPI.id).limit(limit + 1).all()
+    return _keyset_page(rows, limit, lambda row: _tree_node(row, TREE_FIELDS["kpi"]))
+
+def list_tasks(db: Session, activity_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of an activity's tasks. Returns None if the activity does not exist.
+    """
+    if not _exists(db, db_models.Activity, activity_id):
+        return None
+    rows = db.query(db_models.Task.id, db_models.Task.description, db_models.Task.kpi_id).filter(
+        db_models.Task.activity_id == activity_id, db_models.Task.id > after
+    ).order_by(db_models.Task.id).limit(limit + 1).all()
+    return _keyset_page(rows, limit, lambda row: _tree_node(row, TREE_FIELDS["task"]))
 
 def get_task(db: Session, task_id: int):
     """
@@ -28,105 +234,481 @@ def get_task(db: Session, task_id: int):
     """
     return db.query(db_models.Task).filter(db_models.Task.id == task_id).first()
 
+def get_project_version(db: Session, project_id: int) -> int:
+    """
+    The latest version recorded for a project (0 if none), from the change log's index.
+    """
+    return db.execute(select(_project_version(project_id))).scalar()
+
+def get_changes(db: Session, project_id: int, since: int = 0, limit: int = 1000):
+    """
+    Retrieves the changes recorded for a project after version `since`, oldest first.
+    If more than `limit` changes are pending, the returned version is the last one
+    included, so the client can ask again from there.
+    """
+    rows = db.query(db_models.Change).filter(
+        db_models.Change.project_id == project_id, db_models.Change.version > since
+    ).order_by(db_models.Change.version).limit(limit).all()
+    changes = [
+        {"version": row.version, "entity": row.entity, "op": row.op, "id": row.entity_id, "data": row.data}
+        for row in rows
+    ]
+    if changes:
+        return _change_set(project_id, changes)
+    return {"project_id": project_id, "version": since, "changes": []}
+
+def get_kpi_history(db: Session, kpi_id: int, bucket: str = "day", start: date = None, end: date = None):
+    """
+    Retrieves a KPI's progress over time from the precomputed rollups, one point
+    per bucket that received data. Only the rollup rows in range are read, however
+    many raw measurements the KPI has. Returns None if the KPI does not exist.
+    """
+    current_value = db.query(db_models.KPI.current_value).filter(db_models.KPI.id == kpi_id).scalar()
+    if current_value is None:
+        return None
+
+    rollups = db.query(db_models.KPIRollup).filter(
+        db_models.KPIRollup.kpi_id == kpi_id, db_models.KPIRollup.bucket == bucket
+    )
+    query = rollups.with_entities(
+        db_models.KPIRollup.bucket_start, db_models.KPIRollup.total, db_models.KPIRollup.count
+    )
+    if start is not None:
+        query = query.filter(db_models.KPIRollup.bucket_start >= bucket_start(start, bucket))
+    if end is not None:
+        query = query.filter(db_models.KPIRollup.bucket_start <= end)
+    rows = query.order_by(db_models.KPIRollup.bucket_start).all()
+
+    # Walk backwards from the current value to get the value at the end of each bucket
+    value = current_value
+    if end is not None:
+        value -= rollups.with_entities(func.coalesce(func.sum(db_models.KPIRollup.total), 0.0)).filter(
+            db_models.KPIRollup.bucket_start > end
+        ).scalar()
+    points = []
+    for row in reversed(rows):
+        points.append({"bucket_start": row.bucket_start, "total": row.total, "count": row.count, "value": value})
+        value -= row.total
+    points.reverse()
+    return {"kpi_id": kpi_id, "bucket": bucket, "points": points}
+
+# --- KPI measurements ---
+
+ROLLUP_BUCKETS = ("day", "week", "month")
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _as_utc(moment: datetime = None):
+    """
+    Converts an aware datetime to the naive UTC the database stores.
+    """
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def bucket_start(day: date, bucket: str) -> date:
+    """
+    First day of the rollup bucket containing `day` (weeks start on Monday).
+    """
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def record_measurement(db: Session, kpi_id: int, task_id: int, value: float, recorded_at: datetime = None):
+    """
+    Appends a measurement and adds it to the KPI's day, week and month rollups,
+    in the caller's transaction.
+    """
+    record_measurements(db, [{"kpi_id": kpi_id, "task_id": task_id, "value": value, "recorded_at": recorded_at}])
+
+def record_measurements(db: Session, measurements: list):
+    """
+    Appends many measurements ({kpi_id, task_id, value, recorded_at}) and adds
+    them to their rollups, with one executemany statement for each, in the
+    caller's transaction.
+    """
+    now = _utcnow()
+    measurements = [{**row, "recorded_at": row["recorded_at"] or now} for row in measurements]
+    db.execute(insert(db_models.KPIMeasurement), measurements)
+    rollups = {}
+    for row in measurements:
+        for bucket in ROLLUP_BUCKETS:
+            key = (row["kpi_id"], bucket, bucket_start(row["recorded_at"].date(), bucket))
+            total, count = rollups.get(key, (0.0, 0))
+            rollups[key] = (total + row["value"], count + 1)
+    upsert = sqlite_insert(db_models.KPIRollup)
+    db.execute(upsert.on_conflict_do_update(
+        index_elements=["kpi_id", "bucket", "bucket_start"],
+        set_={
+            "total": db_models.KPIRollup.total + upsert.excluded.total,
+            "count": db_models.KPIRollup.count + upsert.excluded.count,
+        },
+    ), [
+        {"kpi_id": kpi_id, "bucket": bucket, "bucket_start": start, "total": total, "count": count}
+        for (kpi_id, bucket, start), (total, count) in rollups.items()
+    ])
+
+# --- Change log ---
+
+def _project_version(project_id: int):
+    """
+    SQL expression for the latest version recorded for a project (0 if none).
+    """
+    return select(func.coalesce(func.max(db_models.Change.version), 0)).where(
+        db_models.Change.project_id == project_id
+    ).scalar_subquery()
+
+def _activity_parents(db: Session, activity_id: int):
+    """
+    Returns the (objective_id, project_id) an activity belongs to, or None.
+    """
+    return db.query(db_models.Activity.objective_id, db_models.Objective.project_id).join(
+        db_models.Objective
+    ).filter(db_models.Activity.id == activity_id).first()
+
+def record_change(db: Session, project_id: int, entity: str, op: str, entity_id: int, data: dict = None):
+    """
+    Bumps the project's version and appends a change log entry, in the caller's
+    transaction. The next version is computed inside the INSERT itself, so two
+    writers can never claim the same version. The project's cached tree is
+    dropped once the transaction commits.
+    """
+    version = db.execute(
+        insert(db_models.Change).values(
+            project_id=project_id,
+            version=_project_version(project_id) + 1,
+            entity=entity,
+            entity_id=entity_id,
+            op=op,
+            data=data,
+        ).returning(db_models.Change.version)
+    ).scalar_one()
+    tree_cache.mark_changed(db, project_id)
+    return {"version": version, "entity": entity, "op": op, "id": entity_id, "data": data}
+
+def _change_set(project_id: int, changes: list):
+    return {"project_id": project_id, "version": changes[-1]["version"], "changes": changes}
+
+def _change_sets_by_project(changes_by_project: dict):
+    return [_change_set(project_id, changes) for project_id, changes in changes_by_project.items()]
+
 # Add this new function inside /backend/crud.py
 
 def create_objective(db: Session, objective: pydantic_models.ObjectiveCreate, project_id: int):
     """
     Creates a new Objective record in the database and links it to a project.
+    Returns the resulting change set, or None if the project does not exist.
     """
+    if db.query(db_models.Project.id).filter(db_models.Project.id == project_id).first() is None:
+        return None
+
     # Create a new SQLAlchemy model instance from the received data
     db_objective = db_models.Objective(name=objective.name, project_id=project_id)
     
     # Add the new instance to the session (staging it for saving)
     db.add(db_objective)
     
-    # Commit the session to save the new record to the database
+    # Flush to get the new ID that the database assigned to it
+    db.flush()
+
+    progress.apply_delta(db, project_id, [("objective", db_objective.id), ("project", project_id)])
+    search.index(db, "objective", [(db_objective.id, db_objective.name)])
+    change = record_change(db, project_id, "objective", "create", db_objective.id,
+                           {"id": db_objective.id, "name": db_objective.name})
+
+    # Commit the session to save the new record and its change log entry
     db.commit()
     
-    # Refresh the instance to get the new ID that the database assigned to it
-    db.refresh(db_objective)
-    
-    return db_objective
+    return _change_set(project_id, [change])
 
 # Add this new function inside /backend/crud.py
 
 def create_activity(db: Session, activity: pydantic_models.ActivityCreate, objective_id: int):
     """
     Creates a new Activity record in the database and links it to an objective.
+    Returns the resulting change set, or None if the objective does not exist.
     """
+    project_id = db.query(db_models.Objective.project_id).filter(db_models.Objective.id == objective_id).scalar()
+    if project_id is None:
+        return None
     db_activity = db_models.Activity(name=activity.name, objective_id=objective_id)
     db.add(db_activity)
+    db.flush()
+    progress.apply_delta(db, project_id, [
+        ("activity", db_activity.id), ("objective", objective_id), ("project", project_id),
+    ])
+    search.index(db, "activity", [(db_activity.id, db_activity.name)])
+    change = record_change(db, project_id, "activity", "create", db_activity.id,
+                           {"id": db_activity.id, "name": db_activity.name, "objective_id": objective_id})
     db.commit()
-    db.refresh(db_activity)
-    return db_activity
+    return _change_set(project_id, [change])
 
-# Add this new function inside /backend/crud.py
+# --- DELETE Functions ---
+
+def _delete_activity_subtrees(db: Session, activity_ids):
+    """
+    Deletes the given activities (a list or a SELECT of IDs) with their KPIs,
+    tasks, measurements, rollups and search entries: one set-based statement
+    per table, however large the subtree.
+    """
+    search.remove_activities(db, activity_ids)
+    kpi_ids = select(db_models.KPI.id).where(db_models.KPI.activity_id.in_(activity_ids))
+    db.execute(delete(db_models.KPIRollup).where(db_models.KPIRollup.kpi_id.in_(kpi_ids)))
+    db.execute(delete(db_models.KPIMeasurement).where(db_models.KPIMeasurement.kpi_id.in_(kpi_ids)))
+    db.execute(delete(db_models.Task).where(db_models.Task.activity_id.in_(activity_ids)))
+    db.execute(delete(db_models.KPI).where(db_models.KPI.activity_id.in_(activity_ids)))
+    db.execute(delete(db_models.Activity).where(db_models.Activity.id.in_(activity_ids)))
+
+def delete_objectives(db: Session, objective_ids: list):
+    """
+    Deletes objectives and their whole subtrees in one transaction, with a fixed
+    number of statements per 500 objectives whatever their size. Unknown IDs
+    are ignored.
+    Returns one change set per affected project.
+    """
+    found = []
+    for chunk in _chunked(objective_ids):
+        found += db.query(db_models.Objective.id, db_models.Objective.project_id).filter(
+            db_models.Objective.id.in_(chunk)
+        ).all()
+    if not found:
+        return []
+
+    for ids in _chunked(row.id for row in found):
+        progress.remove_objectives(db, ids)
+        search.remove(db, "objective", ids)
+        _delete_activity_subtrees(db, select(db_models.Activity.id).where(db_models.Activity.objective_id.in_(ids)))
+        db.execute(delete(db_models.Objective).where(db_models.Objective.id.in_(ids)))
+
+    changes = {}
+    for row in found:
+        changes.setdefault(row.project_id, []).append(
+            record_change(db, row.project_id, "objective", "delete", row.id, {"id": row.id})
+        )
+    db.commit()
+    return _change_sets_by_project(changes)
 
 def delete_objective(db: Session, objective_id: int):
     """
     Deletes an objective (and all its children) from the database.
+    Returns the resulting change set, or None if the objective was not found.
     """
-    # Find the specific objective to delete
-    objective_to_delete = db.query(db_models.Objective).filter(db_models.Objective.id == objective_id).first()
-    
-    if objective_to_delete:
-        # If found, delete it from the session
-        db.delete(objective_to_delete)
-        # Commit the session to make the deletion permanent
-        db.commit()
-    
-    return objective_to_delete # Return the deleted item (or None if not found)
+    change_sets = delete_objectives(db, [objective_id])
+    return change_sets[0] if change_sets else None
+
+def delete_activities(db: Session, activity_ids: list):
+    """
+    Deletes activities and their KPIs, tasks and measurements in one transaction,
+    with a fixed number of statements per 500 activities. Unknown IDs are ignored.
+    Returns one change set per affected project.
+    """
+    found = []
+    for chunk in _chunked(activity_ids):
+        found += db.query(
+            db_models.Activity.id, db_models.Activity.objective_id, db_models.Objective.project_id
+        ).join(db_models.Objective).filter(db_models.Activity.id.in_(chunk)).all()
+    if not found:
+        return []
+
+    for ids in _chunked(row.id for row in found):
+        progress.remove_activities(db, ids)
+        _delete_activity_subtrees(db, ids)
+
+    changes = {}
+    for row in found:
+        changes.setdefault(row.project_id, []).append(
+            record_change(db, row.project_id, "activity", "delete", row.id,
+                          {"id": row.id, "objective_id": row.objective_id})
+        )
+    db.commit()
+    return _change_sets_by_project(changes)
 
 def delete_activity(db: Session, activity_id: int):
     """
     Deletes an activity (and its children) from the database.
+    Returns the resulting change set, or None if the activity was not found.
     """
-    activity_to_delete = db.query(db_models.Activity).filter(db_models.Activity.id == activity_id).first()
-    if activity_to_delete:
-        db.delete(activity_to_delete)
-        db.commit()
-    return activity_to_delete
+    change_sets = delete_activities(db, [activity_id])
+    return change_sets[0] if change_sets else None
 
 # --- UPDATE Functions ---
 
-def update_kpi_value(db: Session, kpi_id: int, value_to_add: float):
+def _task_parents(db: Session, task_ids):
     """
-    Finds a KPI by its ID and adds the given value to its current_value.
+    {task_id: row of (id, kpi_id, activity_id, objective_id, project_id)} for the
+    given tasks, following the task's KPI up to its project. Tasks that are gone,
+    or whose KPI no longer hangs under a project, are left out.
     """
-    kpi_to_update = db.query(db_models.KPI).filter(db_models.KPI.id == kpi_id).first()
+    found = {}
+    for chunk in _chunked(task_ids):
+        for row in db.query(
+            db_models.Task.id, db_models.Task.kpi_id, db_models.KPI.activity_id,
+            db_models.Activity.objective_id, db_models.Objective.project_id,
+        ).join(db_models.KPI, db_models.KPI.id == db_models.Task.kpi_id).join(
+            db_models.Activity, db_models.Activity.id == db_models.KPI.activity_id
+        ).join(db_models.Objective).filter(db_models.Task.id.in_(chunk)):
+            found[row.id] = row
+    return found
 
-    if kpi_to_update:
-        kpi_to_update.current_value += value_to_add
-        db.commit()
-        db.refresh(kpi_to_update)
-    
-    return kpi_to_update
+def _increment_kpi(db: Session, task, value_to_add: float):
+    """
+    Adds the value to the task's KPI (a row of _task_parents) with a single
+    `current_value = current_value + :delta` statement, updates the progress of
+    its ancestors and logs the change. Returns the change.
+    """
+    kpi = db.execute(
+        update(db_models.KPI)
+        .where(db_models.KPI.id == task.kpi_id)
+        .values(current_value=db_models.KPI.current_value + value_to_add)
+        .returning(db_models.KPI.current_value, db_models.KPI.target_value)
+    ).first()
+    ratio_delta = (
+        progress.kpi_ratio(kpi.current_value, kpi.target_value)
+        - progress.kpi_ratio(kpi.current_value - value_to_add, kpi.target_value)
+    )
+    if ratio_delta:
+        progress.apply_delta(db, task.project_id, [
+            ("activity", task.activity_id), ("objective", task.objective_id), ("project", task.project_id),
+        ], sum_delta=ratio_delta)
+    return record_change(db, task.project_id, "kpi", "update", task.kpi_id,
+                         {"id": task.kpi_id, "activity_id": task.activity_id, "current_value": kpi.current_value})
+
+def increment_kpi_for_task(db: Session, task_id: int, value_to_add: float, recorded_at: datetime = None):
+    """
+    Adds the given value to the KPI linked to a task and records it as a
+    measurement so the KPI's history stays consistent.
+
+    Does not commit: it is meant to run inside a GroupCommitter batch.
+    Returns the resulting change set, or None if the task does not exist or its
+    KPI no longer belongs to a project (left behind by an old delete); nothing
+    is written then.
+    """
+    task = _task_parents(db, [task_id]).get(task_id)
+    if task is None:
+        return None
+    record_measurement(db, task.kpi_id, task_id, value_to_add, recorded_at)
+    return _change_set(task.project_id, [_increment_kpi(db, task, value_to_add)])
+
+def apply_entries(db: Session, entries: list):
+    """
+    Applies a batch of field entries (SyncEntry) exactly once each: entries whose
+    clientId was already applied, earlier or in this same batch, are reported as
+    duplicates and skipped. Entries for unknown tasks are reported as not_found
+    and not remembered. Known ids and the tasks' KPIs are looked up up front,
+    in a handful of queries; each KPI is then incremented once by the sum of its
+    entries, and the measurements and applied ids are inserted with executemany.
+
+    Does not commit: it is meant to run inside a GroupCommitter batch, so the
+    whole batch lands in one transaction.
+    Returns {"results": [...], "changes": [change sets, one per project]}.
+    """
+    client_ids = list({entry.clientId for entry in entries})
+    task_ids = list({entry.taskId for entry in entries})
+    applied = {}
+    for chunk in _chunked(client_ids):
+        applied.update(
+            db.query(db_models.AppliedEntry.client_id, db_models.AppliedEntry.kpi_id).filter(
+                db_models.AppliedEntry.client_id.in_(chunk)
+            ).all()
+        )
+    tasks = _task_parents(db, task_ids)
+
+    results, measurements, applied_rows, increments = [], [], [], {}
+    now = _utcnow()
+    for entry in entries:
+        if entry.clientId in applied:
+            results.append({"clientId": entry.clientId, "status": "duplicate", "kpi_id": applied[entry.clientId]})
+            continue
+
+        task = tasks.get(entry.taskId)
+        if task is None:
+            # Not remembered: a resend is looked at again rather than passed off
+            # as a duplicate of something that never counted
+            results.append({"clientId": entry.clientId, "status": "not_found", "kpi_id": None})
+            continue
+        increments[task.kpi_id] = increments.get(task.kpi_id, 0) + entry.numericValue
+        measurements.append({"kpi_id": task.kpi_id, "task_id": task.id, "value": entry.numericValue,
+                             "recorded_at": _as_utc(entry.recordedAt) or now})
+        applied_rows.append({"client_id": entry.clientId, "task_id": entry.taskId, "kpi_id": task.kpi_id,
+                             "project_id": task.project_id, "status": "applied", "applied_at": now})
+        applied[entry.clientId] = task.kpi_id
+        results.append({"clientId": entry.clientId, "status": "applied", "kpi_id": task.kpi_id})
+
+    if applied_rows:
+        db.execute(insert(db_models.AppliedEntry), applied_rows)
+    if measurements:
+        record_measurements(db, measurements)
+
+    parents = {task.kpi_id: task for task in tasks.values()}
+    changes = {}
+    for kpi_id, value_to_add in increments.items():
+        task = parents[kpi_id]
+        changes.setdefault(task.project_id, []).append(_increment_kpi(db, task, value_to_add))
+
+    return {"results": results, "changes": _change_sets_by_project(changes)}
+
+def apply_data_entry(db: Session, entry: pydantic_models.DataEntryPayload):
+    """
+    Applies a single data entry, at most once if it carries a clientId.
+    Does not commit. Returns the resulting change set (empty, at the project's
+    current version, for a duplicate), or None if the task does not exist.
+    """
+    if entry.clientId is None:
+        return increment_kpi_for_task(db, entry.taskId, entry.numericValue)
+
+    previous = db.query(db_models.AppliedEntry.project_id).filter(
+        db_models.AppliedEntry.client_id == entry.clientId
+    ).first()
+    if previous is not None:
+        version = get_project_version(db, previous.project_id)
+        return {"project_id": previous.project_id, "version": version, "changes": []}
+
+    outcome = apply_entries(db, [pydantic_models.SyncEntry(
+        clientId=entry.clientId, taskId=entry.taskId, numericValue=entry.numericValue
+    )])
+    return outcome["changes"][0] if outcome["changes"] else None
 
 # Add this new function inside /backend/crud.py
 
 def update_objective(db: Session, objective_id: int, objective_update: pydantic_models.ObjectiveUpdate):
     """
     Updates an objective's name in the database.
+    Returns the resulting change set, or None if the objective was not found.
     """
     db_objective = db.query(db_models.Objective).filter(db_models.Objective.id == objective_id).first()
     
-    if db_objective:
-        # Update the name field from the provided update data
-        db_objective.name = objective_update.name
-        db.commit()
-        db.refresh(db_objective)
+    if db_objective is None:
+        return None
+
+    # Update the name field from the provided update data
+    db_objective.name = objective_update.name
+    project_id = db_objective.project_id
+    search.index(db, "objective", [(objective_id, objective_update.name)])
+    change = record_change(db, project_id, "objective", "update", objective_id,
+                           {"id": objective_id, "name": objective_update.name})
+    db.commit()
         
-    return db_objective
+    return _change_set(project_id, [change])
 
 # Add this new function inside /backend/crud.py
 
 def update_activity(db: Session, activity_id: int, activity_update: pydantic_models.ActivityUpdate):
     """
     Updates an activity's name in the database.
+    Returns the resulting change set, or None if the activity was not found.
     """
     db_activity = db.query(db_models.Activity).filter(db_models.Activity.id == activity_id).first()
-    if db_activity:
-        db_activity.name = activity_update.name
-        db.commit()
-        db.refresh(db_activity)
-    return db_activity
\ No newline at end of file
+    parents = _activity_parents(db, activity_id)
+    # An activity orphaned by an old delete has no project to log the change to
+    if db_activity is None or parents is None:
+        return None
+    db_activity.name = activity_update.name
+    _, project_id = parents
+    search.index(db, "activity", [(activity_id, activity_update.name)])
+    change = record_change(db, project_id, "activity", "update", activity_id,
+                           {"id": activity_id, "name": activity_update.name, "objective_id": db_activity.objective_id})
+    db.commit()
+    return _change_set(project_id, [change])
\ No newline at end of file
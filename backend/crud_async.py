@@ -0,0 +1,83 @@
+# /backend/crud_async.py
+
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+import reports
+import search
+
+# Async versions of the read functions in crud.py, for the async endpoints.
+# Each one runs the sync function on the AsyncSession's underlying Session
+# (AsyncSession.run_sync), so both paths share the same queries and results;
+# only the I/O waits on the event loop instead of holding a thread.
+# Writes go through the single writer, group_commit.GroupCommitter (db_writer in main.py).
+
+# --- READ Functions ---
+
+async def list_projects(db: AsyncSession, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of project summaries (see crud.list_projects).
+    """
+    return await db.run_sync(crud.list_projects, after=after, limit=limit)
+
+async def get_project(db: AsyncSession, project_id: int, depth: int = crud.TREE_DEPTH, fields: dict = None):
+    """
+    Retrieves a project with its tree down to `depth`, or None (see crud.get_project).
+    """
+    return await db.run_sync(crud.get_project, project_id=project_id, depth=depth, fields=fields)
+
+async def list_objectives(db: AsyncSession, project_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of a project's objectives, or None (see crud.list_objectives).
+    """
+    return await db.run_sync(crud.list_objectives, project_id=project_id, after=after, limit=limit)
+
+async def list_activities(db: AsyncSession, objective_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of an objective's activities, or None (see crud.list_activities).
+    """
+    return await db.run_sync(crud.list_activities, objective_id=objective_id, after=after, limit=limit)
+
+async def list_kpis(db: AsyncSession, activity_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of an activity's KPIs, or None (see crud.list_kpis).
+    """
+    return await db.run_sync(crud.list_kpis, activity_id=activity_id, after=after, limit=limit)
+
+async def list_tasks(db: AsyncSession, activity_id: int, after: int = 0, limit: int = 50):
+    """
+    Retrieves one page of an activity's tasks, or None (see crud.list_tasks).
+    """
+    return await db.run_sync(crud.list_tasks, activity_id=activity_id, after=after, limit=limit)
+
+async def get_project_version(db: AsyncSession, project_id: int) -> int:
+    """
+    Retrieves a project's latest version (see crud.get_project_version).
+    """
+    return await db.run_sync(crud.get_project_version, project_id=project_id)
+
+async def get_changes(db: AsyncSession, project_id: int, since: int = 0, limit: int = 1000):
+    """
+    Retrieves a project's changes after version `since` (see crud.get_changes).
+    """
+    return await db.run_sync(crud.get_changes, project_id=project_id, since=since, limit=limit)
+
+async def get_kpi_history(db: AsyncSession, kpi_id: int, bucket: str = "day", start: date = None, end: date = None):
+    """
+    Retrieves a KPI's progress per bucket, or None (see crud.get_kpi_history).
+    """
+    return await db.run_sync(crud.get_kpi_history, kpi_id=kpi_id, bucket=bucket, start=start, end=end)
+
+async def search_entities(db: AsyncSession, query: str, kind: str = None, limit: int = 20, offset: int = 0):
+    """
+    Retrieves one page of ranked search hits with their paths (see search.search).
+    """
+    return await db.run_sync(search.search, query=query, kind=kind, limit=limit, offset=offset)
+
+async def get_report_job(db: AsyncSession, job_id: int):
+    """
+    Retrieves a report job's status, or None (see reports.get_job).
+    """
+    return await db.run_sync(reports.get_job, job_id=job_id)
@@ -1,12 +1,15 @@
 # /backend/database.py
 
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # The database URL tells SQLAlchemy where our database is located.
 # For SQLite, it's just a path to a local file.
-SQLALCHEMY_DATABASE_URL = "sqlite:///./database.db"
+# DATABASE_URL can point somewhere else, e.g. a scratch database for benchmarks.
+SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./database.db")
 
 # The 'engine' is the core interface to the database.
 # The 'connect_args' are only needed for SQLite to allow it to be used by multiple threads.
@@ -14,6 +17,27 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+# Settings applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    # Readers (like the async read pool) keep reading the last committed data
+    # while the writer works, instead of waiting for it
+    "journal_mode": "WAL",
+    # With WAL, NORMAL only syncs at checkpoints and can never corrupt the file
+    "synchronous": "NORMAL",
+    # Wait up to 5s for a lock instead of failing with "database is locked"
+    "busy_timeout": 5000,
+    # Read the database through a 256 MiB memory map instead of read() calls
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+def configure_connection(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+event.listen(engine, "connect", configure_connection)
+
 # A SessionLocal class is a "factory" for creating new database sessions.
 # A session is like a temporary conversation with the database.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
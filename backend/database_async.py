@@ -0,0 +1,25 @@
+# /backend/database_async.py
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database import SQLALCHEMY_DATABASE_URL, configure_connection
+
+# The async endpoints read the same database through aiosqlite.
+# ASYNC_DATABASE_URL defaults to DATABASE_URL with the aiosqlite driver.
+ASYNC_DATABASE_URL = os.environ.get(
+    "ASYNC_DATABASE_URL", SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+
+# Connections kept open for reads (READ_POOL_SIZE, 8 by default)
+READ_POOL_SIZE = int(os.environ.get("READ_POOL_SIZE", 8))
+
+# Reads get a pool of their own, so they never queue behind a write for a
+# connection. Writes do not use it: they all go through the single writer
+# thread of group_commit.GroupCommitter, on the sync engine.
+read_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=READ_POOL_SIZE, max_overflow=READ_POOL_SIZE)
+event.listen(read_engine.sync_engine, "connect", configure_connection)
+
+AsyncSessionLocal = async_sessionmaker(read_engine, autoflush=False, expire_on_commit=False)
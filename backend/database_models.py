@@ -1,6 +1,6 @@
 # /backend/database_models.py
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, JSON, Index, Date, DateTime
 from sqlalchemy.orm import relationship
 
 # Import the 'Base' we created in database.py
@@ -24,7 +24,7 @@ class Objective(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     # This 'ForeignKey' is the actual column in the database that links to the projects table.
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
 
     project = relationship("Project", back_populates="objectives")
     activities = relationship("Activity", back_populates="objective")
@@ -34,7 +34,7 @@ class Activity(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    objective_id = Column(Integer, ForeignKey("objectives.id"))
+    objective_id = Column(Integer, ForeignKey("objectives.id"), index=True)
 
     objective = relationship("Objective", back_populates="activities")
     kpis = relationship("KPI", back_populates="activity")
@@ -48,7 +48,7 @@ class KPI(Base):
     unit = Column(String)
     current_value = Column(Float, default=0.0)
     target_value = Column(Float, default=100.0)
-    activity_id = Column(Integer, ForeignKey("activities.id"))
+    activity_id = Column(Integer, ForeignKey("activities.id"), index=True)
 
     activity = relationship("Activity", back_populates="kpis")
     tasks = relationship("Task", back_populates="kpi")
@@ -58,8 +58,93 @@ class Task(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String)
-    activity_id = Column(Integer, ForeignKey("activities.id"))
-    kpi_id = Column(Integer, ForeignKey("kpis.id"))
+    activity_id = Column(Integer, ForeignKey("activities.id"), index=True)
+    kpi_id = Column(Integer, ForeignKey("kpis.id"), index=True)
 
     activity = relationship("Activity", back_populates="tasks")
-    kpi = relationship("KPI", back_populates="tasks")
\ No newline at end of file
+    kpi = relationship("KPI", back_populates="tasks")
+
+class Change(Base):
+    __tablename__ = "changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    # Per-project counter, bumped by every write that touches the project.
+    version = Column(Integer)
+    entity = Column(String)
+    entity_id = Column(Integer)
+    op = Column(String)
+    # The changed fields, so clients can apply the change without a refetch.
+    data = Column(JSON)
+
+    __table_args__ = (
+        Index("ix_changes_project_version", "project_id", "version", unique=True),
+    )
+
+class KPIMeasurement(Base):
+    __tablename__ = "kpi_measurements"
+
+    # Append-only: one row per data entry, never updated.
+    id = Column(Integer, primary_key=True, index=True)
+    kpi_id = Column(Integer, ForeignKey("kpis.id"))
+    task_id = Column(Integer, ForeignKey("tasks.id"))
+    value = Column(Float)
+    recorded_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_kpi_measurements_kpi_recorded", "kpi_id", "recorded_at"),
+    )
+
+class KPIRollup(Base):
+    __tablename__ = "kpi_rollups"
+
+    # Running totals of the measurements per KPI and time bucket
+    # ("day", "week" or "month"), kept up to date on every data entry.
+    kpi_id = Column(Integer, ForeignKey("kpis.id"), primary_key=True)
+    bucket = Column(String, primary_key=True)
+    bucket_start = Column(Date, primary_key=True)
+    total = Column(Float, default=0.0)
+    count = Column(Integer, default=0)
+
+class Progress(Base):
+    __tablename__ = "progress"
+
+    # Completion of one activity, objective or project, kept as the number of
+    # KPIs below it and the sum of their completion ratios (each capped at 1),
+    # so it can be adjusted by a delta whenever a KPI or node changes.
+    level = Column(String, primary_key=True)
+    node_id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
+    kpi_count = Column(Integer, default=0)
+    progress_sum = Column(Float, default=0.0)
+
+class AppliedEntry(Base):
+    __tablename__ = "applied_entries"
+
+    # Client-generated id of every field entry already applied, so a resent
+    # entry is recognised instead of being counted twice.
+    client_id = Column(String, primary_key=True)
+    task_id = Column(Integer)
+    kpi_id = Column(Integer)
+    project_id = Column(Integer)
+    status = Column(String)
+    applied_at = Column(DateTime)
+
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+
+    # One background report build (see reports.py). `key` identifies the
+    # request (format and projects), so an identical request made while a
+    # build is queued or running joins it instead of starting another.
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, index=True)
+    format = Column(String)
+    project_ids = Column(JSON)
+    # "queued", "running", "done" or "failed"
+    status = Column(String, index=True)
+    rows = Column(Integer, default=0)
+    size_bytes = Column(Integer)
+    error = Column(String)
+    created_at = Column(DateTime)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
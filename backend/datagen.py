@@ -0,0 +1,90 @@
+# /backend/datagen.py
+
+import argparse
+import random
+
+from bulk_io import BulkImporter
+
+# Vocabulary used to give generated rows plausible M&E names
+THEMES = ["Water Access", "Food Security", "Maternal Health", "Girls' Education", "Climate Resilience",
+          "Vaccination", "Microfinance", "Sanitation", "Reforestation", "Youth Employment"]
+REGIONS = ["Analamanga", "Atsinanana", "Boeny", "Diana", "Haute Matsiatra", "Menabe", "Sava", "Vakinankaratra"]
+GOALS = ["Improve access to", "Strengthen local capacity for", "Increase coverage of", "Reduce barriers to",
+         "Expand community ownership of"]
+ACTIONS = ["Train", "Build", "Distribute", "Install", "Survey", "Equip", "Rehabilitate", "Mobilise"]
+SUBJECTS = [("wells", "wells"), ("health workers", "people"), ("school kits", "kits"), ("water pumps", "pumps"),
+            ("farmers", "farmers"), ("latrines", "latrines"), ("seedlings", "seedlings"), ("households", "households")]
+TASK_VERBS = ["Visit", "Deliver to", "Inspect", "Follow up with", "Register", "Report on"]
+
+
+def generate_records(projects: int, objectives: int, activities: int, kpis: int, tasks: int, seed: int = 0):
+    """
+    Yields a synthetic portfolio in bulk import format: `projects` projects, each
+    with `objectives` objectives, `activities` activities per objective, and
+    `kpis` KPIs and `tasks` tasks per activity. The same seed gives the same data.
+    """
+    rng = random.Random(seed)
+    for p in range(projects):
+        project_ref = f"p{p}"
+        theme = rng.choice(THEMES)
+        yield {"type": "project", "ref": project_ref, "name": f"{theme} - {rng.choice(REGIONS)} #{p + 1}"}
+        for o in range(objectives):
+            objective_ref = f"{project_ref}.o{o}"
+            yield {"type": "objective", "ref": objective_ref, "parent": project_ref,
+                   "name": f"{rng.choice(GOALS)} {theme.lower()}"}
+            for a in range(activities):
+                activity_ref = f"{objective_ref}.a{a}"
+                subject, unit = rng.choice(SUBJECTS)
+                yield {"type": "activity", "ref": activity_ref, "parent": objective_ref,
+                       "name": f"{rng.choice(ACTIONS)} {subject}"}
+                kpi_refs = []
+                for k in range(kpis):
+                    kpi_ref = f"{activity_ref}.k{k}"
+                    target = float(rng.choice([10, 25, 50, 100, 250, 1000]))
+                    kpi_refs.append(kpi_ref)
+                    yield {"type": "kpi", "ref": kpi_ref, "parent": activity_ref,
+                           "name": f"{subject.capitalize()} reached", "unit": unit,
+                           "current_value": round(target * rng.betavariate(2, 2)), "target_value": target}
+                # Tasks need a KPI to report against
+                if not kpi_refs:
+                    continue
+                for t in range(tasks):
+                    yield {"type": "task", "parent": activity_ref, "kpi": kpi_refs[t % len(kpi_refs)],
+                           "description": f"{rng.choice(TASK_VERBS)} {rng.choice(REGIONS)} site {t + 1}"}
+
+
+def generate(db, projects: int, objectives: int, activities: int, kpis: int, tasks: int,
+             seed: int = 0, batch_size: int = 20000):
+    """
+    Inserts a synthetic portfolio through the bulk importer.
+    Returns the number of rows inserted per record type.
+    """
+    importer = BulkImporter(db, batch_size=batch_size)
+    for record in generate_records(projects, objectives, activities, kpis, tasks, seed):
+        importer.add(record)
+    return importer.finish()
+
+
+if __name__ == "__main__":
+    # e.g. python datagen.py --projects 200 --objectives 5 --activities 10 --kpis 3 --tasks 100
+    # (point DATABASE_URL at a scratch database to keep the real one untouched)
+    parser = argparse.ArgumentParser(description="Insert a synthetic portfolio of projects.")
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--objectives", type=int, default=4)
+    parser.add_argument("--activities", type=int, default=5)
+    parser.add_argument("--kpis", type=int, default=2)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import migrations
+    from database import SessionLocal, engine
+
+    migrations.migrate(engine)
+    db = SessionLocal()
+    try:
+        inserted = generate(db, args.projects, args.objectives, args.activities, args.kpis, args.tasks, args.seed)
+    finally:
+        db.close()
+    for kind, count in inserted.items():
+        print(f"Inserted {count} {kind} rows")
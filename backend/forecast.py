@@ -0,0 +1,425 @@
+# /backend/forecast.py
+
+import itertools
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import create_engine, event, func, literal, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+import database_models as db_models
+
+# Forecasts when each KPI will reach its target, from the trend of its recent
+# progress, and flags the KPIs (and the activities, objectives and projects
+# above them) that will not get there by a due date.
+#
+# A KPI's trend is the least-squares line through its cumulative value at the
+# start of the window, at the end of every week of the window (from the weekly
+# rollups) and today. All KPIs are fitted at once: the sums the fit needs are
+# accumulated per KPI with np.bincount over flat arrays of samples, so the cost
+# is a few passes over arrays, with no Python loop per KPI. Nodes are
+# summarised the same way, grouped on their KPIs' parent IDs.
+#
+# A KPI with nothing recorded (no rollup in the window and a current value of
+# 0) has no trend to fit: it is reported as "no_data", not as stalled, and is
+# not counted at risk. A KPI that has a value but did not move during the
+# window is stalled.
+
+# Weeks of history the trend is fitted on (12, aligned on Mondays)
+WINDOW_DAYS = 84
+# Default due date when none is given: this many days from today
+DEFAULT_HORIZON_DAYS = 90
+
+# Statuses from AT_RISK on count as at risk
+STATUSES = ("met", "on_track", "no_data", "at_risk", "stalled")
+MET, ON_TRACK, NO_DATA, AT_RISK, STALLED = range(len(STATUSES))
+
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def window_start(as_of: date) -> date:
+    start = as_of - timedelta(days=WINDOW_DAYS)
+    return start - timedelta(days=start.weekday())
+
+
+def ratio(value, target):
+    """
+    Completion of each KPI, between 0 and 1 (progress.kpi_ratio over arrays).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(target > 0, np.clip(value / target, 0.0, 1.0), 0.0)
+
+
+# --- Fitting (pure array code) ---
+
+def samples_from_rollups(current, start_day: int, rollup_kpi, rollup_day, rollup_total):
+    """
+    Turns weekly rollups into the points each KPI's trend is fitted on.
+
+    current: each KPI's current value. start_day: first day of the window,
+    relative to today (negative). rollup_kpi, rollup_day, rollup_total: one entry
+    per weekly rollup in the window, sorted by KPI; the KPI's index, the first
+    day of the week relative to today, and the amount recorded that week.
+    Returns (kpi, day, value) arrays: the cumulative value of every KPI at the
+    start of the window and today, and at the end of each of its weeks.
+    """
+    count = len(current)
+    total = np.bincount(rollup_kpi, rollup_total, count)
+    # Amount recorded up to the end of each week, within its KPI: running sum
+    # over all rows minus the running sum before the KPI's first row
+    running = np.concatenate(([0.0], np.cumsum(rollup_total)))
+    weeks = np.bincount(rollup_kpi, minlength=count)
+    first_row = np.cumsum(weeks) - weeks
+    recorded = running[1:] - running[first_row[rollup_kpi]]
+    # The value at the end of a week is the current value minus whatever came after
+    week_value = current[rollup_kpi] - (total[rollup_kpi] - recorded)
+    week_end = np.minimum(rollup_day + 7, 0)
+
+    kpis = np.arange(count)
+    return (
+        np.concatenate((kpis, kpis, rollup_kpi)),
+        np.concatenate((np.full(count, float(start_day)), np.zeros(count), week_end)),
+        np.concatenate((current - total, current, week_value)),
+    )
+
+
+def fit(current, target, sample_kpi, sample_day, sample_value, horizon_days: int, recorded=None):
+    """
+    Fits every KPI's trend and projects it `horizon_days` ahead.
+
+    current, target: one value per KPI. sample_kpi, sample_day, sample_value: one
+    entry per point (see samples_from_rollups). A KPI whose points all fall on
+    the same day gets a rate of 0. recorded: the number of rollups of each KPI
+    in the window; a KPI with none and a current value of 0 has no data.
+    Returns a dict of arrays with one value per KPI: rate (per day),
+    days_to_target (0 if met, inf if never), projected_ratio (completion
+    expected at the horizon) and status (index into STATUSES).
+    """
+    count = len(current)
+    n = np.bincount(sample_kpi, minlength=count).astype(float)
+    sum_x = np.bincount(sample_kpi, sample_day, count)
+    sum_y = np.bincount(sample_kpi, sample_value, count)
+    sum_xy = np.bincount(sample_kpi, sample_day * sample_value, count)
+    sum_xx = np.bincount(sample_kpi, sample_day * sample_day, count)
+    spread = n * sum_xx - sum_x * sum_x
+    rate = np.zeros(count)
+    np.divide(n * sum_xy - sum_x * sum_y, spread, out=rate, where=spread > 0)
+
+    remaining = target - current
+    met = remaining <= 0
+    moving = (rate > 0) & ~met
+    days_to_target = np.full(count, np.inf)
+    np.divide(remaining, rate, out=days_to_target, where=moving)
+    days_to_target[met] = 0.0
+
+    horizon_days = max(horizon_days, 0)
+    projected = current + np.maximum(rate, 0.0) * horizon_days
+    no_data = np.zeros(count, dtype=bool) if recorded is None else (recorded == 0) & (current == 0)
+    status = np.select(
+        [met, no_data, ~moving, days_to_target > horizon_days],
+        [MET, NO_DATA, STALLED, AT_RISK],
+        ON_TRACK,
+    )
+    return {
+        "rate": rate,
+        "days_to_target": days_to_target,
+        "projected_ratio": np.where(met, 1.0, ratio(projected, target)),
+        "status": status,
+    }
+
+
+def summarise(node_ids, current, target, fitted):
+    """
+    Groups KPIs by the node they belong to (`node_ids`, one per KPI).
+    Returns a dict of arrays with one value per node, ordered by ID: id,
+    kpi_count, at_risk_kpis, completion, projected_completion and
+    days_to_target (of its slowest KPI).
+    """
+    nodes, index = np.unique(node_ids, return_inverse=True)
+    count = len(nodes)
+    kpi_count = np.bincount(index, minlength=count)
+    at_risk = fitted["status"] >= AT_RISK
+    days_to_target = np.zeros(count)
+    np.maximum.at(days_to_target, index, fitted["days_to_target"])
+    return {
+        "id": nodes,
+        "kpi_count": kpi_count,
+        "at_risk_kpis": np.bincount(index, at_risk, count).astype(int),
+        "completion": np.bincount(index, ratio(current, target), count) / kpi_count,
+        "projected_completion": np.bincount(index, fitted["projected_ratio"], count) / kpi_count,
+        "days_to_target": days_to_target,
+    }
+
+
+# --- Loading and results ---
+
+def _julian(day: date) -> float:
+    # SQLite's julianday() of midnight on `day`
+    return day.toordinal() + 1721424.5
+
+
+def _array(db: Session, query, columns: int):
+    """
+    Fetches the rows of a numeric query into a float array of `columns` columns.
+    The values are streamed straight into the array: np.array() over the Row
+    objects inspects each of them as a sequence and is ten times slower.
+    """
+    values = itertools.chain.from_iterable(db.execute(query))
+    return np.fromiter(values, dtype=float).reshape(-1, columns)
+
+
+def _load(db: Session, as_of: date, start: date, project_id: int = None):
+    """
+    Reads the KPIs (of one project, or all) and their weekly rollups in the
+    window into arrays, in two queries.
+    """
+    KPI, Activity, Objective, Rollup = db_models.KPI, db_models.Activity, db_models.Objective, db_models.KPIRollup
+    kpis = select(
+        KPI.id, KPI.activity_id, Activity.objective_id, Objective.project_id,
+        func.coalesce(KPI.current_value, 0.0), func.coalesce(KPI.target_value, 0.0),
+    ).join(Activity, Activity.id == KPI.activity_id).join(Objective, Objective.id == Activity.objective_id)
+    rollups = select(
+        Rollup.kpi_id, func.julianday(Rollup.bucket_start) - literal(_julian(as_of)),
+        func.coalesce(Rollup.total, 0.0),
+    ).where(Rollup.bucket == "week", Rollup.bucket_start >= start, Rollup.bucket_start <= as_of)
+    if project_id is not None:
+        kpis = kpis.where(Objective.project_id == project_id)
+        rollups = rollups.where(Rollup.kpi_id.in_(
+            select(KPI.id).join(Activity, Activity.id == KPI.activity_id)
+            .join(Objective, Objective.id == Activity.objective_id).where(Objective.project_id == project_id)
+        ))
+
+    kpi_rows = _array(db, kpis.order_by(KPI.id), 6)
+    # Sorting in SQLite would go through a temporary B-tree: sort the array instead
+    rollup_rows = _array(db, rollups, 3)
+    rollup_rows = rollup_rows[np.lexsort((rollup_rows[:, 1], rollup_rows[:, 0]))]
+    kpi_ids = kpi_rows[:, 0].astype(np.int64)
+    return {
+        "id": kpi_ids,
+        "activity_id": kpi_rows[:, 1].astype(np.int64),
+        "objective_id": kpi_rows[:, 2].astype(np.int64),
+        "project_id": kpi_rows[:, 3].astype(np.int64),
+        "current": kpi_rows[:, 4],
+        "target": kpi_rows[:, 5],
+        "rollup_kpi": np.searchsorted(kpi_ids, rollup_rows[:, 0].astype(np.int64)),
+        "rollup_day": rollup_rows[:, 1],
+        "rollup_total": rollup_rows[:, 2],
+    }
+
+
+def _run(db: Session, as_of: date, due: date, project_id: int = None):
+    start = window_start(as_of)
+    data = _load(db, as_of, start, project_id)
+    samples = samples_from_rollups(
+        data["current"], (start - as_of).days, data["rollup_kpi"], data["rollup_day"], data["rollup_total"]
+    )
+    recorded = np.bincount(data["rollup_kpi"], minlength=len(data["id"]))
+    fitted = fit(data["current"], data["target"], *samples, horizon_days=(due - as_of).days, recorded=recorded)
+    return data, fitted
+
+
+def _projected_date(as_of: date, days: float):
+    # None when the target is never reached at the current rate
+    return as_of + timedelta(days=int(np.ceil(days))) if np.isfinite(days) else None
+
+
+def _node_items(summary, as_of: date):
+    return [
+        {
+            "id": int(node_id),
+            "kpi_count": int(kpi_count),
+            "at_risk_kpis": int(at_risk_kpis),
+            "at_risk": bool(at_risk_kpis),
+            "completion": float(completion),
+            "projected_completion": float(projected_completion),
+            "projected_date": _projected_date(as_of, days),
+        }
+        for node_id, kpi_count, at_risk_kpis, completion, projected_completion, days in zip(
+            summary["id"], summary["kpi_count"], summary["at_risk_kpis"], summary["completion"],
+            summary["projected_completion"], summary["days_to_target"],
+        )
+    ]
+
+
+def _empty_node(node_id: int):
+    return {"id": node_id, "kpi_count": 0, "at_risk_kpis": 0, "at_risk": False, "completion": 0.0,
+            "projected_completion": 0.0, "projected_date": None}
+
+
+def project_forecast(db: Session, project_id: int, as_of: date = None, due: date = None):
+    """
+    Forecasts every KPI of a project, with a summary per activity, objective
+    and the project itself. Nodes without KPIs are left out. Returns None if
+    the project does not exist.
+    """
+    if db.query(db_models.Project.id).filter(db_models.Project.id == project_id).first() is None:
+        return None
+    as_of = as_of or today()
+    due = due or as_of + timedelta(days=DEFAULT_HORIZON_DAYS)
+    data, fitted = _run(db, as_of, due, project_id)
+
+    levels = {
+        level: _node_items(summarise(data[f"{level}_id"], data["current"], data["target"], fitted), as_of)
+        for level in ("project", "objective", "activity")
+    }
+    kpis = [
+        {
+            "id": int(kpi_id),
+            "activity_id": int(activity_id),
+            "current_value": float(current),
+            "target_value": float(target),
+            "rate_per_day": float(rate),
+            "status": STATUSES[status],
+            "projected_completion": float(projected_ratio),
+            "projected_date": _projected_date(as_of, days),
+        }
+        for kpi_id, activity_id, current, target, rate, status, projected_ratio, days in zip(
+            data["id"], data["activity_id"], data["current"], data["target"], fitted["rate"],
+            fitted["status"], fitted["projected_ratio"], fitted["days_to_target"],
+        )
+    ]
+    return {
+        "project_id": project_id,
+        "as_of": as_of,
+        "due": due,
+        "window_start": window_start(as_of),
+        "project": levels["project"][0] if levels["project"] else _empty_node(project_id),
+        "objectives": levels["objective"],
+        "activities": levels["activity"],
+        "kpis": kpis,
+    }
+
+
+def portfolio_forecast(db: Session, as_of: date = None, due: date = None, at_risk_only: bool = False):
+    """
+    Forecasts every KPI of every project in one pass and summarises it per
+    project (projects without KPIs are left out). With `at_risk_only`, only
+    the projects with at least one KPI at risk are listed.
+    """
+    as_of = as_of or today()
+    due = due or as_of + timedelta(days=DEFAULT_HORIZON_DAYS)
+    data, fitted = _run(db, as_of, due)
+
+    projects = _node_items(summarise(data["project_id"], data["current"], data["target"], fitted), as_of)
+    if at_risk_only:
+        projects = [project for project in projects if project["at_risk"]]
+    return {
+        "as_of": as_of,
+        "due": due,
+        "window_start": window_start(as_of),
+        "kpi_count": int(len(data["id"])),
+        "at_risk_kpis": int(np.count_nonzero(fitted["status"] >= AT_RISK)),
+        "projects": projects,
+    }
+
+
+# --- Benchmark ---
+
+def benchmark(kpis: int = 100000, weeks: int = WINDOW_DAYS // 7, seed: int = 0):
+    """
+    Times fit() and the three summaries on `kpis` synthetic KPIs with `weeks`
+    rollups each (the database is not involved). Returns seconds per step.
+    """
+    rng = np.random.default_rng(seed)
+    target = rng.choice([10.0, 25.0, 50.0, 100.0, 250.0, 1000.0], kpis)
+    current = np.round(target * rng.beta(2, 2, kpis))
+    activity_id = np.arange(kpis) // 3
+    objective_id, project_id = activity_id // 10, activity_id // 50
+    rollup_kpi = np.repeat(np.arange(kpis), weeks)
+    rollup_day = np.tile(np.arange(-7 * weeks, 0, 7, dtype=float), kpis)
+    rollup_total = rng.poisson(target[rollup_kpi] / 50).astype(float)
+
+    timings = {}
+    started = time.perf_counter()
+    samples = samples_from_rollups(current, -7 * weeks, rollup_kpi, rollup_day, rollup_total)
+    timings["samples"] = time.perf_counter() - started
+    started = time.perf_counter()
+    fitted = fit(current, target, *samples, horizon_days=DEFAULT_HORIZON_DAYS)
+    timings["fit"] = time.perf_counter() - started
+    started = time.perf_counter()
+    for node_ids in (activity_id, objective_id, project_id):
+        summarise(node_ids, current, target, fitted)
+    timings["summarise"] = time.perf_counter() - started
+    timings["total"] = sum(timings.values())
+    return timings
+
+
+def populate(db: Session, kpis: int, as_of: date):
+    """
+    Fills an empty database with a portfolio of `kpis` KPIs (100 per project,
+    rounded up), with values and a weekly rollup for four weeks out of five of
+    the window before `as_of`. Commits.
+    """
+    import datagen
+
+    datagen.generate(db, projects=-(-kpis // 100), objectives=2, activities=10, kpis=5, tasks=0)
+    db.execute(text(
+        "UPDATE kpis SET target_value = 100 + id % 7 * 50, current_value = 40 + id % 13 * 5"
+    ))
+    db.execute(text(
+        "WITH RECURSIVE weeks(week) AS (SELECT 0 UNION ALL SELECT week + 1 FROM weeks WHERE week < :weeks - 1) "
+        "INSERT INTO kpi_rollups (kpi_id, bucket, bucket_start, total, count) "
+        "SELECT kpis.id, 'week', date(:start, '+' || (week * 7) || ' days'), (kpis.id * 7 + week) % 11, 1 "
+        "FROM kpis, weeks WHERE (kpis.id + week) % 5 != 0"
+    ), {"weeks": WINDOW_DAYS // 7, "start": window_start(as_of).isoformat()})
+    db.commit()
+
+
+def benchmark_database(kpis: int = 100000):
+    """
+    Times portfolio_forecast() end to end, loading included, on a scratch
+    database filled by populate(). Returns seconds per step.
+    """
+    import database
+    import migrations
+
+    as_of = today()
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/forecast.db")
+        event.listen(engine, "connect", database.configure_connection)
+        migrations.migrate(engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            populate(db, kpis, as_of)
+            timings = {}
+            started = time.perf_counter()
+            _load(db, as_of, window_start(as_of))
+            timings["load"] = time.perf_counter() - started
+            started = time.perf_counter()
+            portfolio_forecast(db, as_of=as_of)
+            timings["total"] = time.perf_counter() - started
+        finally:
+            db.close()
+            engine.dispose()
+    return timings
+
+
+if __name__ == "__main__":
+    # python forecast.py                      -> list the projects with KPIs at risk
+    # python forecast.py --benchmark [KPIS]   -> time the forecast of KPIS KPIs (100000), on arrays
+    #                                            and on a scratch database
+    if "--benchmark" in sys.argv:
+        position = sys.argv.index("--benchmark")
+        kpis = int(sys.argv[position + 1]) if len(sys.argv) > position + 1 else 100000
+        for label, timings in (("arrays", benchmark(kpis)), ("database", benchmark_database(kpis))):
+            for step, seconds in timings.items():
+                print(f"{label:<9} {step:<10} {seconds * 1000:8.1f} ms")
+            print(f"{kpis} KPIs forecast in {timings['total'] * 1000:.1f} ms ({label})")
+        sys.exit(0)
+
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        result = portfolio_forecast(db, at_risk_only=True)
+    finally:
+        db.close()
+    for project in result["projects"]:
+        print(f"project {project['id']}: {project['at_risk_kpis']}/{project['kpi_count']} KPIs at risk, "
+              f"projected {project['projected_completion']:.0%} by {result['due']}")
+    print(f"{result['at_risk_kpis']} of {result['kpi_count']} KPIs at risk.")
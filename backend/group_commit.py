@@ -0,0 +1,152 @@
+# /backend/group_commit.py
+
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+from sqlalchemy.exc import OperationalError
+
+
+class GroupCommitter:
+    """
+    Coalesces concurrent writes into one transaction per short window.
+
+    Callers hand over a function that performs its statements on a session
+    without committing. A single background thread collects everything queued
+    within `window` seconds (up to `max_batch` items), runs the functions in one
+    transaction and commits once, so N concurrent writes pay for one SQLite
+    commit instead of N. All writes also go through one connection, so they
+    never race each other for the database lock.
+
+    Functions that commit themselves (most of crud.py) can share the same
+    thread through run() or run_async(): they run on their own, in arrival order.
+    Async endpoints await the *_async methods, which wait on the writer
+    without tying up a threadpool thread.
+    """
+
+    def __init__(self, session_factory, window: float = 0.002, max_batch: int = 500):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queues `fn(db, *args, **kwargs)` and blocks until its batch is committed.
+        Returns the function's result, or raises the exception it raised.
+        """
+        return self._enqueue(True, fn, args, kwargs).result()
+
+    async def submit_async(self, fn, *args, **kwargs):
+        """
+        Like submit(), but waits without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self._enqueue(True, fn, args, kwargs))
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Runs `fn(db, *args, **kwargs)`, which commits itself, on the writer
+        thread in its own turn, and blocks until it is done.
+        """
+        return self._enqueue(False, fn, args, kwargs).result()
+
+    async def run_async(self, fn, *args, **kwargs):
+        """
+        Runs `fn(db, *args, **kwargs)`, which commits itself, on the writer
+        thread in its own turn, and waits for it without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self._enqueue(False, fn, args, kwargs))
+
+    def _enqueue(self, grouped: bool, fn, args, kwargs) -> Future:
+        self._ensure_started()
+        future = Future()
+        # The function runs in the caller's context, so the SQL it executes is
+        # charged to the request that queued it (see metrics.py)
+        context = contextvars.copy_context()
+        self._queue.put((grouped, fn, args, kwargs, future, context))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending = None
+        while True:
+            item = pending or self._queue.get()
+            pending = None
+            if not item[0]:
+                self._commit([item])
+                continue
+
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if not item[0]:
+                    # Keeps its place in line, right after this batch
+                    pending = item
+                    break
+                batch.append(item)
+            if len(batch) == 1 or not self._commit(batch):
+                # One of the items failed and took the shared transaction down
+                # with it. Run each item in its own transaction so only the
+                # failing one sees an error.
+                for item in batch:
+                    self._commit([item])
+
+    def _commit(self, batch) -> bool:
+        """
+        Runs the batch in one transaction. Returns False, leaving the futures
+        unresolved, when it failed on an error that may be specific to one item;
+        otherwise every item gets the outcome.
+        """
+        db = self.session_factory()
+        results = []
+        try:
+            for _, fn, args, kwargs, _, context in batch:
+                results.append(context.run(fn, db, *args, **kwargs))
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            # A lock timeout, a full disk or a broken connection would fail every
+            # retry the same way, each after waiting out busy_timeout again
+            if len(batch) > 1 and not isinstance(exc, OperationalError):
+                return False
+            for _, _, _, _, future, _ in batch:
+                _resolve(future, exception=exc)
+            return True
+        finally:
+            db.close()
+
+        for (_, _, _, _, future, _), result in zip(batch, results):
+            _resolve(future, result)
+        return True
+
+
+def _resolve(future: Future, result=None, exception: BaseException = None):
+    # An awaiting request that was cancelled (client gone) has cancelled its
+    # future; the write is committed all the same, nobody is told
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
@@ -1,20 +1,46 @@
 # /backend/main.py - FINAL CORRECTED AND COMPLETE FOR MODULE 1
 
-from fastapi import FastAPI, Depends
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 # --- Absolute imports for all our local modules ---
-import database_models
 from database import engine, SessionLocal
+from database_async import AsyncSessionLocal, read_engine
 import crud
-from models import Project, DataEntryPayload, ObjectiveCreate, Objective, ObjectiveUpdate, ActivityCreate, Activity, ActivityUpdate
-# This command creates the database tables if they don't exist
-database_models.Base.metadata.create_all(bind=engine)
+import crud_async
+import bulk_io
+import forecast
+import migrations
+import reports
+from group_commit import GroupCommitter
+from broadcaster import Broadcaster
+import metrics
+import serialization
+from tree_cache import project_trees, etag_matches
+from compression import CompressionMiddleware
+from models import ProjectTree, DataEntryPayload, ObjectiveCreate, ObjectiveUpdate, ActivityCreate, ActivityUpdate, ChangeSet, KPIHistory, HistoryBucket, ProjectPage, NodePage, KPIPage, TaskPage, SearchKind, SearchResults, ProjectForecast, PortfolioForecast, ReportJob, ReportRequest, BulkFormat, ImportResult, SyncRequest, SyncResponse
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is managed by migrations.py, run before the app starts
+    migrations.check(engine)
+    await report_runner.resume()
+    yield
+    report_runner.shutdown()
+    # Pooled aiosqlite connections are tied to the event loop that opened them
+    await read_engine.dispose()
 
 # Create the FastAPI app instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # --- CORS Middleware Configuration ---
 origins = ["http://localhost:5173"]
@@ -26,113 +52,509 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Dependency for getting a database session ---
-def get_db():
+# Negotiated brotli/gzip compression for responses of 1 KiB or more
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# --- Request metrics, served on /metrics ---
+# Set SLOW_REQUEST_MS to log every slower request together with the SQL it ran
+SLOW_REQUEST_MS = float(os.environ["SLOW_REQUEST_MS"]) if os.environ.get("SLOW_REQUEST_MS") else None
+for instrumented in (engine, read_engine.sync_engine):
+    metrics.instrument_engine(instrumented)
+metrics.registry.add_collector(project_trees.metric_lines)
+app.add_middleware(
+    metrics.MetricsMiddleware,
+    slow_request_ms=SLOW_REQUEST_MS,
+    # Event streams stay open for as long as the dashboard does
+    exclude=["/projects/{project_id}/events", "/metrics"],
+)
+
+# Every write goes through one writer thread. KPI increments are committed
+# in groups, the other writes one at a time, and none of them waits on
+# another for SQLite's write lock.
+db_writer = GroupCommitter(SessionLocal)
+
+# Pushes committed changes to every dashboard streaming /projects/{id}/events
+broadcaster = Broadcaster()
+
+# Builds donor reports in the background (REPORT_WORKERS at a time) into REPORTS_DIR,
+# and deletes them REPORT_RETENTION_HOURS after they finish
+report_runner = reports.ReportRunner(
+    db_writer, SessionLocal,
+    directory=os.environ.get("REPORTS_DIR", "./reports"),
+    max_workers=int(os.environ.get("REPORT_WORKERS", 2)),
+    retention=timedelta(hours=float(os.environ.get("REPORT_RETENTION_HOURS", 24))),
+)
+
+# Seconds of silence after which the event stream sends a keepalive comment
+EVENT_KEEPALIVE_SECONDS = 15
+
+def publish(change_set: dict):
+    """
+    Announces a committed change set to the project's subscribers and hands it back.
+    """
+    broadcaster.publish(change_set["project_id"], {"type": "changes", **change_set})
+    return change_set
+
+# Most changes an event stream replays on connect; further behind, it sends "resync"
+EVENT_BACKLOG_LIMIT = 1000
+
+async def read_changes(project_id: int, since: int, limit: int = EVENT_BACKLOG_LIMIT):
+    async with AsyncSessionLocal() as db:
+        return await crud_async.get_changes(db=db, project_id=project_id, since=since, limit=limit)
+
+# Import bodies larger than this are spooled to disk instead of memory
+IMPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+def import_file(stream, fmt: str):
+    # Each transaction of the import takes its turn on the writer thread
+    return bulk_io.import_stream(stream, fmt, writer=db_writer)
+
+def read_forecast(fn, **kwargs):
+    # Forecasts are CPU-bound array work: they run on a worker thread with a
+    # session of their own rather than on the event loop
     db = SessionLocal()
     try:
-        yield db
+        return fn(db, **kwargs)
     finally:
         db.close()
 
+def format_event(event: dict) -> str:
+    lines = []
+    if event.get("version") is not None:
+        lines.append(f"id: {event['version']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {serialization.dumps(event).decode('utf-8')}")
+    return "\n".join(lines) + "\n\n"
+
+# --- Dependency for getting a database session ---
+# Sessions come from the read pool; writes go through db_writer
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # --- API Endpoints ---
 
-@app.get("/projects/{project_id}", response_model=Project)
-def get_project_details(project_id: int, db: Session = Depends(get_db)):
+@app.get("/projects", response_model=ProjectPage)
+async def list_projects(
+    after: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lists project summaries with their completion, one page at a time.
+    """
+    return await crud_async.list_projects(db=db, after=after, limit=limit)
+
+@app.get("/search", response_model=SearchResults)
+async def search_entities(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[SearchKind] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Finds projects, objectives, activities, KPIs and tasks by name (description
+    for tasks), best matches first, each with the path of its ancestors.
+    Every word must match; the last one also matches as a prefix.
+    """
+    return await crud_async.search_entities(db=db, query=q, kind=kind, limit=limit, offset=offset)
+
+@app.get("/projects/{project_id}", response_model=ProjectTree, responses={
+    304: {"description": "The tree has not changed since the ETag sent in If-None-Match"},
+})
+async def get_project_details(
+    project_id: int,
+    depth: int = Query(crud.TREE_DEPTH, ge=0, le=crud.TREE_DEPTH),
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieves the hierarchical details for a single project from the database.
+
+    `depth` stops the tree after objectives (1) or activities (2) instead of
+    going down to KPIs and tasks (3, the default); the lower levels can then be
+    fetched as each node is expanded (GET /objectives/{id}/activities, ...).
+    `fields` keeps only the listed fields of the levels it names, e.g.
+    "kpi.name,kpi.current_value"; ids are always returned.
+
+    The encoded tree is cached until the project is next written to, and is
+    served with a strong ETag: a client sending it back in If-None-Match gets
+    a 304 after a single lookup of the project's version, without the tree
+    being queried or sent again.
+    """
+    try:
+        selected = crud.tree_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Each depth and field selection is cached separately; the full tree as before
+    variant = None
+    if depth != crud.TREE_DEPTH or selected:
+        variant = (depth, tuple(sorted((level, tuple(sorted(names))) for level, names in selected.items())))
+
+    # Another worker's writes only show in the version: check it on every hit
+    version = await crud_async.get_project_version(db=db, project_id=project_id)
+    cached = project_trees.get(project_id, variant, version)
+    if cached is None:
+        generation = project_trees.generation(project_id)
+        db_project = await crud_async.get_project(db=db, project_id=project_id, depth=depth, fields=selected)
+        if db_project is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        # The tree is built in the ProjectTree schema already; encode it directly
+        # instead of validating every nested object again
+        cached = project_trees.put(project_id, generation, serialization.dumps(db_project), variant, version)
+
+    # no-cache: browsers may keep the tree but must revalidate it every time
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+@app.get("/projects/{project_id}/objectives", response_model=NodePage)
+async def list_project_objectives(
+    project_id: int,
+    after: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lists a project's objectives with their completion, one page at a time.
+    """
+    page = await crud_async.list_objectives(db=db, project_id=project_id, after=after, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return page
+
+@app.get("/objectives/{objective_id}/activities", response_model=NodePage)
+async def list_objective_activities(
+    objective_id: int,
+    after: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lists an objective's activities with their completion, one page at a time.
+    """
+    page = await crud_async.list_activities(db=db, objective_id=objective_id, after=after, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Objective not found")
+    return page
+
+@app.get("/activities/{activity_id}/kpis", response_model=KPIPage)
+async def list_activity_kpis(
+    activity_id: int,
+    after: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lists an activity's KPIs, one page at a time.
+    """
+    page = await crud_async.list_kpis(db=db, activity_id=activity_id, after=after, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    return page
+
+@app.get("/activities/{activity_id}/tasks", response_model=TaskPage)
+async def list_activity_tasks(
+    activity_id: int,
+    after: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lists an activity's tasks, one page at a time.
+    """
+    page = await crud_async.list_tasks(db=db, activity_id=activity_id, after=after, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    return page
+
+@app.get("/projects/{project_id}/changes", response_model=ChangeSet)
+async def get_project_changes(project_id: int, since: int = 0, db: AsyncSession = Depends(get_db)):
+    """
+    Returns the changes made to a project after version `since`,
+    so a client holding an older tree can catch up without refetching it.
+    """
+    return await crud_async.get_changes(db=db, project_id=project_id, since=since)
+
+@app.get("/projects/{project_id}/events")
+async def stream_project_events(
+    project_id: int,
+    since: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Streams a project's changes as Server-Sent Events.
+
+    With `since` the changes missed since that version are replayed first.
+    The Last-Event-ID header an EventSource sends when it reconnects takes
+    precedence: the URL still carries the `since` of the first connection.
+    A "resync" event means the client fell behind and should reload the project.
     """
-    Retrieves the full hierarchical details for a single project from the database.
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def event_stream():
+        subscription = broadcaster.subscribe(project_id)
+        try:
+            version = None
+            if since is not None:
+                backlog = await read_changes(project_id, since)
+                version = backlog["version"]
+                if len(backlog["changes"]) >= EVENT_BACKLOG_LIMIT:
+                    # The backlog was cut short: what came after it is missing
+                    yield format_event({"type": "resync", "project_id": project_id, "version": version})
+                elif backlog["changes"]:
+                    yield format_event({"type": "changes", **backlog})
+            while True:
+                event = await subscription.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                # Skip anything the replayed backlog already covered
+                if event["type"] == "changes" and version is not None and event["version"] <= version:
+                    continue
+                yield format_event(event)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/projects/{project_id}/forecast", response_model=ProjectForecast)
+async def get_project_forecast(project_id: int, due: Optional[date] = None):
     """
-    db_project = crud.get_project(db=db, project_id=project_id)
-    # In a real app, you would add an error check here for when the project is not found
-    return db_project
+    Projects when each KPI of the project will reach its target from its recent
+    trend, and flags the KPIs, activities and objectives that will miss it by
+    `due` (90 days from today by default).
+    """
+    result = await run_in_threadpool(read_forecast, forecast.project_forecast, project_id=project_id, due=due)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return result
 
-@app.post("/data-entry", response_model=Project)
-def create_data_entry(payload: DataEntryPayload, db: Session = Depends(get_db)):
+@app.get("/forecast", response_model=PortfolioForecast)
+async def get_portfolio_forecast(due: Optional[date] = None, at_risk_only: bool = False):
+    """
+    Forecasts every KPI of the portfolio at once and summarises it per project.
+    """
+    return await run_in_threadpool(read_forecast, forecast.portfolio_forecast, due=due, at_risk_only=at_risk_only)
+
+@app.get("/kpis/{kpi_id}/history", response_model=KPIHistory)
+async def get_kpi_history(
+    kpi_id: int,
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    bucket: HistoryBucket = "day",
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Returns a KPI's progress per day, week or month between two dates.
+    """
+    history = await crud_async.get_kpi_history(db=db, kpi_id=kpi_id, bucket=bucket, start=start, end=end)
+    if history is None:
+        raise HTTPException(status_code=404, detail="KPI not found")
+    return history
+
+@app.post("/data-entry", response_model=ChangeSet)
+async def create_data_entry(payload: DataEntryPayload):
     """
     Receives a data entry, updates the correct KPI in the database,
-    and returns the entire updated project object.
+    and returns the updated KPI along with the project's new version.
     """
-    task = crud.get_task(db=db, task_id=payload.taskId)
-    
-    if task:
-        crud.update_kpi_value(db=db, kpi_id=task.kpi_id, value_to_add=payload.numericValue)
+    change_set = await db_writer.submit_async(crud.apply_data_entry, payload)
+    if change_set is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return publish(change_set)
 
-    # After the update, fetch the entire project again to get the fresh data
-    updated_project = crud.get_project(db=db, project_id=1)
-    
-    return updated_project
+@app.post("/sync", response_model=SyncResponse)
+async def sync_entries(payload: SyncRequest):
+    """
+    Uploads a batch of entries queued on a device while it was offline.
+    Every entry carries a client-generated id, so resending a batch after a
+    dropped connection never counts anything twice. The batch is applied in
+    a single transaction and the outcome of each entry is returned.
+    """
+    outcome = await db_writer.submit_async(crud.apply_entries, payload.entries)
+    for change_set in outcome["changes"]:
+        publish(change_set)
+    return outcome
 
 # Add this new endpoint to /backend/main.py
 
-@app.post("/projects/{project_id}/objectives", response_model=Objective)
-def create_objective_for_project(
+@app.post("/projects/{project_id}/objectives", response_model=ChangeSet)
+async def create_objective_for_project(
     project_id: int, 
-    objective: ObjectiveCreate, 
-    db: Session = Depends(get_db)
+    objective: ObjectiveCreate
 ):
     """
     Creates a new objective linked to a specific project.
     """
-    return crud.create_objective(db=db, objective=objective, project_id=project_id)
+    change_set = await db_writer.run_async(crud.create_objective, objective=objective, project_id=project_id)
+    if change_set is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return publish(change_set)
 
 # Add this new endpoint to /backend/main.py
-@app.put("/activities/{activity_id}", response_model=Activity)
-def update_activity(
+@app.put("/activities/{activity_id}", response_model=ChangeSet)
+async def update_activity(
     activity_id: int,
-    activity_update: ActivityUpdate,
-    db: Session = Depends(get_db)
+    activity_update: ActivityUpdate
 ):
     """
     Updates a specific activity by its ID.
     """
-    return crud.update_activity(db=db, activity_id=activity_id, activity_update=activity_update)
+    change_set = await db_writer.run_async(crud.update_activity, activity_id=activity_id, activity_update=activity_update)
+    if change_set is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    return publish(change_set)
 # Add this new endpoint to /backend/main.py
 
-@app.delete("/objectives/{objective_id}", status_code=204)
-def delete_objective(objective_id: int, db: Session = Depends(get_db)):
+@app.delete("/objectives", response_model=List[ChangeSet])
+async def delete_objectives(ids: List[int] = Query(...)):
+    """
+    Deletes many objectives with their subtrees at once (?ids=1&ids=2...).
+    Returns one change set per affected project.
+    """
+    return [publish(change_set) for change_set in await db_writer.run_async(crud.delete_objectives, objective_ids=ids)]
+
+@app.delete("/objectives/{objective_id}", response_model=ChangeSet)
+async def delete_objective(objective_id: int):
     """
     Deletes a specific objective by its ID.
     """
-    crud.delete_objective(db=db, objective_id=objective_id)
-    # For DELETE operations, it's common to return no content.
-    # The status_code=204 tells the client the operation was successful
-    # but there is no data to return.
-    return
+    change_set = await db_writer.run_async(crud.delete_objective, objective_id=objective_id)
+    if change_set is None:
+        raise HTTPException(status_code=404, detail="Objective not found")
+    return publish(change_set)
 
 # Add this new endpoint to /backend/main.py
 
-@app.put("/objectives/{objective_id}", response_model=Objective)
-def update_objective(
+@app.put("/objectives/{objective_id}", response_model=ChangeSet)
+async def update_objective(
     objective_id: int,
-    objective_update: ObjectiveUpdate,
-    db: Session = Depends(get_db)
+    objective_update: ObjectiveUpdate
 ):
     """
     Updates a specific objective by its ID.
     """
-    return crud.update_objective(db=db, objective_id=objective_id, objective_update=objective_update)
+    change_set = await db_writer.run_async(crud.update_objective, objective_id=objective_id, objective_update=objective_update)
+    if change_set is None:
+        raise HTTPException(status_code=404, detail="Objective not found")
+    return publish(change_set)
 
 # Add this new endpoint to /backend/main.py
 
-@app.post("/objectives/{objective_id}/activities", response_model=Activity)
-def create_activity_for_objective(
+@app.post("/objectives/{objective_id}/activities", response_model=ChangeSet)
+async def create_activity_for_objective(
     objective_id: int,
-    activity: ActivityCreate,
-    db: Session = Depends(get_db)
+    activity: ActivityCreate
 ):
     """
     Creates a new activity linked to a specific objective.
     """
-    return crud.create_activity(db=db, activity=activity, objective_id=objective_id)
+    change_set = await db_writer.run_async(crud.create_activity, activity=activity, objective_id=objective_id)
+    if change_set is None:
+        raise HTTPException(status_code=404, detail="Objective not found")
+    return publish(change_set)
 
 # Add this new endpoint to /backend/main.py
 
-@app.delete("/activities/{activity_id}", status_code=204)
-def delete_activity(activity_id: int, db: Session = Depends(get_db)):
+@app.delete("/activities", response_model=List[ChangeSet])
+async def delete_activities(ids: List[int] = Query(...)):
+    """
+    Deletes many activities with their KPIs and tasks at once (?ids=1&ids=2...).
+    Returns one change set per affected project.
+    """
+    return [publish(change_set) for change_set in await db_writer.run_async(crud.delete_activities, activity_ids=ids)]
+
+@app.delete("/activities/{activity_id}", response_model=ChangeSet)
+async def delete_activity(activity_id: int):
     """
     Deletes a specific activity by its ID.
     """
-    crud.delete_activity(db=db, activity_id=activity_id)
-    return
+    change_set = await db_writer.run_async(crud.delete_activity, activity_id=activity_id)
+    if change_set is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    return publish(change_set)
+
+@app.post("/import", response_model=ImportResult)
+async def import_projects(request: Request, format: BulkFormat = "ndjson"):
+    """
+    Bulk-loads project hierarchies from an NDJSON or CSV body (format described
+    in bulk_io.py). The body is checked in full before anything is written, so
+    an invalid record fails the import without leaving any of it behind.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            inserted = await run_in_threadpool(import_file, spool, format)
+        except bulk_io.BulkImportError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    return {"inserted": inserted}
+
+@app.get("/export")
+def export_projects(format: BulkFormat = "ndjson", project_id: Optional[List[int]] = Query(None)):
+    """
+    Streams the given projects (all by default) in the import format.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(bulk_io.export_chunks(SessionLocal, format, project_id), media_type=media_type)
+
+@app.post("/reports", response_model=ReportJob, status_code=202)
+async def submit_report(request: ReportRequest):
+    """
+    Queues a KPI report of the given projects (all by default) and returns its
+    job at once. An identical report already queued or running is returned
+    instead of starting another. Poll GET /reports/{id} until it is done.
+    """
+    if request.format not in reports.FORMATS:
+        raise HTTPException(status_code=400, detail=f"{request.format} reports are not available on this server")
+    job = await report_runner.submit(request.format, request.project_ids)
+    if job is None:
+        raise HTTPException(status_code=503, detail="Too many reports pending, try again later",
+                            headers={"Retry-After": "30"})
+    return job
+
+@app.get("/reports/{job_id}", response_model=ReportJob)
+async def get_report(job_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Returns a report job's status.
+    """
+    job = await crud_async.get_report_job(db=db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return job
+
+@app.get("/reports/{job_id}/download")
+async def download_report(job_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Sends a finished report's file. Reports expire REPORT_RETENTION_HOURS after
+    they finish: an expired job is not found any more.
+    """
+    job = await crud_async.get_report_job(db=db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Report is {job['status']}")
+    report_format = reports.FORMATS.get(job["format"])
+    if report_format is None:
+        # Built by a server that had the format's writer, which this one lacks
+        raise HTTPException(status_code=410, detail=f"{job['format']} reports are not available on this server")
+    path = report_runner.path(job)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Report file is no longer available")
+    return FileResponse(path, media_type=report_format.media_type, filename=os.path.basename(path))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """
+    Request latency and SQL statistics in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def read_root():
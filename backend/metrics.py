@@ -0,0 +1,261 @@
+# /backend/metrics.py
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+# Request latency and SQL instrumentation, rendered in the Prometheus text format.
+#
+# MetricsMiddleware times every HTTP request and labels it with the route
+# template ("/projects/{project_id}"), never the raw path, so the number of
+# series stays bounded. instrument_engine() hooks the engine's cursor events and
+# charges each statement to the request being served, which it finds through a
+# context variable (FastAPI copies the context into the threadpool that runs
+# sync endpoints, and AsyncSession.run_sync keeps it too). The group commit
+# thread, which performs every write, runs each queued function in the context
+# of the request that queued it, so writes are charged to their request too.
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+# A request running the same statement this many times is reported as N+1
+N_PLUS_ONE_THRESHOLD = 10
+
+# At most this many statements are kept for the slow-request log
+CAPTURED_STATEMENTS = 50
+
+_current_request = contextvars.ContextVar("metrics_request", default=None)
+
+
+class RequestStats:
+    """
+    The SQL executed while serving one request.
+    """
+
+    __slots__ = ("statements", "db_seconds", "repeats", "captured")
+
+    def __init__(self, capture: bool = False):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.repeats = Counter()
+        # (statement, seconds) pairs, only collected when the slow log is on
+        self.captured = [] if capture else None
+
+    def record(self, statement: str, seconds: float, executemany: bool = False):
+        self.statements += 1
+        self.db_seconds += seconds
+        # A batch sent with executemany is the cure for N+1, not an instance of it
+        if not executemany:
+            self.repeats[statement] += 1
+        if self.captured is not None and len(self.captured) < CAPTURED_STATEMENTS:
+            self.captured.append((statement, seconds))
+
+    def most_repeated(self):
+        """
+        Returns (statement, count) for the statement run most often, or None.
+        """
+        if not self.repeats:
+            return None
+        return self.repeats.most_common(1)[0]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: dict):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}"
+        cumulative += self.counts[-1]
+        yield f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {_number(self.sum)}"
+        yield f"{name}_count{_labels(labels)} {cumulative}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Registry:
+    """
+    Per-route request metrics. Every update is a few dict lookups under one lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}      # (method, route, status) -> Histogram
+        self._statements = {}   # route -> Histogram of statements per request
+        self._db_seconds = Counter()
+        self._n_plus_one = Counter()
+        self._slow = Counter()
+        self._collectors = []
+
+    def add_collector(self, collect):
+        """
+        Appends the lines returned by `collect()` to every rendering.
+        """
+        self._collectors.append(collect)
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats,
+                n_plus_one: bool, slow: bool):
+        with self._lock:
+            key = (method, route, str(status))
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+            histogram = self._statements.get(route)
+            if histogram is None:
+                histogram = self._statements[route] = Histogram(STATEMENT_BUCKETS)
+            histogram.observe(stats.statements)
+            self._db_seconds[route] += stats.db_seconds
+            if n_plus_one:
+                self._n_plus_one[route] += 1
+            if slow:
+                self._slow[route] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_request_duration_seconds Time spent serving HTTP requests.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route, status), histogram in sorted(self._latency.items()):
+                lines.extend(histogram.render(
+                    "http_request_duration_seconds", {"method": method, "route": route, "status": status}
+                ))
+            lines += [
+                "# HELP db_statements_per_request SQL statements executed per HTTP request.",
+                "# TYPE db_statements_per_request histogram",
+            ]
+            for route, histogram in sorted(self._statements.items()):
+                lines.extend(histogram.render("db_statements_per_request", {"route": route}))
+            for name, kind, help_text, values in (
+                ("db_duration_seconds_total", "counter", "Time spent executing SQL, per route.",
+                 self._db_seconds),
+                ("n_plus_one_requests_total", "counter",
+                 f"Requests that ran one statement {N_PLUS_ONE_THRESHOLD} or more times.", self._n_plus_one),
+                ("slow_requests_total", "counter", "Requests slower than the slow-request threshold.",
+                 self._slow),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines.extend(f"{name}{_labels({'route': route})} {_number(value)}"
+                             for route, value in sorted(values.items()))
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# --- SQLAlchemy hooks ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is None:
+        return
+    started = conn.info.get("metrics_started")
+    if started:
+        stats.record(statement, time.perf_counter() - started.pop(), executemany)
+
+
+def instrument_engine(engine):
+    """
+    Charges every statement the engine runs to the current request, if any.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- ASGI middleware ---
+
+class MetricsMiddleware:
+    """
+    Records latency, statement counts and DB time for every HTTP request.
+
+    Requests slower than `slow_request_ms` (off when None) are logged with the
+    SQL they ran; statements are only captured when that log is enabled.
+    Routes in `exclude` (e.g. long-lived event streams) are not recorded.
+    """
+
+    def __init__(self, app, registry: Registry = registry, slow_request_ms=None, exclude=()):
+        self.app = app
+        self.registry = registry
+        self.slow_seconds = slow_request_ms / 1000 if slow_request_ms is not None else None
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(capture=self.slow_seconds is not None)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            if route not in self.exclude:
+                self._record(scope["method"], route, status, elapsed, stats)
+
+    def _record(self, method, route, status, elapsed, stats):
+        repeated = stats.most_repeated()
+        n_plus_one = repeated is not None and repeated[1] >= N_PLUS_ONE_THRESHOLD
+        slow = self.slow_seconds is not None and elapsed >= self.slow_seconds
+        self.registry.observe(method, route, status, elapsed, stats, n_plus_one, slow)
+
+        if n_plus_one:
+            logger.warning("Possible N+1 in %s %s: ran %d times: %s", method, route, repeated[1],
+                           " ".join(repeated[0].split()))
+        if slow:
+            sql = "\n".join(f"  {seconds * 1000:8.2f}ms  {' '.join(statement.split())}"
+                            for statement, seconds in stats.captured)
+            if stats.statements > len(stats.captured):
+                sql += f"\n  ... {stats.statements - len(stats.captured)} more"
+            logger.warning("Slow request %s %s (%d): %.1fms, %d statements, %.1fms in SQL\n%s",
+                           method, route, status, elapsed * 1000, stats.statements,
+                           stats.db_seconds * 1000, sql)
@@ -0,0 +1,152 @@
+# /backend/migrations.py
+
+import sys
+
+from sqlalchemy.orm import Session
+
+# Versioned schema migrations.
+#
+# The schema version lives in SQLite's `PRAGMA user_version` (0 for a new or
+# pre-migration database). `python migrations.py` applies every migration
+# above it, in order, each in its own transaction together with the version
+# bump, so an interrupted run can simply be started again. The app never
+# changes the schema itself: it refuses to start until the database is current.
+#
+# Schema changes are made by appending a migration to MIGRATIONS (and updating
+# database_models.py to match), never by editing one that has already shipped.
+# The baseline creates the tables from the models as they are when it runs,
+# so later migrations must tolerate objects that already exist ("IF NOT EXISTS").
+
+
+def _baseline(connection):
+    """
+    Creates the tables that do not exist yet: the schema create_all() used
+    to build when the app was imported.
+    """
+    from database_models import Base
+    Base.metadata.create_all(bind=connection)
+
+
+# Child lookups walk these columns on every tree load, delete and data entry
+FOREIGN_KEY_INDEXES = [
+    ("ix_objectives_project_id", "objectives", "project_id"),
+    ("ix_activities_objective_id", "activities", "objective_id"),
+    ("ix_kpis_activity_id", "kpis", "activity_id"),
+    ("ix_tasks_activity_id", "tasks", "activity_id"),
+    ("ix_tasks_kpi_id", "tasks", "kpi_id"),
+]
+
+
+def _index_foreign_keys(connection):
+    for name, table, column in FOREIGN_KEY_INDEXES:
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+
+
+def _rebuild_progress(connection):
+    """
+    Fills in the progress rows of databases created before they were maintained.
+    """
+    import progress
+
+    db = Session(bind=connection)
+    try:
+        progress.rebuild(db)
+        db.flush()
+    finally:
+        db.close()
+
+
+def _search_index(connection):
+    """
+    Creates the full-text search table and indexes the existing rows.
+    """
+    import search
+
+    connection.exec_driver_sql(search.CREATE_TABLE)
+    db = Session(bind=connection)
+    try:
+        search.rebuild(db)
+        db.flush()
+    finally:
+        db.close()
+
+
+def _report_jobs(connection):
+    from database_models import ReportJob
+    ReportJob.__table__.create(bind=connection, checkfirst=True)
+
+
+def _forget_unapplied_entries(connection):
+    """
+    Drops the entries recorded as not_found: only applied entries are
+    remembered now, so a resend of one of these is looked at again.
+    """
+    connection.exec_driver_sql("DELETE FROM applied_entries WHERE status = 'not_found'")
+
+
+# (version, description, function(connection)), in order
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "index the foreign keys", _index_foreign_keys),
+    (3, "rebuild progress rows", _rebuild_progress),
+    (4, "full-text search index", _search_index),
+    (5, "report jobs", _report_jobs),
+    (6, "forget entries that were never applied", _forget_unapplied_entries),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine, verbose: bool = False) -> int:
+    """
+    Applies every pending migration. Returns the number applied.
+    """
+    applied = 0
+    for version, description, apply in MIGRATIONS:
+        with engine.connect() as connection:
+            if current_version(connection) >= version:
+                continue
+            # Take the write lock up front: two runners racing each other
+            # must not both apply the same migration
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            if current_version(connection) >= version:
+                connection.rollback()
+                continue
+            apply(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {version}")
+            connection.commit()
+        applied += 1
+        if verbose:
+            print(f"Applied migration {version}: {description}")
+    return applied
+
+
+def check(engine):
+    """
+    Raises if the database is missing migrations; cheap enough to run at startup.
+    """
+    with engine.connect() as connection:
+        version = current_version(connection)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, the app needs {LATEST_VERSION}: "
+            "run `python migrations.py` first."
+        )
+
+
+if __name__ == "__main__":
+    # python migrations.py          -> apply pending migrations
+    # python migrations.py --status -> print the current and latest versions
+    from database import engine
+
+    with engine.connect() as connection:
+        version = current_version(connection)
+    if "--status" in sys.argv:
+        print(f"Schema version {version}, latest {LATEST_VERSION}.")
+        sys.exit(0 if version >= LATEST_VERSION else 1)
+    if not migrate(engine, verbose=True):
+        print(f"Already at version {version}.")
@@ -1,13 +1,21 @@
 # /backend/models.py - FINAL CORRECT VERSION
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional
+
+HistoryBucket = Literal["day", "week", "month"]
+BulkFormat = Literal["ndjson", "csv"]
+ReportFormat = Literal["csv", "html", "xlsx"]
+ReportStatus = Literal["queued", "running", "done", "failed"]
+ForecastStatus = Literal["met", "on_track", "no_data", "at_risk", "stalled"]
+SearchKind = Literal["project", "objective", "activity", "kpi", "task"]
 
 class KPI(BaseModel):
     id: int
     name: str
-    current_value: int = 0
-    target_value: int
+    current_value: float = 0.0
+    target_value: float
     unit: str
 
 class Task(BaseModel):
@@ -29,11 +37,209 @@ class Objective(BaseModel):
 class Project(BaseModel):
     id: int
     name: str
+    version: int = 0
     objectives: List[Objective] = []
 
+# The tree GET /projects/{id} returns: `fields` can leave out anything but the
+# ids, and the levels below `depth` are left out (not sent as empty lists)
+class KPINode(BaseModel):
+    id: int
+    name: Optional[str] = None
+    current_value: Optional[float] = None
+    target_value: Optional[float] = None
+    unit: Optional[str] = None
+
+class TaskNode(BaseModel):
+    id: int
+    description: Optional[str] = None
+    kpi_id: Optional[int] = None
+
+class ActivityNode(BaseModel):
+    id: int
+    name: Optional[str] = None
+    kpis: Optional[List[KPINode]] = None
+    tasks: Optional[List[TaskNode]] = None
+
+class ObjectiveNode(BaseModel):
+    id: int
+    name: Optional[str] = None
+    activities: Optional[List[ActivityNode]] = None
+
+class ProjectTree(BaseModel):
+    id: int
+    name: Optional[str] = None
+    version: Optional[int] = None
+    objectives: Optional[List[ObjectiveNode]] = None
+
+class NodeSummary(BaseModel):
+    # An objective or activity without its children
+    id: int
+    name: str
+    kpi_count: int = 0
+    # Average completion of the KPIs below it, between 0 and 1
+    completion: float = 0.0
+
+class NodePage(BaseModel):
+    items: List[NodeSummary] = []
+    # Pass as `after` to get the next page; None on the last page
+    next_after: Optional[int] = None
+
+class KPIPage(BaseModel):
+    items: List[KPI] = []
+    next_after: Optional[int] = None
+
+class TaskPage(BaseModel):
+    items: List[Task] = []
+    next_after: Optional[int] = None
+
+class ProjectSummary(BaseModel):
+    id: int
+    name: str
+    kpi_count: int = 0
+    # Mean completion of the project's KPIs, between 0 and 1
+    completion: float = 0.0
+
+class ProjectPage(BaseModel):
+    items: List[ProjectSummary] = []
+    # Pass as `after` to get the next page; None on the last page
+    next_after: Optional[int] = None
+
+class KPIForecast(BaseModel):
+    id: int
+    activity_id: int
+    current_value: float
+    target_value: float
+    # Trend of the KPI's value over the forecast window
+    rate_per_day: float
+    status: ForecastStatus
+    # Completion expected on the due date, between 0 and 1
+    projected_completion: float
+    # When the target is reached at the current rate; None if never
+    projected_date: Optional[date] = None
+
+class NodeForecast(BaseModel):
+    # An activity, objective or project, summarised over the KPIs below it
+    id: int
+    kpi_count: int
+    at_risk_kpis: int
+    at_risk: bool
+    completion: float
+    projected_completion: float
+    # When its slowest KPI reaches its target; None if one never does
+    projected_date: Optional[date] = None
+
+class ProjectForecast(BaseModel):
+    project_id: int
+    as_of: date
+    due: date
+    window_start: date
+    project: NodeForecast
+    objectives: List[NodeForecast] = []
+    activities: List[NodeForecast] = []
+    kpis: List[KPIForecast] = []
+
+class PortfolioForecast(BaseModel):
+    as_of: date
+    due: date
+    window_start: date
+    kpi_count: int
+    at_risk_kpis: int
+    projects: List[NodeForecast] = []
+
+class ReportRequest(BaseModel):
+    format: ReportFormat = "csv"
+    # Projects to report on; all of them if None
+    project_ids: Optional[List[int]] = None
+
+class ReportJob(BaseModel):
+    id: int
+    format: ReportFormat
+    project_ids: Optional[List[int]] = None
+    status: ReportStatus
+    # KPI rows written, once done
+    rows: int = 0
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class SearchPathNode(BaseModel):
+    kind: SearchKind
+    id: int
+    name: Optional[str] = None
+
+class SearchHit(BaseModel):
+    kind: SearchKind
+    id: int
+    text: Optional[str] = None
+    project_id: int
+    # Ancestors from the project down to the hit's parent
+    path: List[SearchPathNode] = []
+    # Higher is a better match (FTS5 bm25)
+    score: float
+
+class SearchResults(BaseModel):
+    items: List[SearchHit] = []
+    # Pass as `offset` to get the next page; None on the last page
+    next_offset: Optional[int] = None
+    # Some matches were too many to rank and cannot be reached: narrow the query
+    truncated: bool = False
+
+class Change(BaseModel):
+    version: int
+    entity: str
+    op: str
+    id: int
+    data: Optional[Dict[str, Any]] = None
+
+class ChangeSet(BaseModel):
+    project_id: int
+    version: int
+    changes: List[Change] = []
+
+class KPIHistoryPoint(BaseModel):
+    bucket_start: date
+    total: float
+    count: int
+    # The KPI's value at the end of the bucket
+    value: float
+
+class KPIHistory(BaseModel):
+    kpi_id: int
+    bucket: HistoryBucket
+    points: List[KPIHistoryPoint] = []
+
+class ImportResult(BaseModel):
+    # Rows inserted per record type ("project", "objective", ...)
+    inserted: Dict[str, int]
+
 class DataEntryPayload(BaseModel):
     taskId: int
     numericValue: int
+    # Optional client-generated id; an entry resent with the same id is applied only once
+    clientId: Optional[str] = None
+
+class SyncEntry(BaseModel):
+    clientId: str
+    taskId: int
+    numericValue: int
+    # When the entry was collected on the device (defaults to when it is applied)
+    recordedAt: Optional[datetime] = None
+
+class SyncRequest(BaseModel):
+    # All of a batch is applied on the single writer thread: keep batches short
+    entries: List[SyncEntry] = Field(..., max_length=1000)
+
+class SyncResult(BaseModel):
+    clientId: str
+    status: Literal["applied", "duplicate", "not_found"]
+    kpi_id: Optional[int] = None
+
+class SyncResponse(BaseModel):
+    results: List[SyncResult] = []
+    # One change set per project touched by the applied entries
+    changes: List[ChangeSet] = []
 
 class ObjectiveCreate(BaseModel):
     name: str
@@ -0,0 +1,210 @@
+# /backend/progress.py
+
+import sys
+
+from sqlalchemy import case, delete, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+
+import database_models as db_models
+
+# Stored sums may drift by float rounding after many increments
+TOLERANCE = 1e-6
+
+
+def kpi_ratio(current_value: float, target_value: float) -> float:
+    """
+    Completion of a single KPI, between 0 and 1 (same rule as the dashboard).
+    """
+    if not target_value or target_value <= 0:
+        return 0.0
+    return min(max((current_value or 0.0) / target_value, 0.0), 1.0)
+
+
+def completion(kpi_count: int, progress_sum: float) -> float:
+    return progress_sum / kpi_count if kpi_count else 0.0
+
+
+# --- Incremental maintenance (run inside the caller's transaction) ---
+
+def apply_delta(db: Session, project_id: int, nodes, kpi_delta: int = 0, sum_delta: float = 0.0):
+    """
+    Adds the deltas to the progress rows of the given (level, node_id) nodes,
+    creating the rows if needed, in one statement.
+    """
+    upsert = sqlite_insert(db_models.Progress).values([
+        {"level": level, "node_id": node_id, "project_id": project_id,
+         "kpi_count": kpi_delta, "progress_sum": sum_delta}
+        for level, node_id in nodes
+    ])
+    db.execute(upsert.on_conflict_do_update(
+        index_elements=["level", "node_id"],
+        set_={
+            "kpi_count": db_models.Progress.kpi_count + upsert.excluded.kpi_count,
+            "progress_sum": db_models.Progress.progress_sum + upsert.excluded.progress_sum,
+        },
+    ))
+
+
+def _subtract(db: Session, level: str, ancestor_ids, totals):
+    """
+    Subtracts `totals(column)` (a correlated SUM over the removed nodes) from the
+    progress rows of the given ancestors, in one UPDATE.
+    """
+    Progress = db_models.Progress
+    db.execute(
+        update(Progress)
+        .where(Progress.level == level, Progress.node_id.in_(ancestor_ids))
+        .values(
+            kpi_count=Progress.kpi_count - totals("kpi_count"),
+            progress_sum=Progress.progress_sum - totals("progress_sum"),
+        )
+    )
+
+
+def remove_activities(db: Session, activity_ids):
+    """
+    Subtracts the totals of the given activities (a list or a SELECT of IDs) from
+    their objectives and projects, then drops their rows. Must run before the
+    activities themselves are deleted.
+    """
+    Progress, Activity = db_models.Progress, db_models.Activity
+    node = aliased(Progress)
+    removed = (node.level == "activity") & node.node_id.in_(activity_ids)
+
+    def per_objective(column):
+        return select(func.coalesce(func.sum(getattr(node, column)), 0)) \
+            .join(Activity, Activity.id == node.node_id) \
+            .where(removed, Activity.objective_id == Progress.node_id).scalar_subquery()
+
+    def per_project(column):
+        return select(func.coalesce(func.sum(getattr(node, column)), 0)) \
+            .where(removed, node.project_id == Progress.node_id).scalar_subquery()
+
+    _subtract(db, "objective", select(Activity.objective_id).where(Activity.id.in_(activity_ids)), per_objective)
+    _subtract(db, "project", select(node.project_id).where(removed), per_project)
+    db.execute(delete(Progress).where(Progress.level == "activity", Progress.node_id.in_(activity_ids)))
+
+
+def remove_objectives(db: Session, objective_ids):
+    """
+    Subtracts the totals of the given objectives from their projects, then drops
+    the rows of the objectives and of every activity under them. Must run before
+    the objectives and activities themselves are deleted.
+    """
+    Progress, Activity = db_models.Progress, db_models.Activity
+    node = aliased(Progress)
+    removed = (node.level == "objective") & node.node_id.in_(objective_ids)
+
+    def per_project(column):
+        return select(func.coalesce(func.sum(getattr(node, column)), 0)) \
+            .where(removed, node.project_id == Progress.node_id).scalar_subquery()
+
+    _subtract(db, "project", select(node.project_id).where(removed), per_project)
+    db.execute(delete(Progress).where(
+        Progress.level == "activity",
+        Progress.node_id.in_(select(Activity.id).where(Activity.objective_id.in_(objective_ids))),
+    ))
+    db.execute(delete(Progress).where(Progress.level == "objective", Progress.node_id.in_(objective_ids)))
+
+
+# --- Recomputation from scratch ---
+
+def _ratio_sql():
+    kpi = db_models.KPI
+    return case(
+        (kpi.target_value > 0, func.min(func.max(func.coalesce(kpi.current_value, 0.0) / kpi.target_value, 0.0), 1.0)),
+        else_=0.0,
+    )
+
+
+def _recomputed(project_ids=None):
+    """
+    SELECTs producing (level, node_id, project_id, kpi_count, progress_sum)
+    for every node, computed from the KPIs themselves.
+    """
+    Project, Objective, Activity, KPI = db_models.Project, db_models.Objective, db_models.Activity, db_models.KPI
+    totals = (func.count(KPI.id), func.coalesce(func.sum(_ratio_sql()), 0.0))
+
+    activities = select(literal("activity"), Activity.id, Objective.project_id, *totals).select_from(Activity) \
+        .join(Objective, Objective.id == Activity.objective_id) \
+        .outerjoin(KPI, KPI.activity_id == Activity.id).group_by(Activity.id)
+    objectives = select(literal("objective"), Objective.id, Objective.project_id, *totals).select_from(Objective) \
+        .outerjoin(Activity, Activity.objective_id == Objective.id) \
+        .outerjoin(KPI, KPI.activity_id == Activity.id).group_by(Objective.id)
+    projects = select(literal("project"), Project.id, Project.id, *totals).select_from(Project) \
+        .outerjoin(Objective, Objective.project_id == Project.id) \
+        .outerjoin(Activity, Activity.objective_id == Objective.id) \
+        .outerjoin(KPI, KPI.activity_id == Activity.id).group_by(Project.id)
+
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        activities = activities.where(Objective.project_id.in_(project_ids))
+        objectives = objectives.where(Objective.project_id.in_(project_ids))
+        projects = projects.where(Project.id.in_(project_ids))
+    return activities, objectives, projects
+
+
+def rebuild(db: Session, project_ids=None):
+    """
+    Recomputes the progress rows of the given projects (all if None) with a
+    few set-based statements. Does not commit.
+    """
+    stored = delete(db_models.Progress)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        stored = stored.where(db_models.Progress.project_id.in_(project_ids))
+    db.execute(stored)
+    columns = ["level", "node_id", "project_id", "kpi_count", "progress_sum"]
+    for query in _recomputed(project_ids):
+        db.execute(sqlite_insert(db_models.Progress).from_select(columns, query))
+
+
+def check_consistency(db: Session, project_ids=None):
+    """
+    Recomputes every node's progress from scratch and compares it with the
+    stored rows. Returns a list of (level, node_id, stored, expected) mismatches,
+    where stored/expected are (kpi_count, progress_sum) or None if missing.
+    """
+    expected = {}
+    for query in _recomputed(project_ids):
+        for level, node_id, _, kpi_count, progress_sum in db.execute(query):
+            expected[(level, node_id)] = (kpi_count, progress_sum)
+
+    stored_query = db.query(
+        db_models.Progress.level, db_models.Progress.node_id,
+        db_models.Progress.kpi_count, db_models.Progress.progress_sum,
+    )
+    if project_ids is not None:
+        stored_query = stored_query.filter(db_models.Progress.project_id.in_(list(project_ids)))
+    stored = {(row.level, row.node_id): (row.kpi_count, row.progress_sum) for row in stored_query}
+
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want, have = expected.get(key), stored.get(key)
+        # A node without KPIs may simply have no row yet
+        if have is None and want == (0, 0.0):
+            continue
+        if want is None or have is None or have[0] != want[0] or abs(have[1] - want[1]) > TOLERANCE:
+            mismatches.append((key[0], key[1], have, want))
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python progress.py           -> report differences between stored and recomputed progress
+    # python progress.py --rebuild -> recompute all progress rows
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if "--rebuild" in sys.argv:
+            rebuild(db)
+            db.commit()
+            print("Progress rebuilt.")
+        mismatches = check_consistency(db)
+        for level, node_id, stored, expected in mismatches:
+            print(f"{level} {node_id}: stored={stored} expected={expected}")
+        print(f"{len(mismatches)} mismatches found.")
+        sys.exit(1 if mismatches else 0)
+    finally:
+        db.close()
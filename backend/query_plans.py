@@ -0,0 +1,157 @@
+# /backend/query_plans.py
+
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Checks that the hot code paths never scan a whole table.
+#
+# `python query_plans.py` builds a small scratch database (the real one is
+# never touched), runs each path of hot_paths() while recording the SQL it
+# executes, and asks SQLite for the plan of every statement
+# (EXPLAIN QUERY PLAN). A plan step that reads a table from end to end
+# ("SCAN tasks") fails the check; index lookups ("SEARCH tasks USING INDEX
+# ix_tasks_activity_id (activity_id=?)") are fine. Exits with 1 on failure.
+# tests/test_query_plans.py runs the same check with the test suite.
+
+
+def hot_paths(ids):
+    """
+    (name, function(db)) for each code path that must stay index-only.
+    """
+    import crud
+    import forecast
+    import search
+    from models import ActivityCreate, DataEntryPayload, ObjectiveCreate, ObjectiveUpdate
+
+    return [
+        ("list_projects", lambda db: crud.list_projects(db, after=ids["project"] - 1, limit=10)),
+        ("get_project", lambda db: crud.get_project(db, ids["project"])),
+        ("get_project depth=1", lambda db: crud.get_project(db, ids["project"], depth=1)),
+        ("list_objectives", lambda db: crud.list_objectives(db, ids["project"], limit=2)),
+        ("list_activities", lambda db: crud.list_activities(db, ids["objective"], limit=2)),
+        ("list_kpis", lambda db: crud.list_kpis(db, ids["activity"], limit=1)),
+        ("list_tasks", lambda db: crud.list_tasks(db, ids["activity"], after=ids["task"], limit=2)),
+        ("get_changes", lambda db: crud.get_changes(db, ids["project"], since=0)),
+        ("get_kpi_history", lambda db: crud.get_kpi_history(db, ids["kpi"], "day")),
+        ("search", lambda db: search.search(db, "wells site")),
+        ("project_forecast", lambda db: forecast.project_forecast(db, ids["project"])),
+        ("apply_data_entry", lambda db: crud.apply_data_entry(
+            db, DataEntryPayload(taskId=ids["task"], numericValue=1, clientId="query-plans"))),
+        ("create_objective", lambda db: crud.create_objective(db, ObjectiveCreate(name="New"), ids["project"])),
+        ("create_activity", lambda db: crud.create_activity(db, ActivityCreate(name="New"), ids["objective"])),
+        ("update_objective", lambda db: crud.update_objective(db, ids["objective"], ObjectiveUpdate(name="Renamed"))),
+        ("delete_activity", lambda db: crud.delete_activity(db, ids["activity"])),
+        ("delete_objective", lambda db: crud.delete_objective(db, ids["objective"])),
+    ]
+
+
+def full_scans(connection, statement: str, parameters):
+    """
+    Returns the plan steps of `statement` that scan a whole table.
+    """
+    plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    # Rows are (id, parent, notused, detail)
+    details = [row[3] for row in plan]
+    # Reading back the rows of a subquery ("CO-ROUTINE anon_1" ... "SCAN anon_1")
+    # is not a table scan; the subquery's own steps are checked like any other
+    subqueries = {
+        detail.split(" ", 1)[1] for detail in details if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))
+    }
+    return [
+        detail for detail in details
+        if detail.startswith("SCAN ") and detail[5:] not in subqueries and not _indexed(detail)
+    ]
+
+
+def _indexed(detail: str) -> bool:
+    # "SCAN 3 CONSTANT ROWS" is a VALUES list, not a table
+    if "CONSTANT ROW" in detail:
+        return True
+    # A virtual table is always "scanned"; it uses its own index when the plan
+    # passes it a constraint ("VIRTUAL TABLE INDEX 0:M1" for MATCH, "0:=" for
+    # a rowid) and reads everything when that part is empty ("INDEX 0:")
+    if " VIRTUAL TABLE INDEX " in detail:
+        return not detail.endswith(":")
+    return False
+
+
+def check(engine, paths):
+    """
+    Runs every path and returns [(path name, statement, scanning steps)].
+    """
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith(("PRAGMA", "BEGIN", "EXPLAIN")):
+            executed.append((statement, parameters))
+
+    problems = []
+    for name, run in paths:
+        executed.clear()
+        db = session_factory()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            run(db)
+            db.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+            db.close()
+        with engine.connect() as connection:
+            for statement, parameters in executed:
+                steps = full_scans(connection, statement, parameters)
+                if steps:
+                    problems.append((name, statement, steps))
+    return problems
+
+
+def scratch_engine(path: str):
+    import database
+    import datagen
+    import migrations
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", database.configure_connection)
+    migrations.migrate(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        datagen.generate(db, projects=3, objectives=3, activities=3, kpis=2, tasks=5)
+    finally:
+        db.close()
+    return engine
+
+
+def sample_ids(engine):
+    """
+    An ID of each level for hot_paths(); the activity is the last one, so
+    deleting it leaves the others in place.
+    """
+    import database_models as db_models
+
+    with engine.connect() as connection:
+        return {
+            "project": connection.execute(db_models.Project.__table__.select().limit(1)).first().id,
+            "objective": connection.execute(db_models.Objective.__table__.select().limit(1)).first().id,
+            "activity": connection.execute(db_models.Activity.__table__.select()
+                                           .order_by(db_models.Activity.id.desc()).limit(1)).first().id,
+            "kpi": connection.execute(db_models.KPI.__table__.select().limit(1)).first().id,
+            "task": connection.execute(db_models.Task.__table__.select().limit(1)).first().id,
+        }
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        engine = scratch_engine(os.path.join(directory, "plans.db"))
+        problems = check(engine, hot_paths(sample_ids(engine)))
+        engine.dispose()
+
+    for name, statement, steps in problems:
+        print(f"{name}: {' '.join(statement.split())}")
+        for step in steps:
+            print(f"    {step}")
+    print(f"{len(problems)} statements scan a whole table.")
+    sys.exit(1 if problems else 0)
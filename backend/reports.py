@@ -0,0 +1,358 @@
+# /backend/reports.py
+
+import csv
+import html
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, aliased
+
+import database_models as db_models
+import progress
+
+# openpyxl is optional; without it reports can only be built as CSV or HTML
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Donor reports: one row per KPI with its progress and the progress of the
+# activity and objective it belongs to, as CSV, HTML or XLSX.
+#
+# Reports are built in the background by a ReportRunner: a request creates a
+# job row and returns at once, a small pool of worker threads streams the rows
+# from the database and writes them to the file as they come, and the client
+# polls the job until it can download the file. Job rows are written through
+# the app's single writer like every other write; reading the rows for a
+# report happens on the worker's own session (one consistent snapshot).
+#
+# Finished jobs are kept for the runner's `retention` and then expire: their
+# rows and files are deleted the next time a report is submitted or the app
+# starts, so neither the table nor the reports directory grows without bound.
+
+COLUMNS = [
+    "Project", "Objective", "Objective progress %", "Activity", "Activity progress %",
+    "KPI", "Unit", "Current value", "Target value", "KPI progress %",
+]
+
+IN_FLIGHT = ("queued", "running")
+FINISHED = ("done", "failed")
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _percent(kpi_count, progress_sum):
+    return round(100 * progress.completion(kpi_count or 0, progress_sum or 0.0), 1)
+
+
+# --- Rows ---
+
+def report_rows(db: Session, project_ids=None, yield_per: int = 5000):
+    """
+    Yields one row per KPI of the given projects (all if None), as lists in
+    COLUMNS order, grouped by project, objective and activity. Node progress
+    comes from the maintained progress rows; rows are streamed from the database
+    rather than loaded all at once.
+    """
+    Project, Objective, Activity, KPI = db_models.Project, db_models.Objective, db_models.Activity, db_models.KPI
+    objective_progress, activity_progress = aliased(db_models.Progress), aliased(db_models.Progress)
+    query = select(
+        Project.name.label("project"), Objective.name.label("objective"),
+        objective_progress.kpi_count.label("objective_kpis"), objective_progress.progress_sum.label("objective_sum"),
+        Activity.name.label("activity"),
+        activity_progress.kpi_count.label("activity_kpis"), activity_progress.progress_sum.label("activity_sum"),
+        KPI.name.label("kpi"), KPI.unit, KPI.current_value, KPI.target_value,
+    ).select_from(KPI) \
+        .join(Activity, Activity.id == KPI.activity_id) \
+        .join(Objective, Objective.id == Activity.objective_id) \
+        .join(Project, Project.id == Objective.project_id) \
+        .outerjoin(objective_progress, (objective_progress.level == "objective")
+                   & (objective_progress.node_id == Objective.id)) \
+        .outerjoin(activity_progress, (activity_progress.level == "activity")
+                   & (activity_progress.node_id == Activity.id))
+    if project_ids is not None:
+        query = query.where(Objective.project_id.in_(list(project_ids)))
+    query = query.order_by(Project.id, Objective.id, Activity.id, KPI.id)
+
+    for row in db.execute(query.execution_options(yield_per=yield_per)):
+        yield [
+            row.project, row.objective, _percent(row.objective_kpis, row.objective_sum),
+            row.activity, _percent(row.activity_kpis, row.activity_sum),
+            row.kpi, row.unit, row.current_value, row.target_value,
+            round(100 * progress.kpi_ratio(row.current_value, row.target_value), 1),
+        ]
+
+
+# --- File writers (each writes its rows to the file as they come) ---
+
+class CSVReport:
+    media_type = "text/csv"
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class HTMLReport:
+    """
+    One section per project and objective, and a KPI table per activity.
+    """
+    media_type = "text/html"
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>KPI report</title></head><body>\n')
+        self.current = (None, None, None)
+
+    def write(self, row):
+        project, objective, objective_percent, activity, activity_percent = row[:5]
+        write, escape = self.file.write, html.escape
+        if (project, objective, activity) != self.current:
+            if self.current[2] is not None:
+                write("</table>\n")
+            if project != self.current[0]:
+                write(f"<h1>{escape(project or '')}</h1>\n")
+            if (project, objective) != self.current[:2]:
+                write(f"<h2>{escape(objective or '')} ({objective_percent}%)</h2>\n")
+            write(f"<h3>{escape(activity or '')} ({activity_percent}%)</h3>\n<table>\n<tr>")
+            write("".join(f"<th>{escape(column)}</th>" for column in COLUMNS[5:]))
+            write("</tr>\n")
+            self.current = (project, objective, activity)
+        write("<tr>" + "".join(f"<td>{escape('' if value is None else str(value))}</td>" for value in row[5:]))
+        write("</tr>\n")
+
+    def close(self):
+        if self.current[2] is not None:
+            self.file.write("</table>\n")
+        self.file.write("</body></html>\n")
+        self.file.close()
+
+
+class XLSXReport:
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def __init__(self, path: str):
+        # A write-only workbook keeps rows on disk instead of in memory
+        self.path = path
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("KPIs")
+        self.sheet.append(COLUMNS)
+
+    def write(self, row):
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+FORMATS = {"csv": CSVReport, "html": HTMLReport}
+if openpyxl is not None:
+    FORMATS["xlsx"] = XLSXReport
+
+
+def write_report(db: Session, fmt: str, project_ids, path: str) -> int:
+    """
+    Builds a report into `path`. Returns the number of KPI rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"{fmt} reports are not available on this server")
+    report = FORMATS[fmt](path)
+    count = 0
+    try:
+        for row in report_rows(db, project_ids):
+            report.write(row)
+            count += 1
+    finally:
+        report.close()
+    return count
+
+
+# --- Job rows (run on the writer thread, without committing) ---
+
+def _job(row: db_models.ReportJob):
+    return {
+        "id": row.id, "format": row.format, "project_ids": row.project_ids, "status": row.status,
+        "rows": row.rows, "size_bytes": row.size_bytes, "error": row.error,
+        "created_at": row.created_at, "started_at": row.started_at, "finished_at": row.finished_at,
+    }
+
+
+def job_key(fmt: str, project_ids=None) -> str:
+    return f"{fmt}:" + ("all" if project_ids is None else ",".join(str(value) for value in project_ids))
+
+
+def create_job(db: Session, fmt: str, project_ids=None, max_pending: int = None):
+    """
+    Queues a report, unless an identical one is already queued or running.
+    Returns {"job": job, "created": bool}; job is None when `max_pending`
+    jobs are already in flight.
+    """
+    if project_ids is not None:
+        project_ids = sorted(set(project_ids))
+    key = job_key(fmt, project_ids)
+    existing = db.query(db_models.ReportJob).filter(
+        db_models.ReportJob.key == key, db_models.ReportJob.status.in_(IN_FLIGHT)
+    ).first()
+    if existing is not None:
+        return {"job": _job(existing), "created": False}
+    if max_pending is not None:
+        pending = db.query(db_models.ReportJob.id).filter(db_models.ReportJob.status.in_(IN_FLIGHT)).count()
+        if pending >= max_pending:
+            return {"job": None, "created": False}
+
+    job = db_models.ReportJob(key=key, format=fmt, project_ids=project_ids, status="queued", rows=0,
+                              created_at=_utcnow())
+    db.add(job)
+    db.flush()
+    return {"job": _job(job), "created": True}
+
+
+def _set_status(db: Session, job_id: int, **values):
+    db.execute(update(db_models.ReportJob).where(db_models.ReportJob.id == job_id).values(**values))
+
+
+def start_job(db: Session, job_id: int):
+    _set_status(db, job_id, status="running", started_at=_utcnow())
+    return _job(db.get(db_models.ReportJob, job_id))
+
+
+def finish_job(db: Session, job_id: int, rows: int, size_bytes: int):
+    _set_status(db, job_id, status="done", rows=rows, size_bytes=size_bytes, error=None, finished_at=_utcnow())
+
+
+def fail_job(db: Session, job_id: int, error: str):
+    _set_status(db, job_id, status="failed", error=error, finished_at=_utcnow())
+
+
+def requeue_interrupted(db: Session):
+    """
+    Puts back in the queue the jobs a previous process left queued or running.
+    Returns their IDs, oldest first.
+    """
+    ids = list(db.execute(
+        select(db_models.ReportJob.id).where(db_models.ReportJob.status.in_(IN_FLIGHT)).order_by(db_models.ReportJob.id)
+    ).scalars())
+    if ids:
+        db.execute(update(db_models.ReportJob).where(db_models.ReportJob.id.in_(ids))
+                   .values(status="queued", started_at=None))
+    return ids
+
+
+def expire_jobs(db: Session, before: datetime):
+    """
+    Deletes the jobs that finished before `before`. Returns them, so their
+    files can be removed.
+    """
+    rows = db.query(db_models.ReportJob).filter(
+        db_models.ReportJob.status.in_(FINISHED), db_models.ReportJob.finished_at < before
+    ).all()
+    if rows:
+        db.execute(delete(db_models.ReportJob).where(db_models.ReportJob.id.in_([row.id for row in rows])))
+    return [_job(row) for row in rows]
+
+
+def get_job(db: Session, job_id: int):
+    """
+    Retrieves a job's status, or None.
+    """
+    row = db.get(db_models.ReportJob, job_id)
+    return _job(row) if row is not None else None
+
+
+# --- Runner ---
+
+class ReportRunner:
+    """
+    Builds queued reports on a bounded pool of worker threads.
+
+    At most `max_workers` reports are built at once and at most `max_pending`
+    are queued or running; identical requests share one job. Files are written
+    to `directory` under a temporary name and renamed when complete, so a
+    download never sees half a file. Finished jobs and their files are deleted
+    once they are older than `retention`.
+    """
+
+    def __init__(self, writer, session_factory, directory: str, max_workers: int = 2, max_pending: int = 50,
+                 retention: timedelta = timedelta(days=1)):
+        self.writer = writer
+        self.session_factory = session_factory
+        self.directory = directory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def path(self, job: dict) -> str:
+        return os.path.join(self.directory, f"report-{job['id']}.{job['format']}")
+
+    async def submit(self, fmt: str, project_ids=None):
+        """
+        Queues a report (or joins the identical one in flight) and returns its
+        job, or None if too many reports are pending.
+        """
+        await self.expire()
+        outcome = await self.writer.submit_async(create_job, fmt, project_ids, self.max_pending)
+        if outcome["created"]:
+            self._schedule(outcome["job"]["id"])
+        return outcome["job"]
+
+    async def resume(self):
+        """
+        Restarts the jobs an earlier process did not finish.
+        """
+        await self.expire()
+        for job_id in await self.writer.submit_async(requeue_interrupted):
+            self._schedule(job_id)
+
+    async def expire(self):
+        """
+        Deletes the jobs finished more than `retention` ago, and their files.
+        """
+        for job in await self.writer.submit_async(expire_jobs, _utcnow() - self.retention):
+            path = self.path(job)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def shutdown(self):
+        # Jobs still queued stay queued in the database and resume on restart
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule(self, job_id: int):
+        with self._lock:
+            if self._executor is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="report")
+            self._executor.submit(self._build, job_id)
+
+    def _build(self, job_id: int):
+        job = self.writer.submit(start_job, job_id)
+        path = self.path(job)
+        partial = path + ".part"
+        db = self.session_factory()
+        try:
+            rows = write_report(db, job["format"], job["project_ids"], partial)
+            os.replace(partial, path)
+        except Exception as exc:
+            if os.path.exists(partial):
+                os.remove(partial)
+            self.writer.submit(fail_job, job_id, f"{type(exc).__name__}: {exc}")
+            return
+        finally:
+            db.close()
+        self.writer.submit(finish_job, job_id, rows, os.path.getsize(path))
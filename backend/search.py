@@ -0,0 +1,265 @@
+# /backend/search.py
+
+import re
+import sys
+
+from sqlalchemy import (Column, Integer, MetaData, String, Table, bindparam, delete, insert, literal_column, select,
+                        union_all)
+from sqlalchemy.orm import Session
+
+import database_models as db_models
+
+# Full-text search over the names of projects, objectives, activities and KPIs
+# and the descriptions of tasks, backed by one SQLite FTS5 table.
+#
+# Every entity has a single row whose rowid encodes both its kind and its id
+# (id * KIND_STRIDE + kind code), so it can be replaced or deleted by primary
+# key without a lookup and hits are decoded without touching the FTS table
+# again. The index is maintained in the writer's transaction, like the
+# progress rows: crud.py and bulk_io.py call index() for new or renamed
+# entities and remove_*() before deleting them.
+TABLE = "search_index"
+KIND_STRIDE = 8
+KINDS = {"project": 0, "objective": 1, "activity": 2, "kpi": 3, "task": 4}
+KIND_NAMES = {code: kind for kind, code in KINDS.items()}
+
+# Kind -> (model, column holding the indexed text)
+SOURCES = {
+    "project": (db_models.Project, db_models.Project.name),
+    "objective": (db_models.Objective, db_models.Objective.name),
+    "activity": (db_models.Activity, db_models.Activity.name),
+    "kpi": (db_models.KPI, db_models.KPI.name),
+    "task": (db_models.Task, db_models.Task.description),
+}
+
+# Kind -> (kind of its parent, column holding the parent's id), to build hit paths
+PARENTS = {
+    "objective": ("project", db_models.Objective.project_id),
+    "activity": ("objective", db_models.Activity.objective_id),
+    "kpi": ("activity", db_models.KPI.activity_id),
+    "task": ("activity", db_models.Task.activity_id),
+}
+
+# The virtual table has no model: it lives in a MetaData of its own so that
+# create_all() never tries to build it as a plain table (migrations.py does).
+entries = Table(
+    TABLE, MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("text", String),
+)
+
+# Accents are folded ("échéance" matches "echeance"); the prefix indexes make
+# the prefix query on the last word an index lookup instead of a term scan.
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "text, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Ranking costs about 2µs per matching row, so a word found in most of a
+# million tasks would take seconds to rank in full. Matches are ranked per
+# kind: projects, objectives and activities are few and always ranked in full,
+# while only the first RANK_CANDIDATES matches of a CAPPED_KINDS kind (in
+# rowid order, i.e. the oldest entities) are ranked. A search whose matches
+# went past that cap is flagged as truncated: its later matches can only be
+# reached by a narrower query.
+RANK_CANDIDATES = 20000
+CAPPED_KINDS = ("kpi", "task")
+# Shorter prefixes are not in the prefix index and would scan the term list
+MIN_PREFIX = 2
+
+
+def rowid(kind: str, entity_id: int) -> int:
+    return entity_id * KIND_STRIDE + KINDS[kind]
+
+
+def _rowids(kind: str, ids):
+    """
+    Rowids of the given entity IDs (a list or a SELECT of IDs), as a SELECT.
+    """
+    model = SOURCES[kind][0]
+    return select(model.id * KIND_STRIDE + KINDS[kind]).where(model.id.in_(ids))
+
+
+# --- Incremental maintenance (run inside the caller's transaction) ---
+
+def index(db: Session, kind: str, rows):
+    """
+    Adds or replaces the entries of (id, text) pairs of one kind, in one
+    executemany. Entities without text are dropped from the index.
+    """
+    rows = list(rows)
+    present = [{"rowid": rowid(kind, entity_id), "text": value} for entity_id, value in rows if value]
+    missing = [{"entry": rowid(kind, entity_id)} for entity_id, value in rows if not value]
+    if present:
+        db.execute(insert(entries).prefix_with("OR REPLACE"), present)
+    if missing:
+        db.execute(delete(entries).where(entries.c.rowid == bindparam("entry")), missing)
+
+
+def remove(db: Session, kind: str, ids):
+    """
+    Drops the entries of the given entities (a list or a SELECT of IDs).
+    Must run before the entities themselves are deleted when given a SELECT.
+    """
+    db.execute(delete(entries).where(entries.c.rowid.in_(_rowids(kind, ids))))
+
+
+def remove_activities(db: Session, activity_ids):
+    """
+    Drops the entries of the given activities (a list or a SELECT of IDs) and of
+    their KPIs and tasks. Must run before any of them is deleted.
+    """
+    remove(db, "task", select(db_models.Task.id).where(db_models.Task.activity_id.in_(activity_ids)))
+    remove(db, "kpi", select(db_models.KPI.id).where(db_models.KPI.activity_id.in_(activity_ids)))
+    remove(db, "activity", activity_ids)
+
+
+# --- Recomputation from scratch ---
+
+def rebuild(db: Session):
+    """
+    Recreates every entry from the entity tables, one INSERT ... SELECT per kind.
+    Does not commit.
+    """
+    db.execute(delete(entries))
+    for kind, (model, column) in SOURCES.items():
+        db.execute(insert(entries).from_select(
+            ["rowid", "text"],
+            select(model.id * KIND_STRIDE + KINDS[kind], column).where(column.is_not(None), column != ""),
+        ))
+
+
+# --- Queries ---
+
+def match_expression(query: str):
+    """
+    Turns free text into an FTS5 query: every word must appear, the last one
+    (of MIN_PREFIX letters or more) possibly as a prefix, so results follow
+    the user while they type. Words are quoted, so FTS5 operators and
+    punctuation in the input are taken literally. Returns None if the input
+    has no words.
+    """
+    words = _TOKEN.findall(query or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _paths(db: Session, kind: str, ids):
+    """
+    {id: (text, project_id, path)} for the given entities of one kind, where path
+    lists their ancestors from the project down, in one query.
+    """
+    model, column = SOURCES[kind]
+    query = select(model.id, column)
+    ancestors, current = [], kind
+    while current in PARENTS:
+        parent, parent_column = PARENTS[current]
+        parent_model = SOURCES[parent][0]
+        query = query.join(parent_model, parent_model.id == parent_column)
+        query = query.add_columns(parent_model.id, parent_model.name)
+        ancestors.append(parent)
+        current = parent
+
+    found = {}
+    for row in db.execute(query.where(model.id.in_(ids))):
+        path = [
+            {"kind": ancestor, "id": row[2 + 2 * i], "name": row[3 + 2 * i]}
+            for i, ancestor in enumerate(ancestors)
+        ][::-1]
+        project_id = path[0]["id"] if path else row[0]
+        found[row[0]] = (row[1], project_id, path)
+    return found
+
+
+def _matches(expression: str, kind: str):
+    return select(entries.c.rowid, literal_column("rank").label("rank")) \
+        .where(literal_column(TABLE).op("MATCH")(expression)) \
+        .where(entries.c.rowid % KIND_STRIDE == KINDS[kind])
+
+
+def _truncated(db: Session, expression: str, kinds) -> bool:
+    """
+    Whether a capped kind has more than RANK_CANDIDATES matches. Only reads
+    rowids, so no match is ranked.
+    """
+    for kind in kinds:
+        if kind in CAPPED_KINDS:
+            beyond = select(entries.c.rowid).where(literal_column(TABLE).op("MATCH")(expression)) \
+                .where(entries.c.rowid % KIND_STRIDE == KINDS[kind]).limit(1).offset(RANK_CANDIDATES)
+            if db.execute(beyond).first() is not None:
+                return True
+    return False
+
+
+def search(db: Session, query: str, kind: str = None, limit: int = 20, offset: int = 0):
+    """
+    Retrieves one page of entities matching `query`, best first (FTS5's bm25
+    rank), each with its ancestor path. `kind` restricts the hits to one kind.
+    Returns {"items": [...], "next_offset": offset of the next page or None,
+    "truncated": True if some matches were not ranked (see RANK_CANDIDATES)}.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return {"items": [], "next_offset": None, "truncated": False}
+
+    kinds = [kind] if kind is not None else list(KINDS)
+    parts = []
+    for candidate_kind in kinds:
+        matches = _matches(expression, candidate_kind)
+        if candidate_kind in CAPPED_KINDS:
+            matches = select(matches.limit(RANK_CANDIDATES).subquery())
+        parts.append(matches)
+    candidates = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery()
+    # rowid breaks ties, so pages never overlap
+    ranked = select(candidates.c.rowid, candidates.c.rank).order_by(candidates.c.rank, candidates.c.rowid)
+
+    items, position = [], offset
+    while True:
+        wanted = limit - len(items)
+        rows = db.execute(ranked.limit(wanted + 1).offset(position)).all()
+        page = [(KIND_NAMES[row.rowid % KIND_STRIDE], row.rowid // KIND_STRIDE, row.rank) for row in rows[:wanted]]
+        position += len(page)
+        by_kind = {}
+        for hit_kind, entity_id, _ in page:
+            by_kind.setdefault(hit_kind, []).append(entity_id)
+        described = {hit_kind: _paths(db, hit_kind, ids) for hit_kind, ids in by_kind.items()}
+
+        for hit_kind, entity_id, score in page:
+            # Skip an entry whose entity is gone (only possible if the index drifted)
+            if entity_id not in described[hit_kind]:
+                continue
+            value, project_id, path = described[hit_kind][entity_id]
+            items.append({"kind": hit_kind, "id": entity_id, "text": value, "project_id": project_id,
+                          "path": path, "score": -score})
+        more = len(rows) > wanted
+        # Skipped entries leave the page short: fill it from the next matches
+        if len(items) == limit or not more:
+            break
+    next_offset = position if more else None
+    return {"items": items, "next_offset": next_offset, "truncated": _truncated(db, expression, kinds)}
+
+
+if __name__ == "__main__":
+    # python search.py "words"   -> print the best hits for a query
+    # python search.py --rebuild -> recreate the whole index
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if "--rebuild" in sys.argv:
+            rebuild(db)
+            db.commit()
+            print("Search index rebuilt.")
+        words = " ".join(arg for arg in sys.argv[1:] if not arg.startswith("--"))
+        if words:
+            for item in search(db, words)["items"]:
+                trail = " > ".join(node["name"] for node in item["path"])
+                print(f"{item['score']:8.3f}  {item['kind']:<9} {item['id']:<8} {item['text']}  ({trail})")
+    finally:
+        db.close()
@@ -0,0 +1,27 @@
+# /backend/serialization.py
+
+import json
+from datetime import date, datetime
+
+# orjson is optional: it encodes large trees several times faster than the
+# standard library, but the output is the same compact JSON either way.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """
+    Encodes plain dicts, lists and scalars (dates included) to compact UTF-8 JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
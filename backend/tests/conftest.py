@@ -0,0 +1,43 @@
+# /backend/tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# The backend modules import each other by absolute name, as when main.py runs
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Anything that imports database.py must never touch the real database.db
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "orchid-nexus-tests.db"))
+
+import migrations
+from database import configure_connection
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """
+    A migrated SQLite database of its own for each test, with the app's pragmas.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", configure_connection)
+    migrations.migrate(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
@@ -0,0 +1,69 @@
+# /backend/tests/test_broadcaster.py
+
+import asyncio
+import threading
+import time
+
+from broadcaster import Broadcaster
+
+SUBSCRIBERS = 500
+EVENTS = 20
+
+
+def test_fan_out_to_many_subscribers():
+    async def scenario():
+        broadcaster = Broadcaster()
+        subscriptions = [broadcaster.subscribe(1) for _ in range(SUBSCRIBERS)]
+        assert broadcaster.subscriber_count(1) == SUBSCRIBERS
+
+        async def listen(subscription):
+            latencies = []
+            for _ in range(EVENTS):
+                event = await subscription.get(timeout=5)
+                latencies.append(time.perf_counter() - event["sent"])
+            return latencies
+
+        listeners = [asyncio.create_task(listen(subscription)) for subscription in subscriptions]
+
+        # Published from another thread, as the writer thread does
+        def publish():
+            for version in range(1, EVENTS + 1):
+                broadcaster.publish(1, {"type": "changes", "version": version, "sent": time.perf_counter()})
+                time.sleep(0.005)
+
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        latencies = sorted(latency for result in await asyncio.gather(*listeners) for latency in result)
+        publisher.join()
+
+        for subscription in subscriptions:
+            broadcaster.unsubscribe(subscription)
+        assert broadcaster.subscriber_count() == 0
+        return latencies
+
+    latencies = asyncio.run(scenario())
+    assert len(latencies) == SUBSCRIBERS * EVENTS
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{SUBSCRIBERS} subscribers: p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms")
+    assert p99 < 1.0
+
+
+def test_overflowing_queue_collapses_to_resync():
+    async def scenario():
+        broadcaster = Broadcaster(max_queue=10)
+        subscription = broadcaster.subscribe(7)
+        for version in range(1, 14):
+            broadcaster.publish(7, {"type": "changes", "version": version})
+        # Delivery happens on the loop: let it run
+        await asyncio.sleep(0.01)
+        events = []
+        while (event := await subscription.get(timeout=0.01)) is not None:
+            events.append(event)
+        return subscription, events
+
+    subscription, events = asyncio.run(scenario())
+    # The 11th event overflowed the queue: the ten waiting ahead of it and the
+    # event itself became one resync, and what came next queued up behind it
+    assert events[0] == {"type": "resync", "project_id": 7, "version": 11}
+    assert [event["version"] for event in events[1:]] == [12, 13]
+    assert subscription.dropped == 10
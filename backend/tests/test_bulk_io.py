@@ -0,0 +1,65 @@
+# /backend/tests/test_bulk_io.py
+
+import io
+import json
+
+import pytest
+
+import bulk_io
+import crud
+import database_models as db_models
+import progress
+from datagen import generate_records
+from group_commit import GroupCommitter
+from models import ObjectiveCreate
+
+
+def ndjson(records) -> io.BytesIO:
+    return io.BytesIO("".join(json.dumps(record) + "\n" for record in records).encode())
+
+
+def test_import_commits_in_several_transactions(session_factory, db):
+    records = list(generate_records(2, 2, 3, 2, 10))
+    writer = GroupCommitter(session_factory)
+    transactions = []
+    run = writer.run
+
+    def counting_run(fn, *args, **kwargs):
+        if fn == importer._write:
+            transactions.append(len(args[0]))
+        return run(fn, *args, **kwargs)
+
+    writer.run = counting_run
+    importer = bulk_io.BulkImporter(batch_size=20, transaction_batches=2, writer=writer)
+    for record in records:
+        importer.add(record)
+        if len(transactions) == 1 and not importer.records:
+            # Another writer gets its turn between two transactions of the import
+            project_id = db.query(db_models.Project.id).scalar()
+            writer.run(crud.create_objective, objective=ObjectiveCreate(name="Added meanwhile"), project_id=project_id)
+    counts = importer.finish()
+
+    assert transactions == [40, 40, 40, 40, 2] and sum(transactions) == len(records)
+    assert counts == {"project": 2, "objective": 4, "activity": 12, "kpi": 24, "task": 120}
+    assert db.query(db_models.Objective).count() == 5
+    assert db.query(db_models.Task).count() == 120
+    assert progress.check_consistency(db) == []
+
+
+def test_invalid_record_leaves_nothing_behind(session_factory, db):
+    records = list(generate_records(1, 2, 3, 2, 10))
+    records.append({"type": "task", "parent": "p0.o0.a0", "kpi": "missing", "description": "Orphan"})
+    writer = GroupCommitter(session_factory)
+
+    with pytest.raises(bulk_io.BulkImportError, match=f"line {len(records)}: task refers to unknown kpi 'missing'"):
+        bulk_io.import_stream(ndjson(records), writer=writer, batch_size=10)
+    assert db.query(db_models.Project).count() == 0
+
+
+def test_export_round_trip(db):
+    bulk_io.import_stream(ndjson(generate_records(1, 2, 2, 2, 3)), db=db)
+    exported = b"".join(bulk_io.export_chunks(lambda: db, "csv"))
+
+    counts = bulk_io.import_stream(io.BytesIO(exported), "csv", db=db)
+    assert counts == {"project": 1, "objective": 2, "activity": 4, "kpi": 8, "task": 12}
+    assert db.query(db_models.Task).count() == 24
@@ -0,0 +1,46 @@
+# /backend/tests/test_compression.py
+
+from fastapi import FastAPI, Header
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from compression import CompressionMiddleware
+from tree_cache import etag_matches, make_etag
+
+BODY = b'{"objectives": []}' * 200
+ETAG = make_etag(BODY)
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/tree")
+    def tree(if_none_match: str = Header(None)):
+        if etag_matches(if_none_match, ETAG):
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return Response(BODY, media_type="application/json", headers={"ETag": ETAG})
+
+    return TestClient(app)
+
+
+def test_each_coding_gets_its_own_strong_etag():
+    client = make_client()
+    identity = client.get("/tree", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/tree", headers={"Accept-Encoding": "gzip"})
+
+    assert identity.headers["etag"] == ETAG
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == ETAG[:-1] + '-gzip"'
+    assert gzipped.content == BODY
+
+
+def test_revalidation_ignores_the_coding_suffix():
+    client = make_client()
+    gzip_etag = client.get("/tree", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    revalidated = client.get("/tree", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzip_etag
+    assert client.get("/tree", headers={"Accept-Encoding": "identity", "If-None-Match": ETAG}).status_code == 304
+    assert not etag_matches('"other-gzip"', ETAG)
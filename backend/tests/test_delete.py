@@ -0,0 +1,92 @@
+# /backend/tests/test_delete.py
+
+from sqlalchemy import event, func, select
+
+import crud
+import database_models as db_models
+import datagen
+import progress
+import search
+from models import DataEntryPayload
+
+
+def populate(db, activities: int, tasks: int):
+    datagen.generate(db, projects=2, objectives=2, activities=activities, kpis=2, tasks=tasks)
+    # Measurements and rollups for every KPI
+    for task_id, in db.query(db_models.Task.id).all():
+        crud.apply_data_entry(db, DataEntryPayload(taskId=task_id, numericValue=1))
+    db.commit()
+
+
+def subtree_rows(db, objective_ids):
+    activity_ids = select(db_models.Activity.id).where(db_models.Activity.objective_id.in_(objective_ids))
+    kpi_ids = select(db_models.KPI.id).where(db_models.KPI.activity_id.in_(activity_ids))
+    return {
+        "activities": db.query(db_models.Activity).filter(db_models.Activity.id.in_(activity_ids)).count(),
+        "kpis": db.query(db_models.KPI).filter(db_models.KPI.id.in_(kpi_ids)).count(),
+        "tasks": db.query(db_models.Task).filter(db_models.Task.activity_id.in_(activity_ids)).count(),
+        "measurements": db.query(db_models.KPIMeasurement).filter(db_models.KPIMeasurement.kpi_id.in_(kpi_ids)).count(),
+        "rollups": db.query(db_models.KPIRollup).filter(db_models.KPIRollup.kpi_id.in_(kpi_ids)).count(),
+    }
+
+
+def search_entries(db) -> int:
+    return db.execute(select(func.count()).select_from(search.entries)).scalar()
+
+
+def test_delete_objectives_removes_the_whole_subtree(db):
+    populate(db, activities=3, tasks=4)
+    project_id = db.query(db_models.Project.id).order_by(db_models.Project.id).first()[0]
+    objective_ids = [row.id for row in db.query(db_models.Objective.id).filter_by(project_id=project_id)]
+    kept = subtree_rows(db, [row.id for row in db.query(db_models.Objective.id).filter(
+        db_models.Objective.project_id != project_id)])
+
+    [change_set] = crud.delete_objectives(db, objective_ids + [999999])
+
+    assert [change["id"] for change in change_set["changes"]] == objective_ids
+    assert db.query(db_models.Objective).filter_by(project_id=project_id).count() == 0
+    assert set(subtree_rows(db, objective_ids).values()) == {0}
+    assert db.query(db_models.Progress).filter(
+        db_models.Progress.project_id == project_id, db_models.Progress.level != "project").count() == 0
+    assert db.query(db_models.Progress).filter_by(level="project", node_id=project_id).one().kpi_count == 0
+    # The other project is untouched, and the index holds exactly what is left
+    assert subtree_rows(db, [row.id for row in db.query(db_models.Objective.id)]) == kept
+    indexed = search_entries(db)
+    search.rebuild(db)
+    assert search_entries(db) == indexed
+    assert progress.check_consistency(db) == []
+
+
+def count_delete_statements(engine, db, activities: int, tasks: int) -> int:
+    populate(db, activities=activities, tasks=tasks)
+    objective_id = db.query(db_models.Objective.id).order_by(db_models.Objective.id.desc()).first()[0]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        crud.delete_objective(db, objective_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def test_delete_statement_count_does_not_grow_with_the_subtree(engine, session_factory):
+    small = count_delete_statements(engine, session_factory(), activities=1, tasks=1)
+    large = count_delete_statements(engine, session_factory(), activities=8, tasks=30)
+    assert small == large
+
+
+def test_bulk_delete_handles_more_ids_than_sqlite_binds(db):
+    populate(db, activities=2, tasks=1)
+    activity_ids = [row.id for row in db.query(db_models.Activity.id)]
+    # Real IDs spread over several chunks of unknown ones
+    ids = list(range(100000, 101200)) + activity_ids
+
+    change_sets = crud.delete_activities(db, ids)
+
+    assert sorted(change["id"] for change_set in change_sets for change in change_set["changes"]) == activity_ids
+    assert db.query(db_models.Activity).count() == 0
+    assert progress.check_consistency(db) == []
@@ -0,0 +1,56 @@
+# /backend/tests/test_forecast.py
+
+from datetime import date
+
+import numpy as np
+
+import database_models as db_models
+import forecast
+
+AS_OF = date(2026, 10, 14)
+
+
+def test_fit_and_statuses():
+    weeks = forecast.WINDOW_DAYS // 7
+    # Met; 5 a week, on track; 1 a week, too slow; a value that never moved; nothing recorded
+    target = np.full(5, 100.0)
+    current = np.array([100.0, 60.0, 20.0, 30.0, 0.0])
+    rollup_kpi = np.repeat([1, 2], weeks)
+    rollup_day = np.tile(np.arange(-7 * weeks, 0, 7, dtype=float), 2)
+    rollup_total = np.repeat([5.0, 1.0], weeks)
+
+    samples = forecast.samples_from_rollups(current, -7 * weeks, rollup_kpi, rollup_day, rollup_total)
+    fitted = forecast.fit(current, target, *samples, horizon_days=90,
+                          recorded=np.bincount(rollup_kpi, minlength=5))
+
+    assert [forecast.STATUSES[status] for status in fitted["status"]] == \
+        ["met", "on_track", "at_risk", "stalled", "no_data"]
+    assert np.allclose(fitted["rate"], [0.0, 5 / 7, 1 / 7, 0.0, 0.0])
+    assert np.allclose(fitted["days_to_target"], [0.0, 56.0, 560.0, np.inf, np.inf])
+    assert np.allclose(fitted["projected_ratio"], [1.0, 1.0, 20 / 100 + 90 / 700, 0.3, 0.0])
+
+    summary = forecast.summarise(np.array([7, 7, 8, 8, 9]), current, target, fitted)
+    assert summary["id"].tolist() == [7, 8, 9]
+    assert summary["at_risk_kpis"].tolist() == [0, 2, 0]
+    assert np.allclose(summary["completion"], [0.8, 0.25, 0.0])
+
+
+def test_portfolio_forecast_on_a_database(db):
+    forecast.populate(db, kpis=200, as_of=AS_OF)
+    # A new KPI, with nothing recorded yet
+    kpi = db.query(db_models.KPI).order_by(db_models.KPI.id.desc()).first()
+    db.query(db_models.KPIRollup).filter_by(kpi_id=kpi.id).delete()
+    kpi.current_value = 0
+    db.commit()
+
+    result = forecast.portfolio_forecast(db, as_of=AS_OF)
+    assert result["kpi_count"] == 200
+    assert [project["kpi_count"] for project in result["projects"]] == [100, 100]
+    assert result["at_risk_kpis"] == sum(project["at_risk_kpis"] for project in result["projects"])
+
+    project_id = db.query(db_models.Project.id).order_by(db_models.Project.id.desc()).first()[0]
+    detail = forecast.project_forecast(db, project_id, as_of=AS_OF)
+    statuses = {item["id"]: item["status"] for item in detail["kpis"]}
+    assert statuses[kpi.id] == "no_data"
+    assert detail["project"]["at_risk_kpis"] == sum(status in ("at_risk", "stalled") for status in statuses.values())
+    assert detail["project"]["at_risk_kpis"] == result["projects"][-1]["at_risk_kpis"]
@@ -0,0 +1,124 @@
+# /backend/tests/test_group_commit.py
+
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+import crud
+import database_models as db_models
+import datagen
+import progress
+from group_commit import GroupCommitter
+from models import DataEntryPayload
+
+THREADS = 20
+ENTRIES_PER_THREAD = 25
+
+
+@pytest.fixture
+def task_id(db):
+    datagen.generate(db, projects=1, objectives=1, activities=1, kpis=1, tasks=1)
+    return db.query(db_models.Task.id).scalar()
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_entries_against_one_kpi(session_factory, db, task_id):
+    kpi = db.query(db_models.KPI).one()
+    start_value = kpi.current_value
+    writer = GroupCommitter(session_factory)
+    errors = []
+
+    def enter(n):
+        try:
+            for i in range(ENTRIES_PER_THREAD):
+                assert writer.submit(crud.apply_data_entry, DataEntryPayload(taskId=task_id, numericValue=1)) is not None
+        except Exception as exc:
+            errors.append(exc)
+
+    run_threads(THREADS, enter)
+
+    assert errors == []
+    db.expire_all()
+    total = THREADS * ENTRIES_PER_THREAD
+    assert db.query(db_models.KPI.current_value).scalar() == start_value + total
+    assert db.query(db_models.KPIMeasurement).filter_by(kpi_id=kpi.id).count() == total
+    assert progress.check_consistency(db) == []
+
+
+def test_failing_item_does_not_fail_its_batch(session_factory, db, task_id):
+    writer = GroupCommitter(session_factory, window=0.2)
+    outcomes = {}
+
+    def broken(db):
+        raise ValueError("bad entry")
+
+    def enter(n):
+        fn, args = (broken, ()) if n == 0 else (crud.apply_data_entry, (DataEntryPayload(taskId=task_id, numericValue=1),))
+        try:
+            outcomes[n] = writer.submit(fn, *args)
+        except Exception as exc:
+            outcomes[n] = exc
+
+    run_threads(4, enter)
+
+    assert isinstance(outcomes.pop(0), ValueError)
+    assert all(isinstance(outcome, dict) for outcome in outcomes.values())
+    db.expire_all()
+    assert db.query(db_models.KPIMeasurement).count() == 3
+
+
+def test_lock_timeout_fails_the_batch_at_once(engine, session_factory, db, task_id):
+    busy_timeout_ms = 300
+
+    @event.listens_for(engine, "connect")
+    def short_timeout(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+
+    db.close()
+    engine.dispose()
+    writer = GroupCommitter(session_factory, window=0.2)
+    outcomes = {}
+
+    def enter(n):
+        try:
+            outcomes[n] = writer.submit(crud.apply_data_entry, DataEntryPayload(taskId=task_id, numericValue=1))
+        except Exception as exc:
+            outcomes[n] = exc
+
+    holder = sqlite3.connect(engine.url.database)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        run_threads(4, enter)
+        elapsed = time.monotonic() - started
+    finally:
+        holder.rollback()
+        holder.close()
+
+    assert all(isinstance(outcome, OperationalError) for outcome in outcomes.values())
+    # One wait for the whole batch, not one more per item
+    assert elapsed < 2 * busy_timeout_ms / 1000 + 0.2
+
+
+def test_entry_for_an_orphaned_kpi_is_not_found(db, task_id):
+    # What the baseline delete_objective left behind: children with no parent
+    activity = db.query(db_models.Activity).one()
+    activity.objective_id = None
+    db.commit()
+    kpi_value = db.query(db_models.KPI.current_value).scalar()
+
+    assert crud.apply_data_entry(db, DataEntryPayload(taskId=task_id, numericValue=3)) is None
+    db.commit()
+    assert db.query(db_models.KPI.current_value).scalar() == kpi_value
+    assert db.query(db_models.KPIMeasurement).count() == 0
@@ -0,0 +1,53 @@
+# /backend/tests/test_metrics.py
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+import crud
+import database_models as db_models
+import datagen
+import metrics
+from group_commit import GroupCommitter
+from models import DataEntryPayload
+
+
+def test_batched_writes_are_not_reported_as_n_plus_one(engine, db):
+    metrics.instrument_engine(engine)
+    stats = metrics.RequestStats()
+    token = metrics._current_request.set(stats)
+    try:
+        for batch in range(metrics.N_PLUS_ONE_THRESHOLD):
+            db.execute(insert(db_models.Project), [{"name": f"P{batch}.{n}"} for n in range(3)])
+        db.commit()
+        assert stats.statements == metrics.N_PLUS_ONE_THRESHOLD
+        assert stats.most_repeated() is None
+
+        for project_id in range(1, metrics.N_PLUS_ONE_THRESHOLD + 1):
+            db.execute(select(db_models.Project.name).where(db_models.Project.id == project_id)).scalar()
+    finally:
+        metrics._current_request.reset(token)
+    statement, count = stats.most_repeated()
+    assert statement.startswith("SELECT") and count == metrics.N_PLUS_ONE_THRESHOLD
+
+
+def test_writes_are_charged_to_their_request(engine, session_factory, db):
+    datagen.generate(db, projects=1, objectives=1, activities=1, kpis=1, tasks=1)
+    task_id = db.query(db_models.Task.id).scalar()
+    registry = metrics.Registry()
+    writer = GroupCommitter(session_factory)
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware, registry=registry)
+
+    @app.post("/data-entry")
+    async def data_entry(payload: DataEntryPayload):
+        return await writer.submit_async(crud.apply_data_entry, payload)
+
+    metrics.instrument_engine(engine)
+    with TestClient(app) as client:
+        assert client.post("/data-entry", json={"taskId": task_id, "numericValue": 2}).status_code == 200
+
+    assert registry._db_seconds["/data-entry"] > 0
+    # The entry's lookup, increment, measurement, rollups, progress and change
+    statements = registry._statements["/data-entry"]
+    assert statements.sum >= 5
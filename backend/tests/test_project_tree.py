@@ -0,0 +1,80 @@
+# /backend/tests/test_project_tree.py
+
+from contextlib import contextmanager
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event
+
+import crud
+import datagen
+from models import Project, ProjectTree
+
+
+@contextmanager
+def recorded_statements(engine):
+    """
+    Collects the (statement, parameters) of every SELECT the engine runs.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def rows_fetched(engine, statements) -> int:
+    # Runs the recorded statements again to count the rows each one returns
+    with engine.connect() as connection:
+        return sum(len(connection.exec_driver_sql(statement, parameters).fetchall())
+                   for statement, parameters in statements)
+
+
+def count_nodes(node) -> int:
+    children = ("objectives", "activities", "kpis", "tasks")
+    return 1 + sum(count_nodes(child) for key in children for child in node.get(key, []))
+
+
+def test_get_project_reads_each_level_once(engine, db):
+    # Two projects of different sizes, tasks spread over several KPIs, so a
+    # KPI x Task cartesian product would fetch far more rows than there are nodes
+    datagen.generate(db, projects=1, objectives=2, activities=2, kpis=2, tasks=3)
+    datagen.generate(db, projects=1, objectives=4, activities=5, kpis=3, tasks=10, seed=1)
+    small_id, large_id = [row.id for row in db.query(crud.db_models.Project.id).order_by("id")]
+
+    for project_id, expected_nodes in ((small_id, 1 + 2 + 4 + 8 + 12), (large_id, 1 + 4 + 20 + 60 + 200)):
+        db.expire_all()
+        with recorded_statements(engine) as statements:
+            tree = crud.get_project(db, project_id)
+        assert count_nodes(tree) == expected_nodes
+        assert len(statements) == 5
+        # Rows grow with the tree itself: one per node
+        assert rows_fetched(engine, statements) == expected_nodes
+
+
+def test_get_project_stops_at_depth(engine, db):
+    datagen.generate(db, projects=1, objectives=2, activities=3, kpis=2, tasks=4)
+    project_id = db.query(crud.db_models.Project.id).scalar()
+
+    with recorded_statements(engine) as statements:
+        tree = crud.get_project(db, project_id, depth=1)
+    assert len(statements) == 2
+    assert all("activities" not in objective for objective in tree["objectives"])
+    assert crud.get_project(db, 999999) is None
+
+
+def test_partial_trees_match_the_response_schema(db):
+    datagen.generate(db, projects=1, objectives=2, activities=2, kpis=1, tasks=1)
+    project_id = db.query(crud.db_models.Project.id).scalar()
+
+    for depth, fields in ((1, None), (3, "objective.id,kpi.current_value,task.kpi_id")):
+        tree = crud.get_project(db, project_id, depth=depth, fields=crud.tree_fields(fields))
+        assert ProjectTree.model_validate(tree).model_dump(exclude_unset=True) == tree
+    with pytest.raises(ValidationError):
+        Project.model_validate(crud.get_project(db, project_id, fields=crud.tree_fields("objective.id")))
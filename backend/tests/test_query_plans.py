@@ -0,0 +1,12 @@
+# /backend/tests/test_query_plans.py
+
+import query_plans
+
+
+def test_hot_paths_never_scan_a_whole_table(tmp_path):
+    engine = query_plans.scratch_engine(str(tmp_path / "plans.db"))
+    try:
+        problems = query_plans.check(engine, query_plans.hot_paths(query_plans.sample_ids(engine)))
+    finally:
+        engine.dispose()
+    assert [(name, " ".join(statement.split()), steps) for name, statement, steps in problems] == []
@@ -0,0 +1,117 @@
+# /backend/tests/test_reports.py
+
+import asyncio
+import csv
+import os
+import time
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database_models as db_models
+import datagen
+import reports
+from group_commit import GroupCommitter
+
+
+def build_portfolio(db):
+    datagen.generate(db, projects=2, objectives=2, activities=2, kpis=2, tasks=0)
+    db.commit()
+    return db.query(db_models.KPI).count()
+
+
+def wait_until_finished(session_factory, job_id: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db = session_factory()
+        try:
+            job = reports.get_job(db, job_id)
+        finally:
+            db.close()
+        if job["status"] in reports.FINISHED:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"report {job_id} still {job['status']}")
+
+
+def test_identical_requests_share_one_job(db):
+    first = reports.create_job(db, "csv", [2, 1, 2])
+    same = reports.create_job(db, "csv", [1, 2])
+    other = reports.create_job(db, "html", [1, 2])
+    assert first["created"] and not same["created"] and other["created"]
+    assert same["job"]["id"] == first["job"]["id"] and first["job"]["project_ids"] == [1, 2]
+    assert reports.create_job(db, "csv", max_pending=2) == {"job": None, "created": False}
+
+    # A finished report is built again on the next request
+    reports.finish_job(db, first["job"]["id"], rows=0, size_bytes=0)
+    again = reports.create_job(db, "csv", [1, 2])
+    assert again["created"] and again["job"]["id"] != first["job"]["id"]
+
+
+def test_report_is_built_and_interrupted_jobs_resume(db, session_factory, tmp_path):
+    kpis = build_portfolio(db)
+    # A job the previous process was building when it stopped
+    interrupted = reports.create_job(db, "csv")["job"]
+    reports.start_job(db, interrupted["id"])
+    db.commit()
+
+    runner = reports.ReportRunner(GroupCommitter(session_factory), session_factory, str(tmp_path / "reports"))
+    asyncio.run(runner.resume())
+    job = wait_until_finished(session_factory, interrupted["id"])
+    runner.shutdown()
+
+    assert job["status"] == "done" and job["rows"] == kpis
+    with open(runner.path(job), newline="", encoding="utf-8") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == reports.COLUMNS and len(rows) == kpis + 1
+    assert job["size_bytes"] == os.path.getsize(runner.path(job))
+    assert os.listdir(tmp_path / "reports") == [os.path.basename(runner.path(job))]
+
+
+def test_finished_reports_expire(db, session_factory, tmp_path):
+    build_portfolio(db)
+    runner = reports.ReportRunner(GroupCommitter(session_factory), session_factory, str(tmp_path / "reports"))
+    job = asyncio.run(runner.submit("csv"))
+    wait_until_finished(session_factory, job["id"])
+    second = asyncio.run(runner.submit("html"))
+    wait_until_finished(session_factory, second["id"])
+
+    runner.retention = timedelta(0)
+    asyncio.run(runner.expire())
+    runner.shutdown()
+    assert db.query(db_models.ReportJob).count() == 0
+    assert os.listdir(tmp_path / "reports") == []
+
+
+def test_download(db, engine, session_factory, tmp_path, monkeypatch):
+    import main
+
+    kpis = build_portfolio(db)
+    runner = reports.ReportRunner(GroupCommitter(session_factory), session_factory, str(tmp_path / "reports"))
+    monkeypatch.setattr(main, "report_runner", runner)
+    read_engine = create_async_engine(f"sqlite+aiosqlite:///{engine.url.database}")
+    read_sessions = async_sessionmaker(read_engine, expire_on_commit=False)
+
+    async def get_db():
+        async with read_sessions() as session:
+            yield session
+
+    main.app.dependency_overrides[main.get_db] = get_db
+    try:
+        client = TestClient(main.app)
+        job = client.post("/reports", json={"format": "csv"}).json()
+        wait_until_finished(session_factory, job["id"])
+
+        response = client.get(f"/reports/{job['id']}/download")
+        assert response.status_code == 200 and response.headers["content-type"].startswith("text/csv")
+        assert len(response.text.splitlines()) == kpis + 1
+        assert client.get("/reports/999/download").status_code == 404
+
+        # A server without the writer the report was built with
+        monkeypatch.delitem(reports.FORMATS, "csv")
+        assert client.get(f"/reports/{job['id']}/download").status_code == 410
+    finally:
+        main.app.dependency_overrides.clear()
+        runner.shutdown()
+        asyncio.run(read_engine.dispose())
@@ -0,0 +1,51 @@
+# /backend/tests/test_search.py
+
+from sqlalchemy import delete, func, select
+
+import database_models as db_models
+import datagen
+import search
+
+
+def test_pages_stay_full_when_the_index_drifted(db):
+    datagen.generate(db, projects=1, objectives=1, activities=1, kpis=1, tasks=30)
+    task_ids = [row.id for row in db.query(db_models.Task.id).order_by(db_models.Task.id)]
+    # Tasks deleted behind the index's back leave entries without an entity
+    db.execute(delete(db_models.Task).where(db_models.Task.id.in_(task_ids[::2])))
+    db.commit()
+
+    seen, offset, pages = [], 0, 0
+    while offset is not None:
+        page = search.search(db, "site", kind="task", limit=4, offset=offset)
+        assert page["items"] or page["next_offset"] is None
+        if page["next_offset"] is not None:
+            assert len(page["items"]) == 4
+        seen += [item["id"] for item in page["items"]]
+        offset, pages = page["next_offset"], pages + 1
+
+    assert sorted(seen) == task_ids[1::2]
+    assert pages == 4
+
+
+def test_rebuild_matches_the_entity_tables(db):
+    datagen.generate(db, projects=2, objectives=2, activities=2, kpis=1, tasks=3)
+    indexed = db.execute(select(func.count()).select_from(search.entries)).scalar()
+    search.rebuild(db)
+    assert db.execute(select(func.count()).select_from(search.entries)).scalar() == indexed == 2 + 4 + 8 + 8 + 24
+
+
+def test_capped_kinds_do_not_hide_the_other_kinds(db, monkeypatch):
+    datagen.generate(db, projects=1, objectives=1, activities=4, kpis=1, tasks=3)
+    activity_id = db.query(func.max(db_models.Activity.id)).scalar()
+    task_ids = [row.id for row in db.query(db_models.Task.id)]
+    # The tasks all come before the activity in rowid order
+    search.index(db, "task", [(task_id, "harbour works") for task_id in task_ids])
+    search.index(db, "activity", [(activity_id, "harbour")])
+    db.commit()
+    monkeypatch.setattr(search, "RANK_CANDIDATES", 3)
+
+    found = search.search(db, "harbour", limit=50)
+    assert ("activity", activity_id) in [(item["kind"], item["id"]) for item in found["items"]]
+    assert len(found["items"]) == 4 and found["next_offset"] is None
+    assert found["truncated"]
+    assert not search.search(db, "harbour", kind="activity")["truncated"]
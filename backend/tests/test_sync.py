@@ -0,0 +1,55 @@
+# /backend/tests/test_sync.py
+
+import pydantic
+import pytest
+from sqlalchemy import event
+
+import crud
+import database_models as db_models
+import datagen
+import progress
+from models import SyncEntry, SyncRequest
+
+
+def test_apply_entries_once_each(engine, db):
+    datagen.generate(db, projects=1, objectives=1, activities=2, kpis=2, tasks=4)
+    tasks = db.query(db_models.Task.id, db_models.Task.kpi_id).order_by(db_models.Task.id).all()
+    before = dict(db.query(db_models.KPI.id, db_models.KPI.current_value))
+    entries = [SyncEntry(clientId=f"e{n}", taskId=tasks[n % len(tasks)].id, numericValue=n + 1) for n in range(40)]
+    entries += [SyncEntry(clientId="e0", taskId=tasks[0].id, numericValue=99),
+                SyncEntry(clientId="lost", taskId=999999, numericValue=5)]
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    outcome = crud.apply_entries(db, entries)
+    db.commit()
+    # Per KPI rather than per entry: 4 KPIs, each an UPDATE, a progress upsert and a change
+    assert len(statements) < 4 * 4 + 8
+
+    statuses = [result["status"] for result in outcome["results"]]
+    assert statuses == ["applied"] * 40 + ["duplicate", "not_found"]
+    expected = dict(before)
+    for n in range(40):
+        expected[tasks[n % len(tasks)].kpi_id] += n + 1
+    assert dict(db.query(db_models.KPI.id, db_models.KPI.current_value)) == expected
+    assert db.query(db_models.KPIMeasurement).count() == 40
+    assert sum(total for total, in db.query(db_models.KPIRollup.total).filter_by(bucket="day")) == sum(range(1, 41))
+    [change_set] = outcome["changes"]
+    assert sorted(change["id"] for change in change_set["changes"]) == sorted(expected)
+    assert progress.check_consistency(db) == []
+
+    # Resending the batch counts nothing twice, and an entry that was never
+    # applied is not passed off as a duplicate
+    again = crud.apply_entries(db, entries)
+    db.commit()
+    assert [result["status"] for result in again["results"]] == ["duplicate"] * 41 + ["not_found"]
+    assert db.query(db_models.AppliedEntry).count() == 40
+    assert again["changes"] == []
+    assert dict(db.query(db_models.KPI.id, db_models.KPI.current_value)) == expected
+
+
+def test_sync_batches_are_capped():
+    entries = [{"clientId": str(n), "taskId": 1, "numericValue": 1} for n in range(1001)]
+    with pytest.raises(pydantic.ValidationError):
+        SyncRequest(entries=entries)
+    assert len(SyncRequest(entries=entries[:1000]).entries) == 1000
@@ -0,0 +1,75 @@
+# /backend/tests/test_tree_cache.py
+
+import crud
+import database_models as db_models
+import datagen
+from models import DataEntryPayload
+from tree_cache import TreeCache, project_trees
+
+
+def first_project(db) -> int:
+    datagen.generate(db, projects=1, objectives=1, activities=1, kpis=1, tasks=2)
+    db.commit()
+    return db.query(db_models.Project.id).order_by(db_models.Project.id).first()[0]
+
+
+def test_a_commit_drops_the_project_trees(db):
+    project_id = first_project(db)
+    version = crud.get_project_version(db, project_id)
+    generation = project_trees.generation(project_id)
+    project_trees.put(project_id, generation, b"tree", "full", version)
+    project_trees.put(project_id, generation, b"objectives", "depth=1", version)
+    assert project_trees.get(project_id, "full", version).body == b"tree"
+
+    task_id = db.query(db_models.Task.id).first()[0]
+    crud.apply_data_entry(db, DataEntryPayload(taskId=task_id, numericValue=1))
+    # Nothing is dropped before the write commits
+    assert project_trees.get(project_id, "full") is not None
+    db.commit()
+
+    assert project_trees.get(project_id, "full") is None
+    assert project_trees.get(project_id, "depth=1") is None
+    # A reader that started before the write cannot store what it loaded
+    project_trees.put(project_id, generation, b"old tree", "full", version)
+    assert project_trees.get(project_id, "full") is None
+
+
+def test_a_rolled_back_write_keeps_the_trees(db):
+    project_id = first_project(db)
+    project_trees.put(project_id, project_trees.generation(project_id), b"tree", "full")
+    crud.record_change(db, project_id, "project", "update", project_id)
+    db.rollback()
+    assert project_trees.get(project_id, "full").body == b"tree"
+
+
+def test_a_write_by_another_process_is_seen_through_the_version(db):
+    project_id = first_project(db)
+    version = crud.get_project_version(db, project_id)
+    project_trees.put(project_id, project_trees.generation(project_id), b"tree", "full", version)
+
+    # Another worker logs a change: this process's after_commit hook never runs
+    db.add(db_models.Change(project_id=project_id, version=version + 1, entity="project", op="update",
+                            entity_id=project_id))
+    db.flush()
+    db.info.pop("changed_projects", None)
+    db.commit()
+
+    current = crud.get_project_version(db, project_id)
+    assert current == version + 1
+    assert project_trees.get(project_id, "full", current) is None
+    assert project_trees.get(project_id, "full") is None
+
+
+def test_least_recently_used_trees_are_evicted_first():
+    cache = TreeCache(max_bytes=30)
+    for project_id in (1, 2, 3):
+        cache.put(project_id, 0, b"x" * 10)
+    cache.get(1)
+    cache.put(4, 0, b"y" * 10)
+
+    assert cache.get(2) is None
+    assert [project_id for project_id in (1, 3, 4) if cache.get(project_id) is not None] == [1, 3, 4]
+    assert cache.size == 30 and cache.evictions == 1
+    # A tree larger than the whole budget is served but never cached
+    assert cache.put(5, 0, b"z" * 31).body == b"z" * 31
+    assert cache.get(5) is None and cache.size == 30
@@ -0,0 +1,186 @@
+# /backend/tree_cache.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from compression import etag_without_encoding
+
+# In-process cache of encoded GET /projects/{project_id} responses.
+# A project can have several entries, one per variant of the response (depth
+# and fields asked for); they are cached and invalidated together.
+#
+# Writes call mark_changed(db, project_id) (crud.record_change does it for
+# every change it logs). The affected trees are dropped once that session
+# commits, never before: a reader could otherwise re-cache the old tree
+# between the invalidation and the commit. Each project also has a generation
+# number, bumped on every invalidation. A reader notes it before querying, and
+# put() refuses the tree if it changed meanwhile, so a read that raced with a
+# write can never store data the write made stale.
+#
+# The cache only sees the commits of this process, so every entry also keeps
+# the project's version (the latest row of its change log) from when it was
+# loaded. Readers pass the current version to get(), one indexed lookup, and
+# an entry from an older version, left behind by another worker's write, is
+# dropped instead of served.
+
+
+class CachedTree:
+    __slots__ = ("body", "etag", "version")
+
+    def __init__(self, body: bytes, etag: str, version: int = None):
+        self.body = body
+        self.etag = etag
+        self.version = version
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """
+    If-None-Match uses the weak comparison: W/"x" matches "x". The encoding
+    suffix CompressionMiddleware adds ("x-gzip") is ignored too.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(etag_without_encoding(tag.strip().removeprefix("W/")) == etag for tag in if_none_match.split(","))
+
+
+class TreeCache:
+    """
+    An LRU of encoded project trees, holding at most `max_bytes` of JSON.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # (project_id, variant) -> CachedTree, least recently used first
+        self._entries = OrderedDict()
+        self._variants = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, project_id: int, variant=None, version: int = None):
+        """
+        Returns the cached entry, or None. An entry cached at another version
+        than `version` (when given) is stale: it is dropped.
+        """
+        key = (project_id, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and version is not None and entry.version != version:
+                del self._entries[key]
+                self._forget_variant(project_id, variant)
+                self.size -= len(entry.body)
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def generation(self, project_id: int) -> int:
+        """
+        Read this before loading a tree and pass it to put().
+        """
+        with self._lock:
+            return self._generations.get(project_id, 0)
+
+    def put(self, project_id: int, generation: int, body: bytes, variant=None, version: int = None) -> CachedTree:
+        """
+        Caches an encoded tree, loaded at `version`, unless the project changed
+        since `generation` was read. Returns the entry to serve either way.
+        """
+        entry = CachedTree(body, make_etag(body), version)
+        key = (project_id, variant)
+        with self._lock:
+            if self._generations.get(project_id, 0) != generation or len(body) > self.max_bytes:
+                return entry
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._entries[key] = entry
+            self._variants.setdefault(project_id, set()).add(variant)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                (evicted_project, evicted_variant), evicted = self._entries.popitem(last=False)
+                self._forget_variant(evicted_project, evicted_variant)
+                self.size -= len(evicted.body)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, project_ids):
+        with self._lock:
+            for project_id in project_ids:
+                self._generations[project_id] = self._generations.get(project_id, 0) + 1
+                for variant in self._variants.pop(project_id, ()):
+                    entry = self._entries.pop((project_id, variant), None)
+                    if entry is not None:
+                        self.size -= len(entry.body)
+                        self.invalidations += 1
+
+    def _forget_variant(self, project_id: int, variant):
+        variants = self._variants.get(project_id)
+        if variants is not None:
+            variants.discard(variant)
+            if not variants:
+                del self._variants[project_id]
+
+    def metric_lines(self):
+        """
+        The cache counters in the Prometheus text format.
+        """
+        with self._lock:
+            values = (
+                ("tree_cache_hits_total", "counter", "Project trees served from the cache.", self.hits),
+                ("tree_cache_misses_total", "counter", "Project trees loaded from the database.", self.misses),
+                ("tree_cache_evictions_total", "counter", "Trees evicted to stay within the memory budget.",
+                 self.evictions),
+                ("tree_cache_invalidations_total", "counter", "Cached trees dropped after a write.",
+                 self.invalidations),
+                ("tree_cache_entries", "gauge", "Project trees currently cached.", len(self._entries)),
+                ("tree_cache_bytes", "gauge", "Bytes of JSON currently cached.", self.size),
+            )
+        lines = []
+        for name, kind, help_text, value in values:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return lines
+
+
+# TREE_CACHE_BYTES sets the memory budget (64 MiB by default, 0 disables caching)
+project_trees = TreeCache(int(os.environ.get("TREE_CACHE_BYTES", 64 * 1024 * 1024)))
+
+
+# --- Invalidation on commit ---
+
+def mark_changed(db: Session, project_id: int):
+    """
+    Drops the project's cached tree when `db` commits.
+    """
+    db.info.setdefault("changed_projects", set()).add(project_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    changed = session.info.pop("changed_projects", None)
+    if changed:
+        project_trees.invalidate(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("changed_projects", None)
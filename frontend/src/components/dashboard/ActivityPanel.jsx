@@ -1,13 +1,14 @@
 // /frontend/src/components/dashboard/ActivityPanel.jsx
 
 import KPIIndicator from './KPIIndicator';
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 // We will create the KPIIndicator component in the next step
 // import KPIIndicator from './KPIIndicator';
 
-function ActivityPanel({ activity, onDelete, onUpdate }) {
-  // Each activity panel can also be collapsed
-  const [isOpen, setIsOpen] = useState(true);
+function ActivityPanel({ activity, onDelete, onUpdate, onLoadDetails, onLoadMoreTasks }) {
+  // Each activity panel can also be collapsed; its KPIs and tasks are fetched
+  // the first time it opens
+  const [isOpen, setIsOpen] = useState(false);
   const [isEditing, setIsEditing] = useState(false);
   const [editedName, setEditedName] = useState(activity.name);
 
@@ -18,9 +19,17 @@ function ActivityPanel({ activity, onDelete, onUpdate }) {
     setIsEditing(false);
   };
 
+  // Fetched whenever the panel is open without them, as in ObjectivePanel
+  useEffect(() => {
+    if (isOpen && !activity.kpis) onLoadDetails(activity.id);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [isOpen, activity.kpis]);
+
+  const handleToggle = () => setIsOpen(!isOpen);
+
   return (
     <div className="activity-panel">
-      <div className="panel-header-activity" onClick={() => setIsOpen(!isOpen)}>
+      <div className="panel-header-activity" onClick={handleToggle}>
         {isEditing ? (
           <input
             type="text"
@@ -45,7 +54,8 @@ function ActivityPanel({ activity, onDelete, onUpdate }) {
         </div>
       </div>
 
-      {isOpen && (
+      {isOpen && !activity.kpis && <p>Loading...</p>}
+      {isOpen && activity.kpis && (
         <div className="activity-content">
           <div className="kpi-section">
             <h5>Key Performance Indicators</h5>
@@ -60,6 +70,9 @@ function ActivityPanel({ activity, onDelete, onUpdate }) {
                 <li key={task.id}>{task.description}</li>
               ))}
             </ul>
+            {activity.tasksNextAfter && (
+              <button onClick={() => onLoadMoreTasks(activity.id, activity.tasksNextAfter)}>Show more tasks</button>
+            )}
           </div>
         </div>
       )}
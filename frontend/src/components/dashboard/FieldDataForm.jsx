@@ -38,7 +38,9 @@ function FieldDataForm({ tasks, onDataSubmit }) {
           onChange={(e) => setSelectedTaskId(e.target.value)}
           required
         >
-          <option value="" disabled>-- Choose a task --</option>
+          <option value="" disabled>
+            {tasks.length ? '-- Choose a task --' : '-- Open an activity to list its tasks --'}
+          </option>
           {tasks.map(task => (
             <option key={task.id} value={task.id}>
               {task.description}
@@ -2,13 +2,14 @@
 
 import ActivityPanel from './ActivityPanel';
 import AddActivityForm from './AddActivityForm';
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 // We will create the ActivityPanel component in a later step
 // import ActivityPanel from './ActivityPanel';
 
-function ObjectivePanel({ objective, onDelete, onUpdate, onCreateActivity, onDeleteActivity, onUpdateActivity }) {
+function ObjectivePanel({ objective, onDelete, onUpdate, onCreateActivity, onDeleteActivity, onUpdateActivity, onLoadActivities, onLoadActivityDetails, onLoadMoreTasks }) {
   // We use a state variable to control whether the panel's content is visible or hidden.
-  const [isOpen, setIsOpen] = useState(true);
+  // Panels start closed: the activities are only fetched the first time it opens.
+  const [isOpen, setIsOpen] = useState(false);
   // Add these inside the ObjectivePanel component
   const [isEditing, setIsEditing] = useState(false);
   const [editedName, setEditedName] = useState(objective.name);
@@ -20,9 +21,18 @@ function ObjectivePanel({ objective, onDelete, onUpdate, onCreateActivity, onDel
     setIsEditing(false); // Switch back to display mode
   };
 
+  // An open panel without activities fetches them: on the first open, and
+  // again after a resync reloaded the project without them
+  useEffect(() => {
+    if (isOpen && !objective.activities) onLoadActivities(objective.id);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [isOpen, objective.activities]);
+
+  const handleToggle = () => setIsOpen(!isOpen);
+
   return (
     <div className="objective-panel">
-      <div className="panel-header-objective" onClick={() => setIsOpen(!isOpen)}>
+      <div className="panel-header-objective" onClick={handleToggle}>
         {isEditing ? (
           <input
             type="text"
@@ -71,9 +81,16 @@ function ObjectivePanel({ objective, onDelete, onUpdate, onCreateActivity, onDel
             and render an ActivityPanel for each one.
             We will build this component next.
           */}
-          {objective.activities.map(activity => (
-              <ActivityPanel key={activity.id} activity={activity} onDelete={onDeleteActivity} onUpdate={onUpdateActivity} />
-              ))}
+          {!objective.activities ? (
+            <p>Loading activities...</p>
+          ) : (
+            objective.activities.map(activity => (
+              <ActivityPanel key={activity.id} activity={activity} onDelete={onDeleteActivity} onUpdate={onUpdateActivity} onLoadDetails={onLoadActivityDetails} onLoadMoreTasks={onLoadMoreTasks} />
+              ))
+          )}
+          {objective.activitiesNextAfter && (
+            <button onClick={() => onLoadActivities(objective.id, objective.activitiesNextAfter)}>Show more activities</button>
+          )}
           <AddActivityForm onSubmit={(activityName) => onCreateActivity(objective.id, activityName)} />
         </div>
       )}
@@ -6,6 +6,99 @@ import ObjectivePanel from '../components/dashboard/ObjectivePanel';
 import FieldDataForm from '../components/dashboard/FieldDataForm';
 import AddObjectiveForm from '../components/dashboard/AddObjectiveForm';
 
+const API_URL = 'http://127.0.0.1:8000';
+
+// The tree is loaded level by level: the project comes with its objectives
+// only, an objective's activities are fetched when it is first expanded, and
+// an activity's KPIs and tasks when it is. A node whose children were not
+// loaded yet has no list for them at all (as opposed to an empty one).
+const TASKS_PAGE_SIZE = 100;
+
+// Appends items to a node's list, skipping any we already hold: a node
+// created while the list was partly loaded is added by applyChanges and then
+// comes back with the next page, and a page fetched after a create committed
+// already holds the node when its change arrives.
+const appendNew = (existing = [], items) => {
+  const known = new Set(existing.map(item => item.id));
+  return [...existing, ...items.filter(item => !known.has(item.id))];
+};
+
+// Applies a change set returned by the backend to the project tree we hold,
+// so writes never need to refetch the whole project. Changes we already have
+// (the same change can arrive both as a response and over the event stream)
+// are skipped by version, and changes to nodes we have not loaded are
+// ignored: they will be up to date when those nodes are fetched.
+function applyChanges(projectData, changeSet) {
+  if (changeSet.project_id !== projectData.id) return projectData;
+  const newProjectData = JSON.parse(JSON.stringify(projectData));
+  const findActivity = (activityId) => newProjectData.objectives
+    .flatMap(obj => obj.activities || [])
+    .find(act => act.id === activityId);
+
+  for (const change of changeSet.changes) {
+    if (change.version <= projectData.version) continue;
+    const { entity, op, data } = change;
+    if (entity === 'objective') {
+      if (op === 'create') {
+        newProjectData.objectives = appendNew(newProjectData.objectives, [{ ...data, activities: [] }]);
+      } else if (op === 'update') {
+        const objective = newProjectData.objectives.find(obj => obj.id === data.id);
+        if (objective) objective.name = data.name;
+      } else if (op === 'delete') {
+        newProjectData.objectives = newProjectData.objectives.filter(obj => obj.id !== data.id);
+      }
+    } else if (entity === 'activity') {
+      const objective = newProjectData.objectives.find(obj => obj.id === data.objective_id);
+      if (!objective || !objective.activities) continue;
+      if (op === 'create') {
+        objective.activities = appendNew(objective.activities, [{ id: data.id, name: data.name, kpis: [], tasks: [] }]);
+      } else if (op === 'update') {
+        const activity = objective.activities.find(act => act.id === data.id);
+        if (activity) activity.name = data.name;
+      } else if (op === 'delete') {
+        objective.activities = objective.activities.filter(act => act.id !== data.id);
+      }
+    } else if (entity === 'kpi' && op === 'update') {
+      const activity = findActivity(data.activity_id);
+      const kpi = activity && activity.kpis && activity.kpis.find(k => k.id === data.id);
+      if (kpi) kpi.current_value = data.current_value;
+    }
+  }
+
+  newProjectData.version = Math.max(projectData.version, changeSet.version);
+  return newProjectData;
+}
+
+// Adds a page of activities to an objective
+function mergeActivities(projectData, objectiveId, page) {
+  const newProjectData = JSON.parse(JSON.stringify(projectData));
+  const objective = newProjectData.objectives.find(obj => obj.id === objectiveId);
+  if (!objective) return projectData;
+  objective.activities = appendNew(objective.activities, page.items);
+  objective.activitiesNextAfter = page.next_after;
+  return newProjectData;
+}
+
+// Adds KPIs and/or a page of tasks to an activity
+function mergeActivityDetails(projectData, activityId, kpiPage, taskPage) {
+  const newProjectData = JSON.parse(JSON.stringify(projectData));
+  const activity = newProjectData.objectives
+    .flatMap(obj => obj.activities || [])
+    .find(act => act.id === activityId);
+  if (!activity) return projectData;
+  if (kpiPage) activity.kpis = appendNew(activity.kpis, kpiPage.items);
+  if (taskPage) {
+    activity.tasks = appendNew(activity.tasks, taskPage.items);
+    activity.tasksNextAfter = taskPage.next_after;
+  }
+  return newProjectData;
+}
+
+// Field entries that could not reach the backend wait here until we are back online
+const PENDING_ENTRIES_KEY = 'orchid-nexus-pending-entries';
+const loadPendingEntries = () => JSON.parse(localStorage.getItem(PENDING_ENTRIES_KEY) || '[]');
+const savePendingEntries = (entries) => localStorage.setItem(PENDING_ENTRIES_KEY, JSON.stringify(entries));
+
 function DashboardPage() {
   // State for the project data and loading status
   const [projectData, setProjectData] = useState(null);
@@ -15,7 +108,7 @@ function DashboardPage() {
   useEffect(() => {
     const fetchProjectData = async () => {
       try {
-        const response = await axios.get('http://127.0.0.1:8000/projects/1');
+        const response = await axios.get(`${API_URL}/projects/1?depth=1`);
         setProjectData(response.data);
       } catch (error) {
         console.error("Failed to fetch project data:", error);
@@ -26,21 +119,82 @@ function DashboardPage() {
     fetchProjectData();
   }, []);
 
+  // Once the project is loaded, listen for the changes the backend pushes
+  // so this dashboard stays current without polling.
+  useEffect(() => {
+    if (isLoading || !projectData) return;
+    const projectUrl = `${API_URL}/projects/${projectData.id}`;
+    const source = new EventSource(`${projectUrl}/events?since=${projectData.version}`);
+
+    source.addEventListener('changes', (event) => {
+      const changeSet = JSON.parse(event.data);
+      setProjectData(prev => applyChanges(prev, changeSet));
+    });
+    // We fell too far behind the stream; reload the project once. The reload
+    // has no activities: open objective panels fetch theirs again
+    source.addEventListener('resync', async () => {
+      try {
+        const response = await axios.get(`${projectUrl}?depth=1`);
+        setProjectData(response.data);
+      } catch (error) {
+        console.error("Failed to resync project data:", error);
+      }
+    });
+
+    return () => source.close();
+    // Subscribe once per load; the stream itself keeps projectData current
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [isLoading]);
+
+  // Uploads every queued entry in a single request. Each entry keeps the
+  // clientId it was given when collected, so retrying after a dropped
+  // connection never counts anything twice.
+  const syncPendingEntries = async () => {
+    const entries = loadPendingEntries();
+    if (entries.length === 0) return;
+    try {
+      const response = await axios.post(`${API_URL}/sync`, { entries });
+      response.data.changes.forEach(changeSet => setProjectData(prev => applyChanges(prev, changeSet)));
+      const synced = new Set(response.data.results.map(result => result.clientId));
+      savePendingEntries(loadPendingEntries().filter(entry => !synced.has(entry.clientId)));
+    } catch (error) {
+      console.error("Failed to sync queued entries:", error);
+    }
+  };
+
+  // Flush the queue once loaded, and again whenever the connection comes back
+  useEffect(() => {
+    if (isLoading) return;
+    syncPendingEntries();
+    window.addEventListener('online', syncPendingEntries);
+    return () => window.removeEventListener('online', syncPendingEntries);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [isLoading]);
+
   // This is the function that handles the form submission
   const handleDataSubmit = async (submission) => {
     // This is the "Checkpoint" log you asked for.
     console.log("Step 1: handleDataSubmit was called with:", submission);
 
+    // The id lets the backend recognise this entry if it is ever sent again
+    const entry = { ...submission, clientId: crypto.randomUUID() };
+
     try {
       // This 'await' works because the function is now correctly marked as 'async'
-      const response = await axios.post('http://127.0.0.1:8000/data-entry', submission);
+      const response = await axios.post(`${API_URL}/data-entry`, entry);
       
       console.log("Step 2: Data received from backend:", response.data);
       
-      // Update the frontend state with the fresh data from the backend
-      setProjectData(response.data);
+      // The backend only sends back the KPI that changed; apply it to our copy
+      setProjectData(prev => applyChanges(prev, response.data));
 
     } catch (error) {
+      if (!error.response) {
+        // No answer from the backend: keep the entry and sync it when we are back online
+        savePendingEntries([...loadPendingEntries(), { ...entry, recordedAt: new Date().toISOString() }]);
+        alert("You appear to be offline. Your entry was saved and will be sent automatically.");
+        return;
+      }
       console.error("Step 3: Failed to submit data:", error);
       alert("There was an error submitting your data. Please try again.");
     }
@@ -57,25 +211,13 @@ const handleCreateObjective = async (objectiveName) => {
     // This is the new API call to our backend endpoint.
     // We send the new objective's name in the request body.
     const response = await axios.post(
-      `http://127.0.0.1:8000/projects/${projectId}/objectives`, 
+      `${API_URL}/projects/${projectId}/objectives`, 
       { name: objectiveName }
     );
 
-    // The backend responds with the newly created objective object.
-    const newObjective = response.data;
-
-    // --- Update the Frontend State ---
-    // It's a best practice to never modify state directly.
-    // We create a deep copy of the current project data.
-    const newProjectData = JSON.parse(JSON.stringify(projectData));
-
-    // Add the new objective to our copied data.
-    // We need to ensure the new objective has an empty 'activities' array
-    // so the frontend can render it correctly.
-    newProjectData.objectives.push({ ...newObjective, activities: [] });
-
-    // Update the state with the new project data, triggering a re-render.
-    setProjectData(newProjectData);
+    // The backend responds with a change set holding the newly created objective.
+    // applyChanges works on a copy, so we never modify state directly.
+    setProjectData(prev => applyChanges(prev, response.data));
 
   } catch (error) {
     console.error("Failed to create objective:", error);
@@ -93,19 +235,10 @@ const handleDeleteObjective = async (objectiveId) => {
 
   try {
     // Make the new API call to our DELETE endpoint
-    await axios.delete(`http://127.0.0.1:8000/objectives/${objectiveId}`);
-
-    // --- Update the Frontend State ---
-    // Create a new projectData object with the deleted objective filtered out.
-    const newProjectData = {
-      ...projectData,
-      objectives: projectData.objectives.filter(
-        (objective) => objective.id !== objectiveId
-      ),
-    };
+    const response = await axios.delete(`${API_URL}/objectives/${objectiveId}`);
 
     // Update the state to trigger a re-render
-    setProjectData(newProjectData);
+    setProjectData(prev => applyChanges(prev, response.data));
 
   } catch (error) {
     console.error("Failed to delete objective:", error);
@@ -118,19 +251,11 @@ const handleDeleteObjective = async (objectiveId) => {
 const handleUpdateObjective = async (objectiveId, newName) => {
   try {
     // Make the PUT request to our update endpoint
-    await axios.put(`http://127.0.0.1:8000/objectives/${objectiveId}`, {
+    const response = await axios.put(`${API_URL}/objectives/${objectiveId}`, {
       name: newName,
     });
 
-    // --- Update the Frontend State ---
-    const newProjectData = JSON.parse(JSON.stringify(projectData));
-    const objectiveToUpdate = newProjectData.objectives.find(
-      (obj) => obj.id === objectiveId
-    );
-    if (objectiveToUpdate) {
-      objectiveToUpdate.name = newName;
-    }
-    setProjectData(newProjectData);
+    setProjectData(prev => applyChanges(prev, response.data));
 
   } catch (error) {
     console.error("Failed to update objective:", error);
@@ -143,24 +268,13 @@ const handleUpdateObjective = async (objectiveId, newName) => {
 const handleCreateActivity = async (objectiveId, activityName) => {
   try {
     const response = await axios.post(
-      `http://127.0.0.1:8000/objectives/${objectiveId}/activities`,
+      `${API_URL}/objectives/${objectiveId}/activities`,
       { name: activityName }
     );
 
-    const newActivity = response.data;
-
-    // --- Update Frontend State ---
-    const newProjectData = JSON.parse(JSON.stringify(projectData));
-    const targetObjective = newProjectData.objectives.find(
-      (obj) => obj.id === objectiveId
-    );
-
-    if (targetObjective) {
-      // Add the new activity to the correct objective, ensuring it has empty
-      // arrays for its own children (kpis and tasks)
-      targetObjective.activities.push({ ...newActivity, kpis: [], tasks: [] });
-      setProjectData(newProjectData);
-    }
+    // applyChanges adds the new activity to the correct objective, with
+    // empty arrays for its own children (kpis and tasks)
+    setProjectData(prev => applyChanges(prev, response.data));
   } catch (error) {
     console.error("Failed to create activity:", error);
     alert("There was an error creating the activity.");
@@ -172,11 +286,9 @@ const handleCreateActivity = async (objectiveId, activityName) => {
 const handleDeleteActivity = async (activityId) => {
   if (!window.confirm("Are you sure you want to delete this activity?")) return;
   try {
-    await axios.delete(`http://127.0.0.1:8000/activities/${activityId}`);
-    // To update the state, we need to refresh the whole project
-    // This is simpler for now than manually removing the nested activity
-    const response = await axios.get(`http://127.0.0.1:8000/projects/${projectData.id}`);
-    setProjectData(response.data);
+    const response = await axios.delete(`${API_URL}/activities/${activityId}`);
+    // The change set tells us which activity to remove, no need to refetch the project
+    setProjectData(prev => applyChanges(prev, response.data));
   } catch (error) {
     console.error("Failed to delete activity:", error);
   }
@@ -184,14 +296,47 @@ const handleDeleteActivity = async (activityId) => {
 
 const handleUpdateActivity = async (activityId, newName) => {
   try {
-    await axios.put(`http://127.0.0.1:8000/activities/${activityId}`, { name: newName });
-    const response = await axios.get(`http://127.0.0.1:8000/projects/${projectData.id}`);
-    setProjectData(response.data);
+    const response = await axios.put(`${API_URL}/activities/${activityId}`, { name: newName });
+    setProjectData(prev => applyChanges(prev, response.data));
   } catch (error) {
     console.error("Failed to update activity:", error);
   }
 };
 
+// Fetches the next page of an objective's activities (the first one on expand)
+const handleLoadActivities = async (objectiveId, after = 0) => {
+  try {
+    const response = await axios.get(`${API_URL}/objectives/${objectiveId}/activities`, { params: { after } });
+    setProjectData(prev => mergeActivities(prev, objectiveId, response.data));
+  } catch (error) {
+    console.error("Failed to load activities:", error);
+  }
+};
+
+// Fetches an activity's KPIs and first page of tasks when it is expanded
+const handleLoadActivityDetails = async (activityId) => {
+  try {
+    const [kpis, tasks] = await Promise.all([
+      axios.get(`${API_URL}/activities/${activityId}/kpis`, { params: { limit: 500 } }),
+      axios.get(`${API_URL}/activities/${activityId}/tasks`, { params: { limit: TASKS_PAGE_SIZE } }),
+    ]);
+    setProjectData(prev => mergeActivityDetails(prev, activityId, kpis.data, tasks.data));
+  } catch (error) {
+    console.error("Failed to load activity details:", error);
+  }
+};
+
+const handleLoadMoreTasks = async (activityId, after) => {
+  try {
+    const response = await axios.get(`${API_URL}/activities/${activityId}/tasks`, {
+      params: { after, limit: TASKS_PAGE_SIZE },
+    });
+    setProjectData(prev => mergeActivityDetails(prev, activityId, null, response.data));
+  } catch (error) {
+    console.error("Failed to load tasks:", error);
+  }
+};
+
   // Handle the loading state
   if (isLoading) {
     return <div className="loading-spinner-container"><div className="loading-spinner"></div></div>;
@@ -202,9 +347,10 @@ const handleUpdateActivity = async (activityId, newName) => {
     return <div className="app-container"><h1>Error</h1><p>Could not load project data. Is the backend server running?</p></div>;
   }
 
-  // We can only calculate allTasks after projectData has been loaded
-  const allTasks = projectData.objectives.flatMap(obj => 
-    obj.activities.flatMap(act => act.tasks)
+  // We can only calculate allTasks after projectData has been loaded;
+  // only the tasks of activities expanded so far are known
+  const allTasks = projectData.objectives.flatMap(obj =>
+    (obj.activities || []).flatMap(act => act.tasks || [])
   );
 
   return (
@@ -216,7 +362,7 @@ const handleUpdateActivity = async (activityId, newName) => {
         <div className="dashboard-main-content">
           <h2>Project Objectives</h2>
           {projectData.objectives.map(objective => (
-            <ObjectivePanel key={objective.id} objective={objective} onDelete={handleDeleteObjective} onUpdate={handleUpdateObjective} onCreateActivity={handleCreateActivity} onDeleteActivity={handleDeleteActivity} onUpdateActivity={handleUpdateActivity} />
+            <ObjectivePanel key={objective.id} objective={objective} onDelete={handleDeleteObjective} onUpdate={handleUpdateObjective} onCreateActivity={handleCreateActivity} onDeleteActivity={handleDeleteActivity} onUpdateActivity={handleUpdateActivity} onLoadActivities={handleLoadActivities} onLoadActivityDetails={handleLoadActivityDetails} onLoadMoreTasks={handleLoadMoreTasks} />
           ))}
             <AddObjectiveForm onSubmit={handleCreateObjective} />
         </div>